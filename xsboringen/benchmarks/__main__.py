@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+# Tom van Steijn, Royal HaskoningDHV
+# Erik van Onselen, Deltares
+
+from xsboringen.benchmarks import suite, pipeline
+
+import click
+
+import tempfile
+import logging
+import sys
+
+
+# benchmark suites by name
+SUITES = {
+    'ingest': suite,
+    'pipeline': pipeline,
+    }
+
+
+@click.command()
+@click.option('--suite', 'suitename',
+    type=click.Choice(list(SUITES)),
+    default='ingest',
+    show_default=True,
+    help='readers and writers, or plot pipeline over parameter grid',
+    )
+@click.option('--scale',
+    type=click.Choice(list(suite.SCALES)),
+    default='small',
+    show_default=True,
+    help='number and size of synthetic input files',
+    )
+@click.option('--repeat',
+    type=int,
+    default=3,
+    show_default=True,
+    help='timed repeats per benchmark',
+    )
+@click.option('--filter', 'names',
+    multiple=True,
+    help='run benchmarks or cases with name containing text only',
+    )
+@click.option('--save',
+    type=click.Path(dir_okay=False, writable=True),
+    help='write results to JSON file',
+    )
+@click.option('--baseline',
+    type=click.Path(exists=True, dir_okay=False),
+    help='compare with results in JSON file',
+    )
+@click.option('--threshold',
+    type=float,
+    default=0.2,
+    show_default=True,
+    help='relative slowdown flagged as regression',
+    )
+@click.option('--workdir',
+    type=click.Path(file_okay=False),
+    help='folder for synthetic input files, temporary if not given',
+    )
+@click.option('--logging', 'level',
+    type=click.Choice(['warning', 'info', 'debug']),
+    default='warning',
+    help='log messages level'
+    )
+def main(suitename, scale, repeat, names, save, baseline, threshold, workdir,
+        level):
+    '''benchmark readers, classification, writers and plot pipeline on
+    synthetic data'''
+    logging.basicConfig(level=level.upper())
+    benchmarks = SUITES[suitename]
+
+    if workdir is None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            results = benchmarks.run_suite(tmpdir, scale=scale,
+                repeat=repeat, names=names or None)
+    else:
+        results = benchmarks.run_suite(workdir, scale=scale, repeat=repeat,
+            names=names or None)
+
+    comparison = None
+    if baseline is not None:
+        reference = suite.load_results(baseline)
+        if reference.get('suite', 'ingest') != suitename:
+            raise click.BadParameter('baseline is not a {s:} suite'.format(
+                s=suitename), param_hint='--baseline')
+        if reference.get('scale') != scale:
+            click.echo('baseline scale {b:} differs from {s:}'.format(
+                b=reference.get('scale'), s=scale), err=True)
+        comparison = benchmarks.compare(results, reference,
+            threshold=threshold)
+
+    click.echo(benchmarks.report(results, comparison))
+
+    if save is not None:
+        suite.save_results(results, save)
+
+    if comparison is not None and any(r[-1] for r in comparison):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
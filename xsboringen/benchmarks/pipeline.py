@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+# Tom van Steijn, Royal HaskoningDHV
+# Erik van Onselen, Deltares
+
+from xsboringen.benchmarks import synthetic, suite
+from xsboringen import profiling
+
+from collections import ChainMap, OrderedDict
+from itertools import product
+from copy import deepcopy
+from pathlib import Path
+import statistics
+import platform
+import logging
+import os
+
+log = logging.getLogger(os.path.basename(__file__))
+
+# parameter grid by scale: cross-sections, boreholes and CPT's per
+# cross-section, rows per CPT, section length [m], REGIS layers, grid cells
+# along longest side and grid file format
+GRIDS = {
+    'tiny': OrderedDict([
+        ('sections', [2]), ('boreholes', [5]), ('cpts', [2]),
+        ('rows', [200]), ('length', [500.]), ('layers', [3]),
+        ('cells', [50]), ('grid', ['.tif']),
+        ]),
+    'small': OrderedDict([
+        ('sections', [4]), ('boreholes', [10, 50]), ('cpts', [5]),
+        ('rows', [1000]), ('length', [1000., 5000.]), ('layers', [5, 20]),
+        ('cells', [200]), ('grid', ['.tif']),
+        ]),
+    'medium': OrderedDict([
+        ('sections', [8]), ('boreholes', [50, 200]), ('cpts', [20]),
+        ('rows', [2000]), ('length', [2000., 10000.]), ('layers', [10, 40]),
+        ('cells', [500, 2000]), ('grid', ['.tif', '.idf']),
+        ]),
+    'large': OrderedDict([
+        ('sections', [20]), ('boreholes', [200, 1000]), ('cpts', [50]),
+        ('rows', [4000]), ('length', [5000., 20000.]), ('layers', [40]),
+        ('cells', [2000, 5000]), ('grid', ['.tif', '.idf']),
+        ]),
+    }
+
+# buffer distance around cross-section lines [m]
+BUFFER_DISTANCE = 100.
+
+# CPT columns
+DATACOLUMNS = {
+    'depth': 'gecorrigeerde diepte',
+    'cone_resistance': 'conusweerstand',
+    'friction_ratio': 'wrijvingsgetal',
+    }
+
+
+def cases(scale):
+    '''parameter combinations of grid at scale'''
+    grid = GRIDS[scale]
+    for values in product(*grid.values()):
+        yield OrderedDict(zip(grid.keys(), values))
+
+
+def case_name(case):
+    '''short name of parameter combination'''
+    return ' '.join('{k:}={v:}'.format(k=k,
+        v=v.lstrip('.') if isinstance(v, str) else '{:g}'.format(v))
+        for k, v in case.items())
+
+
+def setup_case(folder, case):
+    '''write synthetic input files of case to folder and return plot
+    arguments'''
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    spacing = 4. * BUFFER_DISTANCE
+    x0, y0 = synthetic.EXTENT[:2]
+    lines = list(synthetic.section_lines(case['sections'], case['length'],
+        spacing, origin=(x0, y0)))
+
+    # lines and borehole point clouds within buffer of each line
+    shapefile = folder / 'lines.shp'
+    synthetic.write_lines_shapefile(shapefile, lines)
+    for i, (label, ((xmin, y), (xmax, _))) in enumerate(lines):
+        extent = (xmin, y - 0.9 * BUFFER_DISTANCE,
+            xmax, y + 0.9 * BUFFER_DISTANCE)
+        synthetic.write_gef_boreholes(folder / 'boreholes',
+            case['boreholes'], seed=i, extent=extent,
+            prefix='{label:}-B'.format(label=label),
+            )
+        synthetic.write_gef_cpts(folder / 'cpts',
+            case['cpts'], rows=case['rows'], seed=i, extent=extent,
+            prefix='{label:}-C'.format(label=label),
+            )
+
+    # surface and REGIS layers covering all lines
+    extent = (x0 - spacing, y0 - spacing,
+        x0 + case['length'] + spacing, y0 + (case['sections'] + 1) * spacing)
+    surfacefile, indexfile = synthetic.write_layer_model(folder / 'grids',
+        extent, case['cells'], case['layers'], suffix=case['grid'])
+    res = max(extent[2] - extent[0], extent[3] - extent[1]) / case['cells']
+
+    return {
+        'datasources': {
+            'boreholes': [
+                {'format': 'GEF boringen',
+                    'folder': str(folder / 'boreholes')},
+                {'format': 'GEF sonderingen',
+                    'folder': str(folder / 'cpts'),
+                    'datacolumns': DATACOLUMNS},
+                ],
+            'surfaces': [
+                {'name': 'mv', 'file': str(surfacefile), 'res': res,
+                    'style': 'mv'},
+                ],
+            'regismodel': {
+                'folder': str(indexfile.parent),
+                'indexfile': str(indexfile),
+                'fieldnames': {'number': 'number', 'name': 'name',
+                    'topfile': 'topfile', 'basefile': 'basefile',
+                    'color': 'color'},
+                'res': res,
+                },
+            },
+        'cross_section_lines': {'file': str(shapefile), 'labelfield': 'label'},
+        'result': {
+            'folder': str(folder / 'out'),
+            'translate_cpt': True,
+            'simplify': ['GEF Borehole'],
+            'min_thickness': 0.2,
+            },
+        'buffer_distance': BUFFER_DISTANCE,
+        'xtickstep': case['length'] / 10.,
+        'ylim': [-60., 15.],
+        }
+
+
+def stage_times(profiler):
+    '''exclusive wall time per stage group, e.g. all 'render {label}'
+    stages as 'render' '''
+    groups = OrderedDict()
+    for timing in profiler.stages.values():
+        group = timing.name.split()[0]
+        groups[group] = groups.get(group, 0.) + timing.self_wall
+    return groups
+
+
+def run_case(folder, case, config, repeat=3):
+    '''set up case in folder and run plot repeat times with stage timing'''
+    from xsboringen.scripts.plot import plot_cross_section
+    log.info('running {name:}'.format(name=case_name(case)))
+    kwargs = setup_case(folder, case)
+    times = []
+    stages = None
+    for _ in range(repeat):
+        # fresh copy, style lookups consume their records
+        runconfig = ChainMap({}, deepcopy(config))
+        profiler = profiling.enable()
+        try:
+            plot_cross_section(config=runconfig, **kwargs)
+        finally:
+            profiling.disable()
+        wall, _ = profiler.total
+        if not times or wall < min(times):
+            stages = stage_times(profiler)
+        times.append(wall)
+    best = min(times)
+    return {
+        'parameters': case,
+        'min': best,
+        'median': statistics.median(times),
+        'count': case['sections'],
+        'sections_per_minute': case['sections'] * 60. / best,
+        'times': times,
+        'stages': stages,
+        }
+
+
+def run_suite(workdir, scale='small', repeat=3, names=None):
+    '''run plot pipeline for parameter grid at scale and return results as
+    dict'''
+    config = suite.read_config()
+    results = OrderedDict()
+    for i, case in enumerate(cases(scale)):
+        name = case_name(case)
+        if (names is not None) and not any(n in name for n in names):
+            continue
+        folder = Path(workdir) / 'case{i:03d}'.format(i=i)
+        results[name] = run_case(folder, case, config, repeat=repeat)
+    return {
+        'suite': 'pipeline',
+        'scale': scale,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results,
+        }
+
+
+def flatten(results):
+    '''total and stage times as separate results for comparison'''
+    flat = OrderedDict()
+    for name, result in results['results'].items():
+        flat[name] = {'min': result['min']}
+        for stage, wall in (result.get('stages') or {}).items():
+            flat['{name:} / {stage:}'.format(name=name, stage=stage)] = {
+                'min': wall}
+    return {'results': flat}
+
+
+def compare(results, baseline, threshold=0.2):
+    '''compare total and stage times with baseline'''
+    return suite.compare(flatten(results), flatten(baseline),
+        threshold=threshold)
+
+
+def report(results, comparison=None):
+    '''pipeline results as text table with sections per minute and stage
+    times'''
+    stages = []
+    for result in results['results'].values():
+        for stage in result.get('stages') or {}:
+            if stage not in stages:
+                stages.append(stage)
+    width = max([len(n) for n in results['results']] + [len('case')])
+    header = ['min [s]', 'sect/min'] + stages
+    fmt = '{:<{w:d}s}' + '  {:>9s}' * len(header)
+    lines = [fmt.format('case', *header, w=width)]
+    for name, result in results['results'].items():
+        values = ['{:.2f}'.format(result['min']),
+            '{:.1f}'.format(result['sections_per_minute'])]
+        values += ['{:.2f}'.format(result['stages'].get(s, 0.))
+            for s in stages]
+        lines.append(fmt.format(name, *values, w=width))
+    if comparison is not None:
+        lines.append('')
+        lines.append(suite.report_comparison(comparison))
+    return '\n'.join(lines)
@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+# Tom van Steijn, Royal HaskoningDHV
+# Erik van Onselen, Deltares
+
+from xsboringen.benchmarks import synthetic
+
+from collections import OrderedDict
+from pathlib import Path
+import statistics
+import platform
+import logging
+import json
+import time
+import os
+
+log = logging.getLogger(os.path.basename(__file__))
+
+# number of files, layers per borehole and rows per CPT by scale
+SCALES = {
+    'tiny': {'n': 5, 'layers': 10, 'rows': 100, 'columns': 4},
+    'small': {'n': 100, 'layers': 20, 'rows': 1000, 'columns': 4},
+    'medium': {'n': 1000, 'layers': 30, 'rows': 2000, 'columns': 6},
+    'large': {'n': 5000, 'layers': 40, 'rows': 4000, 'columns': 8},
+    }
+
+# registered benchmarks by name
+BENCHMARKS = OrderedDict()
+
+
+def benchmark(name):
+    '''register setup function returning the callable to time'''
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def read_config():
+    '''default config without user cache'''
+    from xsboringen.scripts.xsb import read_defaultconfig
+    defaultconfigfile = Path(__file__).parent.parent / 'defaultconfig.yaml'
+    return read_defaultconfig(str(defaultconfigfile))
+
+
+@benchmark('read gef boreholes')
+def setup_read_gef_boreholes(workdir, scale):
+    from xsboringen.geffiles import boreholes_from_gef
+    folder = workdir / 'gef_boreholes'
+    synthetic.write_gef_boreholes(folder, scale['n'], layers=scale['layers'])
+    return lambda: sum(1 for _ in boreholes_from_gef(folder))
+
+
+@benchmark('read gef cpts')
+def setup_read_gef_cpts(workdir, scale):
+    from xsboringen.geffiles import cpts_from_gef
+    folder = workdir / 'gef_cpts'
+    synthetic.write_gef_cpts(folder, scale['n'],
+        rows=scale['rows'], columns=scale['columns'])
+    datacolumns = {
+        'depth': 'gecorrigeerde diepte',
+        'cone_resistance': 'conusweerstand',
+        'friction_ratio': 'wrijvingsgetal',
+        }
+    return lambda: sum(1 for _ in cpts_from_gef(folder,
+        datacolumns=datacolumns))
+
+
+@benchmark('read dino xml')
+def setup_read_dino_xml(workdir, scale):
+    from xsboringen.xmlfiles import dino_boreholes_from_xml
+    folder = workdir / 'dino_xml'
+    synthetic.write_dino_xml(folder, scale['n'], layers=scale['layers'])
+    return lambda: sum(1 for _ in dino_boreholes_from_xml(folder,
+        version=1.4, extra_fields=None, use_filename=False, priority=0))
+
+
+@benchmark('read bro xml')
+def setup_read_bro_xml(workdir, scale):
+    from xsboringen.xmlfiles import bro_boreholes_from_xml
+    folder = workdir / 'bro_xml'
+    synthetic.write_bro_xml(folder, scale['n'], layers=scale['layers'])
+    return lambda: sum(1 for _ in bro_boreholes_from_xml(folder,
+        extra_fields=None, use_filename=False, priority=0))
+
+
+@benchmark('read csv boreholes')
+def setup_read_csv_boreholes(workdir, scale):
+    from xsboringen.csvfiles import boreholes_from_csv
+    folder = workdir / 'csv_boreholes'
+    synthetic.write_csv_boreholes(folder / 'boreholes.csv', scale['n'],
+        layers=scale['layers'])
+    return lambda: sum(1 for _ in boreholes_from_csv(folder,
+        fieldnames=synthetic.CSV_FIELDNAMES))
+
+
+@benchmark('read xsb store')
+def setup_read_store(workdir, scale):
+    from xsboringen.store import boreholes_from_store, boreholes_to_store
+    folder = workdir / 'boreholes.xsb'
+    boreholes_to_store(synthetic.boreholes(scale['n'],
+        layers=scale['layers']), folder)
+    return lambda: sum(1 for _ in boreholes_from_store(folder))
+
+
+@benchmark('classify cpt lithology')
+def setup_classify_lithology(workdir, scale):
+    from xsboringen.calc import LithologyClassifier, AdmixClassifier
+    config = read_config()
+    classifier = LithologyClassifier(config['cpt_classification'],
+        ruletype='isbt')
+    admixclassifier = AdmixClassifier(config['admix_fieldnames'])
+    cpts = list(synthetic.cpts(scale['n'], rows=scale['rows']))
+    def run():
+        for cpt in cpts:
+            cpt.classify_lithology(classifier, admixclassifier)
+        return len(cpts)
+    return run
+
+
+@benchmark('simplify boreholes')
+def setup_simplify(workdir, scale):
+    boreholes = list(synthetic.boreholes(scale['n'], layers=scale['layers']))
+    by = lambda s: {'lithology': s.lithology}
+    return lambda: sum(1 for b in boreholes
+        if b.simplified(min_thickness=0.5, by=by))
+
+
+@benchmark('write boreholes csv')
+def setup_write_boreholes_csv(workdir, scale):
+    from xsboringen.csvfiles import boreholes_to_csv
+    boreholes = list(synthetic.boreholes(scale['n'], layers=scale['layers']))
+    csvfile = workdir / 'boreholes_out.csv'
+    def run():
+        boreholes_to_csv(boreholes, csvfile)
+        return len(boreholes)
+    return run
+
+
+@benchmark('write cross-section csv')
+def setup_write_cross_section_csv(workdir, scale):
+    from xsboringen.csvfiles import cross_section_to_csv
+    from xsboringen.cross_section import CrossSection
+    config = read_config()
+    xmin, ymin, xmax, ymax = synthetic.EXTENT
+    line = {'type': 'LineString', 'coordinates': [(xmin, ymin), (xmax, ymax)]}
+    cs = CrossSection(line, buffer_distance=(xmax - xmin), label='bench',
+        windlabels=config['defaultwindlabels'],
+        winddirs=config['defaultwinddirs'],
+        )
+    cs.add_boreholes(synthetic.boreholes(scale['n'], layers=scale['layers']))
+    csvfile = workdir / 'cross_section_out.csv'
+    def run():
+        cross_section_to_csv(cs, csvfile)
+        return len(cs.boreholes)
+    return run
+
+
+class BenchmarkResult(object):
+    '''Repeated wall times of a benchmark'''
+    def __init__(self, name, times, count):
+        self.name = name
+        self.times = times
+        self.count = count
+
+    def __repr__(self):
+        return ('{s.__class__.__name__:}(name={s.name:}, '
+            'min={s.min:.3f})').format(s=self)
+
+    @property
+    def min(self):
+        return min(self.times)
+
+    @property
+    def median(self):
+        return statistics.median(self.times)
+
+    @property
+    def rate(self):
+        '''items per second for fastest repeat'''
+        if self.min > 0.:
+            return self.count / self.min
+
+    def as_dict(self):
+        return {
+            'min': self.min,
+            'median': self.median,
+            'count': self.count,
+            'rate': self.rate,
+            'times': self.times,
+            }
+
+
+def run_benchmark(name, workdir, scale, repeat=3):
+    '''set up benchmark in workdir and time callable repeat times'''
+    log.info('running {name:}'.format(name=name))
+    func = BENCHMARKS[name](Path(workdir), scale)
+    times = []
+    count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = func()
+        times.append(time.perf_counter() - start)
+    return BenchmarkResult(name, times, count)
+
+
+def run_suite(workdir, scale='small', repeat=3, names=None):
+    '''run selected benchmarks at scale and return results as dict'''
+    results = OrderedDict()
+    for name in BENCHMARKS:
+        if (names is not None) and not any(n in name for n in names):
+            continue
+        results[name] = run_benchmark(name, workdir, SCALES[scale],
+            repeat=repeat).as_dict()
+    return {
+        'suite': 'ingest',
+        'scale': scale,
+        'parameters': SCALES[scale],
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results,
+        }
+
+
+def compare(results, baseline, threshold=0.2):
+    '''rows of name, baseline, current and ratio of fastest times, with
+    regression flag if slower than baseline by more than threshold'''
+    rows = []
+    for name, result in results['results'].items():
+        reference = baseline['results'].get(name)
+        if (reference is None) or not reference['min'] > 0.:
+            rows.append((name, None, result['min'], None, False))
+            continue
+        ratio = result['min'] / reference['min']
+        rows.append((name, reference['min'], result['min'], ratio,
+            ratio > (1. + threshold)))
+    return rows
+
+
+def report(results, comparison=None):
+    '''benchmark results as text table'''
+    lines = ['{:<28s} {:>10s} {:>10s} {:>10s} {:>12s}'.format(
+        'benchmark', 'min [s]', 'median [s]', 'items', 'items/s')]
+    for name, result in results['results'].items():
+        lines.append('{:<28s} {:>10.3f} {:>10.3f} {:>10d} {:>12.1f}'.format(
+            name, result['min'], result['median'], result['count'],
+            result['rate'] or 0.))
+    if comparison is not None:
+        lines.append('')
+        lines.append(report_comparison(comparison))
+    return '\n'.join(lines)
+
+
+def report_comparison(comparison):
+    '''comparison with baseline as text table'''
+    width = max([len(r[0]) for r in comparison] + [28])
+    lines = ['{:<{w:d}s} {:>10s} {:>10s} {:>8s}'.format(
+        'benchmark', 'baseline', 'current', 'ratio', w=width)]
+    for name, reference, current, ratio, regressed in comparison:
+        if ratio is None:
+            lines.append('{:<{w:d}s} {:>10s} {:>10.3f} {:>8s}'.format(
+                name, '-', current, '-', w=width))
+            continue
+        lines.append('{:<{w:d}s} {:>10.3f} {:>10.3f} {:>8.2f}{flag:}'.format(
+            name, reference, current, ratio, w=width,
+            flag=' REGRESSION' if regressed else ''))
+    return '\n'.join(lines)
+
+
+def save_results(results, jsonfile):
+    with open(jsonfile, 'w') as f:
+        json.dump(results, f, indent=2)
+
+
+def load_results(jsonfile):
+    with open(jsonfile) as f:
+        return json.load(f)
@@ -0,0 +1,378 @@
+# -*- coding: utf-8 -*-
+# Tom van Steijn, Royal HaskoningDHV
+# Erik van Onselen, Deltares
+
+from xsboringen.borehole import Borehole, Segment, Vertical
+from xsboringen.cpt import CPT
+
+import numpy as np
+
+from pathlib import Path
+import random
+import csv
+
+# lithologies with sand median classes and BRO soil names
+LITHOLOGIES = (
+    ('Z', 'ZMF', 'zand', 'fijn'),
+    ('Zs1', 'ZMG', 'zwakSiltigZand', 'middelgrof'),
+    ('K', None, 'klei', None),
+    ('Kz2', None, 'matigZandigeKlei', None),
+    ('V', None, 'veen', None),
+    ('L', None, 'silt', None),
+    ('G', None, 'grind', None),
+    )
+
+# default extent of synthetic locations in RD New [m]
+EXTENT = (150000., 450000., 160000., 460000.)
+
+BRO_NAMESPACES = {
+    'bhrgt': 'http://www.broservices.nl/xsd/isbhr-gt/1.0',
+    'brocom': 'http://www.broservices.nl/xsd/brocommon/3.0',
+    'gml': 'http://www.opengis.net/gml/3.2',
+    'bhrgtcom': 'http://www.broservices.nl/xsd/bhrgtcommon/1.0',
+    }
+
+
+class SyntheticLocation(object):
+    '''Deterministic code, coordinates, elevation and layering of a borehole'''
+    def __init__(self, rng, index, layers, extent=None, prefix='SYN'):
+        xmin, ymin, xmax, ymax = extent or EXTENT
+        self.code = '{prefix:}{i:06d}'.format(prefix=prefix, i=index)
+        self.x = round(rng.uniform(xmin, xmax), 2)
+        self.y = round(rng.uniform(ymin, ymax), 2)
+        self.z = round(rng.uniform(-5., 20.), 2)
+
+        # layer boundaries in m below surface, 0.1 - 2.0 m thick
+        depth = 0.
+        self.layers = []
+        for _ in range(layers):
+            thickness = round(rng.uniform(0.1, 2.), 2)
+            self.layers.append((
+                round(depth, 2),
+                round(depth + thickness, 2),
+                rng.choice(LITHOLOGIES),
+                ))
+            depth += thickness
+        self.depth = round(depth, 2)
+
+    def __repr__(self):
+        return ('{s.__class__.__name__:}(code={s.code:}, '
+            'depth={s.depth:.2f})').format(s=self)
+
+
+def locations(n, layers, seed=0, extent=None, prefix='SYN'):
+    '''n deterministic synthetic locations with layers'''
+    rng = random.Random(seed)
+    for i in range(n):
+        yield SyntheticLocation(rng, i, layers, extent=extent, prefix=prefix)
+
+
+def write_gef_boreholes(folder, n, layers=20, seed=0, extent=None,
+        prefix='SYN'):
+    '''write n GEF borehole files to folder'''
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    for loc in locations(n, layers, seed=seed, extent=extent, prefix=prefix):
+        lines = [
+            '#GEFID = 1,1,0',
+            '#COLUMNSEPARATOR = ;',
+            '#RECORDSEPARATOR = !',
+            '#COLUMN = 2',
+            '#COLUMNINFO = 1, m, Diepte bovenkant laag, 1',
+            '#COLUMNINFO = 2, m, Diepte onderkant laag, 2',
+            '#TESTID = {l.code:}'.format(l=loc),
+            '#XYID = 31000,{l.x:.2f},{l.y:.2f}'.format(l=loc),
+            '#ZID = 31000,{l.z:.2f}'.format(l=loc),
+            '#MEASUREMENTVAR = 16, {l.depth:.2f}, m, einddiepte'.format(
+                l=loc),
+            '#EOH = ',
+            ]
+        for top, base, (lithology, sandmedianclass, _, _) in loc.layers:
+            lines.append('{t:.2f};{b:.2f};\'{lith:} GR\';\'{smc:}\';!'.format(
+                t=top, b=base, lith=lithology, smc=sandmedianclass or '',
+                ))
+        gefile = folder / '{l.code:}.gef'.format(l=loc)
+        gefile.write_text('\n'.join(lines) + '\n')
+
+
+def cpt_rows(rng, rows, columns, step=0.02):
+    '''rows of depth, cone resistance, friction ratio and extra columns'''
+    for i in range(rows):
+        depth = (i + 1) * step
+        qc = max(0.1, rng.lognormvariate(1., 0.8))
+        rf = max(0.1, rng.lognormvariate(0.5, 0.6))
+        extra = [rng.uniform(0., 1.) for _ in range(columns - 3)]
+        yield [depth, qc, rf] + extra
+
+
+def write_gef_cpts(folder, n, rows=1000, columns=4, seed=0, extent=None,
+        prefix='CPT'):
+    '''write n GEF CPT files with rows and columns (at least 3) to folder'''
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    columns = max(columns, 3)
+    rng = random.Random(seed)
+    names = ['gecorrigeerde diepte', 'conusweerstand', 'wrijvingsgetal'] + [
+        'extra kolom {i:d}'.format(i=i + 1) for i in range(columns - 3)
+        ]
+    for loc in locations(n, 0, seed=seed, extent=extent, prefix=prefix):
+        lines = [
+            '#GEFID = 1,1,0',
+            '#COLUMNSEPARATOR = ;',
+            '#RECORDSEPARATOR = !',
+            '#COLUMN = {c:d}'.format(c=columns),
+            ]
+        for i, name in enumerate(names):
+            lines.append('#COLUMNINFO = {i:d}, -, {name:}, {i:d}'.format(
+                i=i + 1, name=name))
+        for i in range(columns):
+            lines.append('#COLUMNVOID = {i:d}, -9999.99'.format(i=i + 1))
+        lines += [
+            '#TESTID = {l.code:}'.format(l=loc),
+            '#XYID = 31000,{l.x:.2f},{l.y:.2f}'.format(l=loc),
+            '#ZID = 31000,{l.z:.2f}'.format(l=loc),
+            '#EOH = ',
+            ]
+        for row in cpt_rows(rng, rows, columns):
+            lines.append(';'.join('{:.3f}'.format(v) for v in row) + ';!')
+        gefile = folder / '{l.code:}.gef'.format(l=loc)
+        gefile.write_text('\n'.join(lines) + '\n')
+
+
+def write_dino_xml(folder, n, layers=20, seed=0, extent=None):
+    '''write n Dinoloket XML 1.4 borehole files to folder'''
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    for loc in locations(n, layers, seed=seed, extent=extent):
+        intervals = []
+        for top, base, (lithology, sandmedianclass, _, _) in loc.layers:
+            interval = (
+                '<lithoInterval baseDepth="{b:.0f}" topDepth="{t:.0f}">'
+                '<lithology code="{lith:}"/>'
+                ).format(t=top * 1e2, b=base * 1e2, lith=lithology[0])
+            if sandmedianclass is not None:
+                interval += (
+                    '<sandMedian median="180"/>'
+                    '<sandMedianClass code="{smc:}O"/>'
+                    ).format(smc=sandmedianclass)
+            intervals.append(interval + '</lithoInterval>')
+        xml = (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<set version="1.4"><pointSurvey version="1.4">'
+            '<identification id="{l.code:}"/>'
+            '<surveyLocation><coordinates UoM="METER" coordSystem="RD">'
+            '<coordinateX>{l.x:.2f}</coordinateX>'
+            '<coordinateY>{l.y:.2f}</coordinateY>'
+            '</coordinates></surveyLocation>'
+            '<surfaceElevation><elevation UoM="CENTIMETER" '
+            'levelReference="NAP" levelValue="{z:.0f}"/></surfaceElevation>'
+            '<borehole baseDepth="{depth:.0f}" baseDepthUoM="CENTIMETER">'
+            '<date startYear="2020" startMonth="1" startDay="1"/>'
+            '<lithoDescr>{intervals:}</lithoDescr>'
+            '</borehole></pointSurvey></set>'
+            ).format(
+                l=loc,
+                z=loc.z * 1e2,
+                depth=loc.depth * 1e2,
+                intervals=''.join(intervals),
+                )
+        xmlfile = folder / '{l.code:}_1.4.xml'.format(l=loc)
+        xmlfile.write_text(xml, encoding='utf-8')
+
+
+def write_bro_xml(folder, n, layers=20, seed=0, extent=None):
+    '''write n BRO XML (BHR-GT) borehole files to folder'''
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    xmlns = ' '.join('xmlns:{k:}="{v:}"'.format(k=k, v=v)
+        for k, v in BRO_NAMESPACES.items())
+    for loc in locations(n, layers, seed=seed, extent=extent):
+        layers_xml = []
+        for top, base, (_, _, soilname, sandmedianclass) in loc.layers:
+            soil = (
+                '<bhrgtcom:geotechnicalSoilName>{name:}'
+                '</bhrgtcom:geotechnicalSoilName>'
+                ).format(name=soilname)
+            if sandmedianclass is not None:
+                soil += (
+                    '<bhrgtcom:sandMedianClass>{smc:}'
+                    '</bhrgtcom:sandMedianClass>'
+                    ).format(smc=sandmedianclass)
+            layers_xml.append(
+                '<bhrgtcom:layer>'
+                '<bhrgtcom:upperBoundary>{t:.2f}</bhrgtcom:upperBoundary>'
+                '<bhrgtcom:lowerBoundary>{b:.2f}</bhrgtcom:lowerBoundary>'
+                '<bhrgtcom:soil>{soil:}</bhrgtcom:soil>'
+                '</bhrgtcom:layer>'.format(t=top, b=base, soil=soil)
+                )
+        xml = (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<dispatchDataResponse {xmlns:}>'
+            '<bhrgt:dispatchDocument><bhrgt:BHR_GT_O>'
+            '<brocom:broId>{l.code:}</brocom:broId>'
+            '<bhrgt:deliveredLocation><bhrgtcom:location>'
+            '<gml:Point><gml:pos>{l.x:.2f} {l.y:.2f}</gml:pos></gml:Point>'
+            '</bhrgtcom:location></bhrgt:deliveredLocation>'
+            '<bhrgt:deliveredVerticalPosition>'
+            '<bhrgtcom:offset>{l.z:.2f}</bhrgtcom:offset>'
+            '</bhrgt:deliveredVerticalPosition>'
+            '<bhrgt:boring>'
+            '<bhrgtcom:boringEndDate><brocom:date>2020-01-01</brocom:date>'
+            '</bhrgtcom:boringEndDate>'
+            '<bhrgtcom:finalDepthBoring>{l.depth:.2f}'
+            '</bhrgtcom:finalDepthBoring>'
+            '</bhrgt:boring>'
+            '<bhrgt:boreholeSampleDescription>'
+            '<bhrgtcom:descriptiveBoreholeLog>{layers:}'
+            '</bhrgtcom:descriptiveBoreholeLog>'
+            '</bhrgt:boreholeSampleDescription>'
+            '</bhrgt:BHR_GT_O></bhrgt:dispatchDocument>'
+            '</dispatchDataResponse>'
+            ).format(xmlns=xmlns, l=loc, layers=''.join(layers_xml))
+        xmlfile = folder / '{l.code:}.xml'.format(l=loc)
+        xmlfile.write_text(xml, encoding='utf-8')
+
+
+# field names of synthetic CSV boreholes
+CSV_FIELDNAMES = {
+    'code': 'code', 'depth': 'depth', 'x': 'x', 'y': 'y', 'z': 'z',
+    'top': 'top', 'base': 'base', 'lithology': 'lithology',
+    'sandmedianclass': 'sandmedianclass',
+    }
+
+
+def write_csv_boreholes(csvfile, n, layers=20, seed=0, extent=None):
+    '''write n boreholes as rows per segment to CSV file'''
+    csvfile = Path(csvfile)
+    csvfile.parent.mkdir(parents=True, exist_ok=True)
+    with open(csvfile, 'w', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(list(CSV_FIELDNAMES.values()))
+        for loc in locations(n, layers, seed=seed, extent=extent):
+            for top, base, (lithology, sandmedianclass, _, _) in loc.layers:
+                writer.writerow([loc.code, loc.depth, loc.x, loc.y, loc.z,
+                    top, base, lithology, sandmedianclass or ''])
+
+
+def section_lines(n, length, spacing, origin=None):
+    '''n parallel west-east section lines of length with spacing, as label
+    and coordinates'''
+    x0, y0 = origin or EXTENT[:2]
+    for i in range(n):
+        y = y0 + (i + 0.5) * spacing
+        yield (
+            'S{i:03d}'.format(i=i + 1),
+            [(x0, y), (x0 + length, y)],
+            )
+
+
+def write_lines_shapefile(shapefile, lines):
+    '''write labeled line coordinates to shapefile'''
+    from fiona.crs import from_epsg
+    import fiona
+    schema = {'geometry': 'LineString', 'properties': {'label': 'str'}}
+    with fiona.open(str(shapefile), 'w',
+            driver='ESRI Shapefile', schema=schema, crs=from_epsg(28992),
+            ) as dst:
+        for label, coords in lines:
+            dst.write({
+                'geometry': {'type': 'LineString', 'coordinates': coords},
+                'properties': {'label': label},
+                })
+
+
+def surface_grid(rng, nrow, ncol, level=0., relief=5.):
+    '''smooth synthetic elevation grid around level'''
+    ys, xs = np.mgrid[0:nrow, 0:ncol]
+    phase_x, phase_y = rng.uniform(0., 2. * np.pi), rng.uniform(0., 2. * np.pi)
+    return (level +
+        relief * np.sin(xs / max(ncol, 1) * 2. * np.pi + phase_x) *
+        np.cos(ys / max(nrow, 1) * 2. * np.pi + phase_y)
+        ).astype('float32')
+
+
+def write_grid(gridfile, values, xmin, ymax, res, nodata=-9999.):
+    '''write grid to GeoTIFF or IDF file by suffix'''
+    gridfile = Path(gridfile)
+    if gridfile.suffix.lower() == '.idf':
+        from xsboringen.idffiles import write_idf
+        write_idf(gridfile, values, xmin=xmin, ymax=ymax, dx=res,
+            nodata=nodata)
+        return
+    from rasterio.transform import from_origin
+    import rasterio
+    nrow, ncol = values.shape
+    with rasterio.open(str(gridfile), 'w',
+            driver='GTiff', width=ncol, height=nrow, count=1,
+            dtype='float32', nodata=nodata,
+            transform=from_origin(xmin, ymax, res, res),
+            tiled=True, blockxsize=256, blockysize=256,
+            ) as dst:
+        dst.write(values.astype('float32'), 1)
+
+
+def write_layer_model(folder, extent, cells, layers, suffix='.tif', seed=0):
+    '''write surface and layer top and base grids with cells along longest
+    side of extent to folder, return surface file and layer index file'''
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    xmin, ymin, xmax, ymax = extent
+    res = max(xmax - xmin, ymax - ymin) / cells
+    ncol = int(np.ceil((xmax - xmin) / res))
+    nrow = int(np.ceil((ymax - ymin) / res))
+
+    surface = surface_grid(rng, nrow, ncol, level=5.)
+    surfacefile = folder / ('surface' + suffix)
+    write_grid(surfacefile, surface, xmin, ymax, res)
+
+    rows = []
+    top = surface
+    for i in range(layers):
+        thickness = np.abs(surface_grid(rng, nrow, ncol,
+            level=rng.uniform(1., 5.), relief=1.)) + 0.1
+        base = top - thickness
+        topfile = 'l{i:03d}-t{s:}'.format(i=i, s=suffix)
+        basefile = 'l{i:03d}-b{s:}'.format(i=i, s=suffix)
+        write_grid(folder / topfile, top, xmin, ymax, res)
+        write_grid(folder / basefile, base, xmin, ymax, res)
+        rows.append([i + 1, 'L{i:03d}'.format(i=i), topfile, basefile,
+            '#{r:02x}{g:02x}{b:02x}'.format(r=(i * 37) % 256,
+                g=(i * 91) % 256, b=(i * 53) % 256)])
+        top = base
+
+    indexfile = folder / 'index.csv'
+    with open(indexfile, 'w', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(['number', 'name', 'topfile', 'basefile', 'color'])
+        writer.writerows(rows)
+    return surfacefile, indexfile
+
+
+def boreholes(n, layers=20, seed=0, extent=None):
+    '''n synthetic Borehole objects'''
+    for loc in locations(n, layers, seed=seed, extent=extent):
+        segments = [
+            Segment(top, base, lithology, sandmedianclass)
+            for top, base, (lithology, sandmedianclass, _, _) in loc.layers
+            ]
+        yield Borehole(loc.code, loc.depth, x=loc.x, y=loc.y, z=loc.z,
+            segments=segments,
+            format='Synthetic Borehole',
+            )
+
+
+def cpts(n, rows=1000, seed=0, extent=None):
+    '''n synthetic CPT objects with cone resistance and friction ratio'''
+    rng = random.Random(seed)
+    for loc in locations(n, 0, seed=seed, extent=extent, prefix='CPT'):
+        depth, qc, rf = zip(*(r[:3] for r in cpt_rows(rng, rows, 3)))
+        yield CPT(loc.code, depth[-1], x=loc.x, y=loc.y, z=loc.z,
+            verticals={
+                'cone_resistance': Vertical('cone_resistance',
+                    list(depth), list(qc)),
+                'friction_ratio': Vertical('friction_ratio',
+                    list(depth), list(rf)),
+                },
+            format='Synthetic CPT',
+            )
@@ -61,6 +61,13 @@ class Segment(AsDictMixin, CopyMixin):
         '''relative to surface level'''
         return self.top < self.base
 
+    def overlaps(self, top, base):
+        '''segment overlaps depth window, True if top or base unknown'''
+        if (self.top is None) or (self.base is None):
+            return True
+        return (max(self.top, self.base) > top) and (
+            min(self.top, self.base) < base)
+
     def relative_to(self, z):
         '''return top and base relative to z'''
         clone = self.copy()
@@ -74,11 +81,16 @@ class Segment(AsDictMixin, CopyMixin):
 
 
 class Vertical(AsDictMixin, CopyMixin):
-    def __init__(self, name, depth, values):
+    def __init__(self, name, depth, values, value_range=None):
         self.name = name
         self.depth = depth
         self.values = values
 
+        # range of positive values before clipping, for rescaling; only set
+        # if clipped, so content hashes of unclipped verticals are unchanged
+        if value_range is not None:
+            self.value_range = value_range
+
     def __repr__(self):
         return ('{s.__class__.__name__:}(name={s.name:}, '
             'count={s.count:})').format(s=self)
@@ -102,10 +114,43 @@ class Vertical(AsDictMixin, CopyMixin):
         clone.depth = [z - d if (d is not None) else None for d in self.depth]
         return clone
 
+    def clipped(self, top, base):
+        '''samples within depth window, with the nearest sample beyond each
+        edge so lines extend to the window edges'''
+        first, last = None, None
+        for i, d in enumerate(self.depth):
+            if d is None:
+                continue
+            if d <= top:
+                first = i
+            elif d >= base:
+                last = i
+                break
+        keep = [i for i, d in enumerate(self.depth)
+            if (d is not None) and (
+                (top < d < base) or (i == first) or (i == last))]
+        return Vertical(self.name,
+            [self.depth[i] for i in keep],
+            [self.values[i] for i in keep],
+            value_range=self.positive_range(),
+            )
+
+    def positive_range(self):
+        '''min and max of positive values, None if none'''
+        value_range = getattr(self, 'value_range', None)
+        if value_range is not None:
+            return value_range
+        positive = [v for v in self.values if (v is not None) and (v > 0)]
+        if positive:
+            return min(positive), max(positive)
+
     def rescaled(self):
         clone = self.copy()
-        vmin = min(v for v in self.values if (v is not None) and (v > 0))
-        vmax = max(v for v in self.values if (v is not None) and (v > 0))
+        value_range = self.positive_range()
+        if value_range is None:
+            raise ValueError('no positive values in vertical {s.name:}'.format(
+                s=self))
+        vmin, vmax = value_range
         clone.values = [
             (v - vmin) / (vmax - vmin)
             if (v is not None) and (v > 0) else None
@@ -142,8 +187,6 @@ class Borehole(AsDictMixin, CopyMixin, Iterable):
 
         self.segments = segments or []
         self.verticals = verticals or {}
-        
-        self.dist_dir = ()
 
         # set other properties
         for key, value in attrs.items():
@@ -179,6 +222,14 @@ class Borehole(AsDictMixin, CopyMixin, Iterable):
     def isempty(self):
         return len(self.segments) == 0
 
+    def clip(self, top, base):
+        '''drop segments and vertical samples outside depth window [m below
+        surface], keep segments crossing the window edges'''
+        self.segments = [s for s in self.segments if s.overlaps(top, base)]
+        self.verticals = {k: v.clipped(top, base)
+            for k, v in self.verticals.items()}
+        return self
+
     def simplified(self, min_thickness=None, by=None):
         '''simplify clone and return for generator chaining'''
         clone = self.copy()
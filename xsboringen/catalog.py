@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+# Tom van Steijn, Royal HaskoningDHV
+# Erik van Onselen, Deltares
+
+from collections import namedtuple, OrderedDict
+from pathlib import Path
+import datetime
+import logging
+import sqlite3
+import json
+import os
+
+log = logging.getLogger(os.path.basename(__file__))
+
+# catalog schema version
+VERSION = 1
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+    );
+CREATE TABLE IF NOT EXISTS datasources (
+    id INTEGER PRIMARY KEY,
+    config TEXT UNIQUE NOT NULL
+    );
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    datasource_id INTEGER NOT NULL REFERENCES datasources(id),
+    path TEXT NOT NULL,
+    size INTEGER,
+    mtime_ns INTEGER,
+    scanned TEXT,
+    UNIQUE (datasource_id, path)
+    );
+CREATE TABLE IF NOT EXISTS boreholes (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL REFERENCES files(id),
+    code TEXT,
+    x REAL,
+    y REAL,
+    z REAL,
+    depth REAL,
+    format TEXT,
+    timestamp TEXT,
+    priority INTEGER
+    );
+CREATE INDEX IF NOT EXISTS boreholes_file ON boreholes (file_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS boreholes_rtree USING rtree (
+    id, xmin, xmax, ymin, ymax
+    );
+'''
+
+
+def datasource_key(datasource):
+    '''canonical JSON of datasource configuration'''
+    return json.dumps(dict(datasource), sort_keys=True)
+
+
+def boreholes_from_catalog(catalogfile, admixclassifier=None, prefilter=None,
+        **query):
+    '''read boreholes and CPT's matching query and optional prefilter from
+    their source files'''
+    from xsboringen.datasources import read_source_file
+    with Catalog(catalogfile) as catalog:
+        matches = catalog.files_matching(prefilter=prefilter, **query)
+    log.info('reading {n:d} files from catalog {f:}'.format(
+        n=len(matches), f=os.path.basename(str(catalogfile))))
+    for (config, path), codes in matches.items():
+        datasource = json.loads(config)
+        for borehole in read_source_file(datasource, path, admixclassifier):
+            if borehole.code in codes:
+                yield borehole
+
+
+def query_from_datasource(datasource):
+    '''catalog query arguments from datasource configuration'''
+    query = {k: datasource.get(k) for k in
+        ('bbox', 'min_depth', 'date_from', 'date_to', 'formats')}
+    lines = datasource.get('lines')
+    if lines is not None:
+        from xsboringen import shapefiles
+        from shapely.geometry import asShape
+        from shapely.ops import unary_union
+        query['geometry'] = unary_union([
+            asShape(row['geometry']).buffer(lines.get('buffer', 0.))
+            for row in shapefiles.read(lines['file'])
+            ])
+    return query
+
+
+class Catalog(object):
+    '''SQLite catalog of location, depth and format of boreholes in source
+    files, with R-tree index on location'''
+    Match = namedtuple('Match',
+        ['config', 'path', 'code', 'x', 'y', 'depth', 'format'])
+
+    def __init__(self, catalogfile):
+        self.file = Path(catalogfile)
+        self.connection = sqlite3.connect(str(self.file))
+        self.connection.executescript(SCHEMA)
+        self.connection.execute(
+            'INSERT OR REPLACE INTO meta VALUES (?, ?)',
+            ('version', str(VERSION)),
+            )
+        self.connection.commit()
+
+    def __repr__(self):
+        return ('{s.__class__.__name__:}(file={s.file.name:}, '
+            'boreholes={n:d})').format(s=self, n=len(self))
+
+    def __len__(self):
+        return self.connection.execute(
+            'SELECT COUNT(*) FROM boreholes').fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def datasource_id(self, datasource):
+        key = datasource_key(datasource)
+        self.connection.execute(
+            'INSERT OR IGNORE INTO datasources (config) VALUES (?)', (key, ))
+        return self.connection.execute(
+            'SELECT id FROM datasources WHERE config = ?', (key, )
+            ).fetchone()[0]
+
+    def remove_file(self, file_id):
+        '''remove file and its boreholes'''
+        self.connection.execute(
+            'DELETE FROM boreholes_rtree WHERE id IN '
+            '(SELECT id FROM boreholes WHERE file_id = ?)', (file_id, ))
+        self.connection.execute(
+            'DELETE FROM boreholes WHERE file_id = ?', (file_id, ))
+        self.connection.execute(
+            'DELETE FROM files WHERE id = ?', (file_id, ))
+
+    def add_boreholes(self, file_id, boreholes):
+        for borehole in boreholes:
+            cursor = self.connection.execute(
+                'INSERT INTO boreholes (file_id, code, x, y, z, depth, '
+                'format, timestamp, priority) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', (
+                    file_id, borehole.code,
+                    borehole.x, borehole.y, borehole.z, borehole.depth,
+                    getattr(borehole, 'format', None),
+                    getattr(borehole, 'timestamp', None),
+                    getattr(borehole, 'priority', None),
+                ))
+            if (borehole.x is not None) and (borehole.y is not None):
+                self.connection.execute(
+                    'INSERT INTO boreholes_rtree VALUES (?, ?, ?, ?, ?)', (
+                        cursor.lastrowid,
+                        borehole.x, borehole.x, borehole.y, borehole.y,
+                    ))
+
+    def refresh(self, datasources, admixclassifier=None):
+        '''scan new and modified files of file based datasources, remove
+        missing files and datasources no longer configured, return counts of
+        scanned, unchanged and removed files'''
+        from xsboringen.datasources import (
+            SOURCE_PATTERNS, source_files, read_source_file,
+            )
+        counts = OrderedDict([('scanned', 0), ('unchanged', 0),
+            ('removed', 0)])
+        keep = set()
+        for datasource in datasources:
+            if datasource['format'] not in SOURCE_PATTERNS:
+                log.warning((
+                    'dataformat \'{fmt:}\' not file based, skipping').format(
+                        fmt=datasource['format'],
+                        )
+                    )
+                continue
+            datasource_id = self.datasource_id(datasource)
+            keep.add(datasource_id)
+            known = {path: (file_id, size, mtime_ns)
+                for file_id, path, size, mtime_ns in self.connection.execute(
+                    'SELECT id, path, size, mtime_ns FROM files '
+                    'WHERE datasource_id = ?', (datasource_id, ))
+                }
+            for filepath in source_files(datasource):
+                path = os.path.abspath(filepath)
+                stat = os.stat(path)
+                entry = known.pop(path, None)
+                if entry is not None:
+                    file_id, size, mtime_ns = entry
+                    if (size, mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+                        counts['unchanged'] += 1
+                        continue
+                    self.remove_file(file_id)
+                try:
+                    boreholes = read_source_file(datasource, path,
+                        admixclassifier)
+                except Exception as e:
+                    log.warning('cannot read {f:}: {e:}'.format(
+                        f=os.path.basename(path), e=e))
+                    boreholes = []
+                cursor = self.connection.execute(
+                    'INSERT INTO files (datasource_id, path, size, mtime_ns, '
+                    'scanned) VALUES (?, ?, ?, ?, ?)', (
+                        datasource_id, path, stat.st_size, stat.st_mtime_ns,
+                        datetime.datetime.now().isoformat(timespec='seconds'),
+                    ))
+                self.add_boreholes(cursor.lastrowid, boreholes)
+                counts['scanned'] += 1
+
+            # files removed from disk
+            for file_id, _, _ in known.values():
+                self.remove_file(file_id)
+                counts['removed'] += 1
+            self.connection.commit()
+
+        # datasources no longer configured
+        for datasource_id, in self.connection.execute(
+                'SELECT id FROM datasources').fetchall():
+            if datasource_id in keep:
+                continue
+            for file_id, in self.connection.execute(
+                    'SELECT id FROM files WHERE datasource_id = ?',
+                    (datasource_id, )).fetchall():
+                self.remove_file(file_id)
+                counts['removed'] += 1
+            self.connection.execute(
+                'DELETE FROM datasources WHERE id = ?', (datasource_id, ))
+        self.connection.commit()
+        return counts
+
+    def query(self, bbox=None, geometry=None, min_depth=None,
+            date_from=None, date_to=None, formats=None):
+        '''boreholes within bbox (xmin, ymin, xmax, ymax) and shapely
+        geometry, at least min_depth deep, with timestamp in date range and
+        borehole or datasource format in formats'''
+        if geometry is not None:
+            gxmin, gymin, gxmax, gymax = geometry.bounds
+            if bbox is not None:
+                xmin, ymin, xmax, ymax = bbox
+                bbox = (max(xmin, gxmin), max(ymin, gymin),
+                    min(xmax, gxmax), min(ymax, gymax))
+            else:
+                bbox = gxmin, gymin, gxmax, gymax
+
+        sql = ('SELECT d.config, f.path, b.code, b.x, b.y, b.depth, b.format '
+            'FROM boreholes b '
+            'JOIN files f ON b.file_id = f.id '
+            'JOIN datasources d ON f.datasource_id = d.id')
+        conditions, parameters = [], []
+        if bbox is not None:
+            # R-tree bounds are float32 rounded outward, so select overlapping
+            # boxes and test exact coordinates
+            sql += ' JOIN boreholes_rtree r ON b.id = r.id'
+            conditions.append(
+                'r.xmax >= ? AND r.xmin <= ? AND r.ymax >= ? AND r.ymin <= ?')
+            xmin, ymin, xmax, ymax = bbox
+            parameters += [xmin, xmax, ymin, ymax]
+            conditions.append(
+                'b.x >= ? AND b.x <= ? AND b.y >= ? AND b.y <= ?')
+            parameters += [xmin, xmax, ymin, ymax]
+        if min_depth is not None:
+            conditions.append('b.depth >= ?')
+            parameters.append(min_depth)
+        if date_from is not None:
+            conditions.append('b.timestamp >= ?')
+            parameters.append(str(date_from))
+        if date_to is not None:
+            conditions.append('b.timestamp <= ?')
+            parameters.append(str(date_to))
+        if formats is not None:
+            # datasource format names to borehole formats
+            from xsboringen.datasources import BOREHOLE_FORMATS
+            formats = sorted({BOREHOLE_FORMATS.get(f, f) for f in formats})
+            conditions.append('b.format IN ({})'.format(
+                ', '.join('?' * len(formats))))
+            parameters += list(formats)
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+
+        if geometry is not None:
+            from shapely.geometry import Point
+            from shapely.prepared import prep
+            prepared = prep(geometry)
+        for row in self.connection.execute(sql, parameters):
+            match = self.Match(*row)
+            if (geometry is not None) and not prepared.contains(
+                    Point(match.x, match.y)):
+                continue
+            yield match
+
+    def files_matching(self, prefilter=None, **query):
+        '''codes of matching boreholes by datasource and file'''
+        matches = OrderedDict()
+        for match in self.query(**query):
+            if (prefilter is not None) and not (
+                    prefilter.accepts(match.x, match.y, match.depth) and
+                    prefilter.accepts_format(match.format)):
+                continue
+            matches.setdefault((match.config, match.path), set()).add(
+                match.code)
+        return matches
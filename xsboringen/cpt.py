@@ -26,7 +26,10 @@ class CPT(Borehole):
             if depth is not None:
                 yield self.Row(depth, qc, rf)
 
-    def classify_lithology(self, classifier, admixclassifier=None):
+    def classify_lithology(self, classifier, admixclassifier=None,
+            window=None):
+        '''classify rows to segments, only those overlapping optional depth
+        window (top, base) [m below surface]'''
         if self.complete:
             self.segments = []
             for i, row in enumerate(self.rows):
@@ -34,7 +37,12 @@ class CPT(Borehole):
                 if i == 0:
                     top = 0.
                     blind_segment = Segment(top, base, "O")
-                    self.segments.append(blind_segment)
+                    if (window is None) or blind_segment.overlaps(*window):
+                        self.segments.append(blind_segment)
+                    top = base
+                    continue
+                if (window is not None) and not (
+                        (base > window[0]) and (top < window[1])):
                     top = base
                     continue
                 lithology = classifier.classify(
@@ -46,8 +54,8 @@ class CPT(Borehole):
                 self.segments.append(segment)
                 top = base
 
-    def to_lithology(self, classifier, admixclassifier):
-        self.classify_lithology(classifier, admixclassifier)
+    def to_lithology(self, classifier, admixclassifier, window=None):
+        self.classify_lithology(classifier, admixclassifier, window=window)
         return self
 
 
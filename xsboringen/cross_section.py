@@ -27,6 +27,7 @@ class CrossSection(object):
         self.surfaces = []
         self.refplanes = []
         self.solids = []
+        self.voxelmodels = []
         
         # initialize bearing and range options
         self.winds = windlabels
@@ -104,23 +105,27 @@ class CrossSection(object):
         for an_object in some_objects:
             if asShape(an_object.geometry).within(self.buffer):    
                 the_distance = self.shape.project(asShape(an_object.geometry))
-                eucli_distance = asShape(an_object.geometry).distance(self.shape)                
-                point_on_line = self.shape.interpolate(the_distance)
-
-                xp, yp = asShape(an_object.geometry).xy[0][0], asShape(an_object.geometry).xy[1][0]
-                xl, yl = point_on_line.xy[0][0], point_on_line.xy[1][0]
-                
-                direction, label = self.wind_label(xp, yp, xl, yl)
-                
+
                 # explanation: the buffer extends beyond the endpoints of the cross-section
                 # points beyond the endpoints but within the buffer are
                 # projected at 0. and length distance with a sharp angle
                 # these points are not added to the cross-section
                 # points exactly at 0. or length distance are also not added
                 if (the_distance > 0.) and (the_distance < self.length):
-                    an_object.dist_dir = (eucli_distance, direction, label)
                     dst.append((the_distance, an_object))
-                    
+
+    def dist_dir(self, an_object):
+        '''distance from line, bearing and wind label of object in this
+        cross-section; computed per section, objects are shared'''
+        shape = asShape(an_object.geometry)
+        eucli_distance = shape.distance(self.shape)
+        point_on_line = self.shape.interpolate(self.shape.project(shape))
+
+        xp, yp = shape.xy[0][0], shape.xy[1][0]
+        xl, yl = point_on_line.xy[0][0], point_on_line.xy[1][0]
+
+        direction, label = self.wind_label(xp, yp, xl, yl)
+        return eucli_distance, direction, label
 
     def sort(self):
         self.boreholes = [b for b in sorted(self.boreholes)]
@@ -131,7 +136,7 @@ class CrossSection(object):
                              'xc': [b[1].x for b in self.boreholes],
                              'yc': [b[1].y for b in self.boreholes],
                              'priority': [b[1].priority for b in self.boreholes],
-                             'eudist': [b[1].dist_dir[0] for b in self.boreholes],
+                             'eudist': [self.dist_dir(b[1])[0] for b in self.boreholes],
                              'lndist': [b[0] for b in self.boreholes],
                              })
 
@@ -155,6 +160,15 @@ class CrossSection(object):
 
     def add_solid(self, solid):
         self.solids.append(solid)
+
+    def add_voxelmodel(self, voxelmodel):
+        self.voxelmodels.append(voxelmodel)
+
+    def release_profiles(self):
+        '''release profiles sampled along cross-section'''
+        for item in self.surfaces + self.solids + self.voxelmodels:
+            _, coords = zip(*self.discretize(item.res))
+            item.release(coords)
         
     def wind_label(self, xp, yp, xl, yl):
         angle = atan2(xp-xl, yp-yl)
@@ -5,6 +5,7 @@
 
 from xsboringen.borehole import Borehole, Segment
 from xsboringen.point import Point
+from xsboringen import profiling
 from xsboringen import utils
 
 from collections import namedtuple
@@ -23,13 +24,29 @@ def boreholes_from_csv(folder,
         ):
     csvfiles = utils.careful_glob(folder, '*.csv')
     for csvfile in csvfiles:
-        csv_ = CSVBoreholeFile(csvfile,
+        yield from boreholes_from_csvfile(csvfile,
+            fieldnames=fieldnames,
+            extra_fields=extra_fields,
             delimiter=delimiter,
             decimal=decimal,
             )
-        for borehole in csv_.to_boreholes(fieldnames, extra_fields):
-            if borehole is not None:
-                yield borehole
+
+
+def boreholes_from_csvfile(csvfile,
+        fieldnames=('code', 'depth', 'x', 'y', 'z', 'top', 'base'), extra_fields=None,
+        delimiter=',', decimal='.'
+        ):
+    '''read boreholes from single CSV file'''
+    csv_ = CSVBoreholeFile(csvfile,
+        delimiter=delimiter,
+        decimal=decimal,
+        )
+    boreholes = profiling.read_items(csvfile, csv_._format,
+        csv_.to_boreholes(fieldnames, extra_fields),
+        )
+    for borehole in boreholes:
+        if borehole is not None:
+            yield borehole
 
 
 def points_from_csv(csvfile,
@@ -155,6 +172,7 @@ class CSVBoreholeFile(CSVFile):
                         self.decimal)
                 else:
                     depth = self.depth_from_segments(segments)
+                    profiling.note_file(fallback='depth_from_segments')
 
                 # x, y, z
                 x = self.safe_float(rows[0][fieldnames.x], self.decimal)
@@ -254,6 +272,13 @@ def boreholes_to_csv(boreholes, csvfile, extra_fields=None):
 
 def cross_section_to_csv(cs, csvfile, extra_fields=None):
     log.info('writing to {f:}'.format(f=os.path.basename(csvfile)))
+    with utils.careful_open(csvfile, 'w') as f:
+        write_cross_section_csv(cs, f, extra_fields=extra_fields)
+
+
+def write_cross_section_csv(cs, f, extra_fields=None):
+    '''write boreholes and segments of cross-section to open file'''
+    extra_fields = extra_fields or {}
     borehole_fields = (
         Borehole.fieldnames + (extra_fields.get('borehole') or ())
         )
@@ -261,18 +286,17 @@ def cross_section_to_csv(cs, csvfile, extra_fields=None):
         Segment.fieldnames + (extra_fields.get('segments') or ())
         )
     fieldnames = ('label', 'distance') + borehole_fields + segment_fields
-    with utils.careful_open(csvfile, 'w') as f:
-        writer = csv.DictWriter(f,
-            fieldnames=fieldnames,
-            lineterminator='\n',
-            extrasaction='ignore',
-            )
-        writer.writeheader()
-        cs.sort()
-        for distance, borehole in cs.boreholes:
-            for segment in borehole:
-                row = {'label': cs.label, 'distance': distance}
-                row.update(borehole.as_dict(borehole_fields))
-                row.update(segment.as_dict(segment_fields))
-                writer.writerow(row)
+    writer = csv.DictWriter(f,
+        fieldnames=fieldnames,
+        lineterminator='\n',
+        extrasaction='ignore',
+        )
+    writer.writeheader()
+    cs.sort()
+    for distance, borehole in cs.boreholes:
+        for segment in borehole:
+            row = {'label': cs.label, 'distance': distance}
+            row.update(borehole.as_dict(borehole_fields))
+            row.update(segment.as_dict(segment_fields))
+            writer.writerow(row)
 
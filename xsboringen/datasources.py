@@ -3,9 +3,13 @@
 # Tom van Steijn, Royal HaskoningDHV
 # Erik van Onselen, Deltares
 
-from xsboringen.csvfiles import boreholes_from_csv, points_from_csv
-from xsboringen.geffiles import boreholes_from_gef, cpts_from_gef
-from xsboringen.xmlfiles import dino_boreholes_from_xml, bro_boreholes_from_xml
+from xsboringen.csvfiles import boreholes_from_csv, boreholes_from_csvfile, points_from_csv
+from xsboringen.geffiles import boreholes_from_gef, cpts_from_gef, borehole_from_gef, cpt_from_gef
+from xsboringen.xmlfiles import dino_boreholes_from_xml, bro_boreholes_from_xml, dino_borehole_from_xml, bro_borehole_from_xml
+from xsboringen.store import boreholes_from_store
+from xsboringen.catalog import boreholes_from_catalog, query_from_datasource
+from xsboringen import profiling
+from xsboringen import utils
 
 from pathlib import Path
 from itertools import chain
@@ -14,9 +18,134 @@ import os
 
 log = logging.getLogger(os.path.basename(__file__))
 
-def boreholes_from_sources(datasources, admixclassifier=None):
+# file patterns of file based datasource formats
+SOURCE_PATTERNS = {
+    'Dinoloket XML 1.4': '*1.4.xml',
+    'BRO XML': '*.xml',
+    'CSV boringen': '*.csv',
+    'GEF boringen': '*.gef',
+    'GEF sonderingen': '*.gef',
+    }
+
+# borehole format of file based datasource formats
+BOREHOLE_FORMATS = {
+    'Dinoloket XML 1.4': 'Dino XML Borehole',
+    'BRO XML': 'BRO XML Borehole',
+    'CSV boringen': 'CSV Borehole',
+    'GEF boringen': 'GEF Borehole',
+    'GEF sonderingen': 'GEF CPT',
+    }
+
+
+class SourceFilter(object):
+    '''Bounding box, buffered geometries, minimum depth and formats of
+    boreholes to read, evaluated by the readers from the file headers before
+    the data is parsed. Unknown location or depth is accepted. Optional depth
+    window of segments and vertical samples to keep, as levels (e.g. ylim)
+    relative to borehole z or as depths below surface'''
+    def __init__(self, bbox=None, geometries=None, min_depth=None,
+            formats=None, levels=None, depths=None):
+        self.geometries = list(geometries or [])
+        if (bbox is None) and self.geometries:
+            bounds = [g.bounds for g in self.geometries]
+            bbox = (
+                min(b[0] for b in bounds), min(b[1] for b in bounds),
+                max(b[2] for b in bounds), max(b[3] for b in bounds),
+                )
+        self.bbox = bbox
+        self.min_depth = min_depth
+        self.levels = levels
+        self.depths = depths
+        if formats is not None:
+            self.formats = {BOREHOLE_FORMATS.get(f, f) for f in formats}
+        else:
+            self.formats = None
+
+        from shapely.prepared import prep
+        self._prepared = [prep(g) for g in self.geometries]
+
+    def __repr__(self):
+        return ('{s.__class__.__name__:}(bbox={s.bbox:}, '
+            'geometries={n:d}, min_depth={s.min_depth:})').format(
+                s=self, n=len(self.geometries))
+
+    @classmethod
+    def from_lines(cls, lines, buffer_distance, **kwargs):
+        '''filter on buffers of GeoJSON-like line geometries'''
+        from shapely.geometry import asShape
+        return cls(geometries=[asShape(l).buffer(buffer_distance)
+            for l in lines], **kwargs)
+
+    def accepts(self, x, y, depth):
+        '''location and depth accepted'''
+        if (self.min_depth is not None) and (depth is not None):
+            if depth < self.min_depth:
+                return False
+        if (x is None) or (y is None):
+            return True
+        if self.bbox is not None:
+            xmin, ymin, xmax, ymax = self.bbox
+            if not ((xmin <= x <= xmax) and (ymin <= y <= ymax)):
+                return False
+        if self._prepared:
+            from shapely.geometry import Point
+            point = Point(x, y)
+            return any(p.contains(point) for p in self._prepared)
+        return True
+
+    def accepts_format(self, format):
+        '''datasource or borehole format accepted'''
+        if (self.formats is None) or (format is None):
+            return True
+        return BOREHOLE_FORMATS.get(format, format) in self.formats
+
+    def depth_window(self, z):
+        '''top and base depth [m below surface] to keep for borehole at z,
+        None if no window'''
+        if self.depths is not None:
+            top, base = self.depths
+            return top, base
+        if (self.levels is not None) and (z is not None):
+            return z - max(self.levels), z - min(self.levels)
+
+    def clip_borehole(self, borehole):
+        '''clip segments and verticals of borehole to depth window'''
+        window = self.depth_window(borehole.z)
+        if window is not None:
+            borehole.clip(*window)
+        return borehole
+
+    def clip(self, boreholes):
+        '''boreholes clipped to depth window, for readers that cannot clip
+        while reading'''
+        for borehole in boreholes:
+            yield self.clip_borehole(borehole)
+
+    def accepts_borehole(self, borehole):
+        '''location, depth and format of borehole accepted'''
+        return (self.accepts(borehole.x, borehole.y, borehole.depth) and
+            self.accepts_format(getattr(borehole, 'format', None)))
+
+    def filter(self, boreholes):
+        '''accepted boreholes, for readers without header access'''
+        for borehole in boreholes:
+            if self.accepts_borehole(borehole):
+                yield borehole
+
+
+def boreholes_from_sources(datasources, admixclassifier=None, prefilter=None):
+    '''read boreholes and CPT's from datasources, skip files rejected by
+    optional SourceFilter before parsing'''
     readers = []
     for datasource in datasources:
+        # store and catalog hold mixed formats, filtered per borehole
+        if ((prefilter is not None) and
+                (datasource['format'] in BOREHOLE_FORMATS) and
+                not prefilter.accepts_format(datasource['format'])):
+            log.info('dataformat \'{fmt:}\' not selected, skipping'.format(
+                fmt=datasource['format']))
+            continue
+
         if datasource['format'] == 'Dinoloket XML 1.4':
             readers.append(dino_boreholes_from_xml(
                 folder=Path(datasource['folder']),
@@ -24,6 +153,7 @@ def boreholes_from_sources(datasources, admixclassifier=None):
                 extra_fields=datasource.get('extra_fields'),
                 use_filename=datasource.get('use_filename_as_id') or False,
                 priority=datasource.get('priority') or 0,
+                prefilter=prefilter,
                 ))
         elif datasource['format'] == 'BRO XML':
             readers.append(bro_boreholes_from_xml(
@@ -31,6 +161,7 @@ def boreholes_from_sources(datasources, admixclassifier=None):
                 extra_fields=datasource.get('extra_fields'),
                 use_filename=datasource.get('use_filename_as_id') or False,
                 priority=datasource.get('priority') or 0,
+                prefilter=prefilter,
                 ))
         elif datasource['format'] == 'CSV boringen':
             readers.append(boreholes_from_csv(
@@ -40,6 +171,8 @@ def boreholes_from_sources(datasources, admixclassifier=None):
                 delimiter=datasource.get('delimiter', ','),
                 decimal=datasource.get('decimal', '.'),
                 ))
+            if prefilter is not None:
+                readers[-1] = prefilter.clip(prefilter.filter(readers[-1]))
         elif datasource['format'] == 'GEF boringen':
             readers.append(boreholes_from_gef(
                 folder=Path(datasource['folder']),
@@ -47,6 +180,7 @@ def boreholes_from_sources(datasources, admixclassifier=None):
                 fieldnames=datasource.get('fieldnames'),
                 use_filename=datasource.get('use_filename_as_id') or False,
                 priority=datasource.get('priority') or 0,
+                prefilter=prefilter,
                 ))
         elif datasource['format'] == 'GEF sonderingen':
             readers.append(cpts_from_gef(
@@ -55,18 +189,93 @@ def boreholes_from_sources(datasources, admixclassifier=None):
                 datacolumns=datasource['datacolumns'],
                 use_filename=datasource.get('use_filename_as_id') or False,
                 priority=datasource.get('priority') or 0,
+                prefilter=prefilter,
+                ))
+        elif datasource['format'] == 'XSB store':
+            readers.append(boreholes_from_store(
+                folder=Path(datasource['folder']),
+                priority=datasource.get('priority'),
+                prefilter=prefilter,
                 ))
+        elif datasource['format'] == 'XSB catalog':
+            readers.append(boreholes_from_catalog(
+                catalogfile=datasource['file'],
+                admixclassifier=admixclassifier,
+                prefilter=prefilter,
+                **query_from_datasource(datasource)
+                ))
+            if prefilter is not None:
+                readers[-1] = prefilter.clip(readers[-1])
         else:
             log.warning((
                 'dataformat \'{fmt:}\' not supported, skipping').format(
                     fmt=datasource['format'],
                     )
                 )
-            pass
+            continue
+
+        # time reading per datasource if profiling
+        readers[-1] = profiling.iterate(stage_name(datasource), readers[-1])
+
     for result in chain(*readers):
         yield result
 
 
+def source_files(datasource):
+    '''input files of file based datasource'''
+    pattern = SOURCE_PATTERNS[datasource['format']]
+    return sorted(utils.careful_glob(Path(datasource['folder']), pattern))
+
+
+def read_source_file(datasource, filepath, admixclassifier=None):
+    '''boreholes and CPT's in single input file of datasource'''
+    if datasource['format'] == 'Dinoloket XML 1.4':
+        boreholes = [dino_borehole_from_xml(filepath,
+            extra_fields=datasource.get('extra_fields'),
+            use_filename=datasource.get('use_filename_as_id') or False,
+            priority=datasource.get('priority') or 0,
+            )]
+    elif datasource['format'] == 'BRO XML':
+        boreholes = [bro_borehole_from_xml(filepath,
+            extra_fields=datasource.get('extra_fields'),
+            use_filename=datasource.get('use_filename_as_id') or False,
+            priority=datasource.get('priority') or 0,
+            )]
+    elif datasource['format'] == 'CSV boringen':
+        boreholes = list(boreholes_from_csvfile(filepath,
+            extra_fields=datasource.get('extra_fields'),
+            delimiter=datasource.get('delimiter', ','),
+            decimal=datasource.get('decimal', '.'),
+            ))
+    elif datasource['format'] == 'GEF boringen':
+        boreholes = [borehole_from_gef(filepath,
+            classifier=admixclassifier,
+            fieldnames=datasource.get('fieldnames'),
+            use_filename=datasource.get('use_filename_as_id') or False,
+            priority=datasource.get('priority') or 0,
+            )]
+    elif datasource['format'] == 'GEF sonderingen':
+        boreholes = [cpt_from_gef(filepath,
+            fieldnames=datasource.get('fieldnames'),
+            datacolumns=datasource['datacolumns'],
+            use_filename=datasource.get('use_filename_as_id') or False,
+            priority=datasource.get('priority') or 0,
+            )]
+    else:
+        raise ValueError('dataformat \'{fmt:}\' is not file based'.format(
+            fmt=datasource['format']))
+    return [b for b in boreholes if b is not None]
+
+
+def stage_name(datasource):
+    '''profiling stage name of datasource'''
+    location = datasource.get('folder') or datasource.get('file') or ''
+    return 'read {fmt:} {name:}'.format(
+        fmt=datasource['format'],
+        name=Path(location).name,
+        ).strip()
+
+
 def points_from_sources(datasources):
     readers = []
     for datasource in datasources:
@@ -84,7 +293,11 @@ def points_from_sources(datasources):
                     fmt=datasource['format'],
                     )
                 )
-            pass
+            continue
+
+        # time reading per datasource if profiling
+        readers[-1] = profiling.iterate(stage_name(datasource), readers[-1])
+
     for result in chain(*readers):
         yield result
 
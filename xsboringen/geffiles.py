@@ -5,6 +5,7 @@
 
 from xsboringen.borehole import Borehole, Segment, Vertical
 from xsboringen.cpt import CPT
+from xsboringen import profiling
 from xsboringen import utils
 
 from collections import defaultdict, namedtuple
@@ -17,24 +18,42 @@ from tqdm import tqdm
 log = logging.getLogger(os.path.basename(__file__))
 
 
-def boreholes_from_gef(folder, classifier=None, fieldnames=None, use_filename=False, priority=0):
+def boreholes_from_gef(folder, classifier=None, fieldnames=None, use_filename=False, priority=0, prefilter=None):
     geffiles = utils.careful_glob(folder, '*.gef')
     for geffile in tqdm(geffiles, desc='Reading GEF Boreholes'):
-        gef = GefBoreholeFile(geffile, classifier, fieldnames, use_filename=use_filename, priority=priority)
-        borehole = gef.to_borehole()
+        borehole = borehole_from_gef(geffile, classifier, fieldnames, use_filename=use_filename, priority=priority, prefilter=prefilter)
         if borehole is not None:
             yield borehole
 
 
-def cpts_from_gef(folder, datacolumns=None, classifier=None, fieldnames=None, use_filename=False, priority=0):
+def cpts_from_gef(folder, datacolumns=None, classifier=None, fieldnames=None, use_filename=False, priority=0, prefilter=None):
     geffiles = utils.careful_glob(folder, '*.gef')
     for geffile in tqdm(geffiles, desc='Reading GEF CPTs'):
-        gef = GefCPTFile(geffile, classifier, fieldnames, use_filename=use_filename, priority=priority)
-        cpt = gef.to_cpt(datacolumns)
+        cpt = cpt_from_gef(geffile, datacolumns, classifier, fieldnames, use_filename=use_filename, priority=priority, prefilter=prefilter)
         if cpt is not None:
             yield cpt
 
 
+def borehole_from_gef(geffile, classifier=None, fieldnames=None, use_filename=False, priority=0, prefilter=None):
+    '''read borehole from single GEF file, None if not a borehole or
+    rejected by prefilter'''
+    with profiling.read_file(geffile, GefBoreholeFile._format):
+        gef = GefBoreholeFile(geffile, classifier, fieldnames, use_filename=use_filename, priority=priority, prefilter=prefilter)
+        borehole = gef.to_borehole()
+        profiling.note_file(borehole=borehole)
+    return borehole
+
+
+def cpt_from_gef(geffile, datacolumns=None, classifier=None, fieldnames=None, use_filename=False, priority=0, prefilter=None):
+    '''read CPT from single GEF file, None if not a CPT or rejected by
+    prefilter'''
+    with profiling.read_file(geffile, GefCPTFile._format):
+        gef = GefCPTFile(geffile, classifier, fieldnames, use_filename=use_filename, priority=priority, prefilter=prefilter)
+        cpt = gef.to_cpt(datacolumns)
+        profiling.note_file(borehole=cpt)
+    return cpt
+
+
 class GefFile(object):
     # GEF field names
     FieldNames = namedtuple('FieldNames',
@@ -90,7 +109,8 @@ class GefFile(object):
         fieldnames=None,
         measurementvars=None,
         use_filename=False,
-        priority=0
+        priority=0,
+        prefilter=None,
         ):
         self.file = Path(geffile).resolve()
         self.attrs = {
@@ -113,6 +133,7 @@ class GefFile(object):
                 )
 
         self.use_filename = use_filename
+        self.prefilter = prefilter
 
     @staticmethod
     def safe_int(s):
@@ -217,15 +238,53 @@ class GefFile(object):
         return header
 
 
+    def accepted(self, header):
+        '''location and depth in header accepted by prefilter, True if
+        unknown'''
+        if self.prefilter is None:
+            return True
+        try:
+            _, x, y, *_ = header[self.fieldnames.xy]
+            x, y = self.safe_float(x), self.safe_float(y)
+        except (KeyError, ValueError):
+            x, y = None, None
+        try:
+            depth = header['MEASUREMENTVAR'][self.measurementvars.depth].value
+        except KeyError:
+            depth = None
+        return self.prefilter.accepts(x, y, depth)
+
+    def depth_window(self, z):
+        '''depth window of prefilter at z, None if no window'''
+        if self.prefilter is not None:
+            return self.prefilter.depth_window(z)
+
+
 class GefBoreholeFile(GefFile):
     _format = 'GEF Borehole'
 
     @classmethod
-    def read_segments(cls, lines, columnsep, recordsep):
+    def read_segments(cls, lines, columnsep, recordsep,
+            window=None, bases=None,
+            ):
+        '''read segments from data lines, skipping rows outside depth window
+        before parsing; base of every row is added to bases if given'''
         for line in lines:
             line = line.rstrip(recordsep)
             attrs = {}
             top, base, *remainder = line.split(columnsep)
+            top = cls.safe_float(top)
+            base = cls.safe_float(base)
+            if (bases is not None) and (base is not None):
+                bases.append(base)
+
+            # skip rows outside depth window, keep rows of unknown depth
+            if ((window is not None) and (top is not None) and
+                    (base is not None) and (
+                    (max(top, base) <= window[0]) or
+                    (min(top, base) >= window[1]))):
+                continue
+
             try:
                 lithologycolor = remainder[0].replace('\'', '').strip() or None
             except IndexError:
@@ -239,8 +298,6 @@ class GefBoreholeFile(GefFile):
             except IndexError:
                 comment = None
 
-            top = cls.safe_float(top)
-            base = cls.safe_float(base)
             if lithologycolor is not None:
                 lithology, *color = lithologycolor.split(maxsplit=1)
                 attrs['color'] = color
@@ -253,9 +310,9 @@ class GefBoreholeFile(GefFile):
             yield Segment(top, base, lithology, sandmedianclass, **attrs)
 
     @staticmethod
-    def depth_from_segments(segments):
+    def depth_from_bases(bases):
         log.debug('calculating depth from segments')
-        return max(s.base for s in segments)
+        return max(bases)
 
     def to_borehole(self):
         log.debug('reading {file:}'.format(file=os.path.basename(self.file)))
@@ -264,6 +321,10 @@ class GefBoreholeFile(GefFile):
             lines = (l.rstrip('\n') for l in f if len(l.strip()) > 0)
             header = self.read_header(lines)
 
+            # skip data if rejected by header
+            if not self.accepted(header):
+                return
+
             # column separator
             if self.fieldnames.columnsep in header:
                 columnsep, *_ = header[self.fieldnames.columnsep]
@@ -276,9 +337,28 @@ class GefBoreholeFile(GefFile):
             else:
                 recordsep = None
 
-            # segments
+            # depth
+            try:
+                depth = header['MEASUREMENTVAR'][
+                    self.measurementvars.depth].value
+                bases = None
+            except KeyError:
+                depth = None
+                bases = []
+
+            # z
+            if self.fieldnames.z in header:
+                _, z, *_ = header[self.fieldnames.z]
+                z = self.safe_float(z)
+            else:
+                z = None
+
+            # segments within depth window
             segments = [
-                s for s in self.read_segments(lines, columnsep, recordsep)
+                s for s in self.read_segments(lines, columnsep, recordsep,
+                    window=self.depth_window(z),
+                    bases=bases,
+                    )
                 ]
             # classify lithology and admix
             if self.classifier is not None:
@@ -296,26 +376,20 @@ class GefBoreholeFile(GefFile):
                         'no value for \'{s.fieldnames.code:}\' in {s.file.name:},\n'
                         'skipping this file'
                         ).format(s=self))
+                profiling.note_file(skipped='no {s.fieldnames.code:}'.format(
+                    s=self))
                 return
 
-        # depth
-        try:
-            depth = header['MEASUREMENTVAR'][self.measurementvars.depth].value
-        except KeyError:
-            depth = self.depth_from_segments(segments)
+        # depth from all segments, including those outside depth window
+        if depth is None:
+            depth = self.depth_from_bases(bases)
+            profiling.note_file(fallback='depth_from_segments')
 
         # x, y
         _, x, y, *_ = header[self.fieldnames.xy]
         x = self.safe_float(x)
         y = self.safe_float(y)
 
-        # z
-        if self.fieldnames.z in header:
-            _, z, *_ = header[self.fieldnames.z]
-            z = self.safe_float(z)
-        else:
-            z = None
-
         return Borehole(code, depth,
             x=x, y=y, z=z,
             segments=segments,
@@ -378,6 +452,10 @@ class GefCPTFile(GefFile):
             lines = (l.rstrip('\n') for l in f if len(l.strip()) > 0)
             header = self.read_header(lines)
 
+            # skip data if rejected by header
+            if not self.accepted(header):
+                return
+
             # selected columns
             column_mapping = {v: k for k, v in datacolumns.items()}
             selected_columns = {
@@ -425,6 +503,8 @@ class GefCPTFile(GefFile):
                         'no value for \'{s.fieldnames.code:}\' in {s.file.name:},\n'
                         'skipping this file'
                         ).format(s=self))
+                profiling.note_file(skipped='no {s.fieldnames.code:}'.format(
+                    s=self))
                 return
 
         # depth
@@ -432,6 +512,7 @@ class GefCPTFile(GefFile):
             depth = header['MEASUREMENTVAR'][self.measurementvars.depth].value
         except KeyError:
             depth = self.depth_from_verticals(verticals)
+            profiling.note_file(fallback='depth_from_verticals')
 
         # x, y
         _, x, y, *_ = header[self.fieldnames.xy]
@@ -445,6 +526,11 @@ class GefCPTFile(GefFile):
         else:
             z = None
 
+        # vertical samples within depth window
+        window = self.depth_window(z)
+        if window is not None:
+            verticals = {k: v.clipped(*window) for k, v in verticals.items()}
+
         return CPT(code, depth,
             x=x, y=y, z=z,
             verticals=verticals,
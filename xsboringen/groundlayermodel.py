@@ -3,6 +3,8 @@
 # Tom van Steijn, Royal HaskoningDHV
 # Erik van Onselen, Deltares
 
+from xsboringen.layercube import LayerCube, CubeSolid
+from xsboringen.rasterfiles import summarize
 from xsboringen.solid import Solid
 
 import numpy as np
@@ -13,23 +15,36 @@ import logging
 import csv
 import os
 
+log = logging.getLogger(os.path.basename(__file__))
+
 
 class GroundLayerModel(object):
     IndexFieldNames = namedtuple('IndexFields',
         ['number', 'name', 'topfile', 'basefile', 'color'],
         )
+    LayerSummary = namedtuple('LayerSummary',
+        ['name', 'xmin', 'ymin', 'xmax', 'ymax',
+         'topmin', 'topmax', 'basemin', 'basemax'],
+        )
     def __init__(self,
             solids=None,
             res=10.,
             styles=None,
             default=None,
             name=None,
+            indexfile=None,
+            cube=None,
             ):
         self.solids = solids or []
         self.styles = styles or {}
         self.res = res
         self.default = default
         self.name = name
+        self.indexfile = indexfile
+        self.cube = cube
+
+        # per-layer summaries by solid name
+        self.summaries = {}
 
     def __repr__(self):
         return ('{s.__class__.__name__:}(name={s.name:}, '
@@ -82,8 +97,50 @@ class GroundLayerModel(object):
             styles=styles,
             default=default,
             name=name,
+            indexfile=indexfile,
             )
 
+    @classmethod
+    def from_cube(cls, cubefile, res=10., default=None, name=None):
+        '''ground layer model backed by a precompiled LayerCube'''
+        cube = LayerCube(cubefile)
+        solids = []
+        styles = {}
+        summaries = {}
+        for layer, item in enumerate(cube.layers):
+            solid_name = item['name']
+            solids.append((item['number'], CubeSolid(
+                name=solid_name,
+                cube=cube,
+                layer=layer,
+                res=res,
+                stylekey=solid_name,
+                )))
+
+            # add style to styles dict
+            solid_style = default.copy()
+            solid_style.update({
+                'label': solid_name,
+                'facecolor': item['color'],
+                })
+            styles[solid_name] = solid_style
+
+            # summary from cube metadata
+            summaries[solid_name] = cls.LayerSummary(solid_name, *(
+                item.get(k, np.nan) for k in cls.LayerSummary._fields[1:]
+                ))
+
+        model = cls(
+            solids=solids,
+            res=res,
+            styles=styles,
+            default=default,
+            name=name or cube.meta.get('name'),
+            cube=cube,
+            )
+        model.summaries = summaries
+        return model
+
     @staticmethod
     def sortkey(item):
         number, solid = item
@@ -93,11 +150,120 @@ class GroundLayerModel(object):
         key = key or self.sortkey
         self.solids = [(n, s) for n, s in sorted(self.solids, key=key)]
 
+    @property
+    def summaryfile(self):
+        '''summary file next to index file'''
+        if self.indexfile is None:
+            return None
+        indexfile = Path(self.indexfile)
+        return indexfile.with_name(indexfile.stem + '_summary.csv')
+
+    @classmethod
+    def summarize_solid(cls, solid):
+        '''data footprint and top, base range of solid from its rasters'''
+        top = summarize(str(solid.topfile))
+        base = summarize(str(solid.basefile))
+        if (top is None) or (base is None):
+            return cls.LayerSummary(solid.name, *[np.nan] * 8)
+
+        # footprint where both top and base have data
+        xmin, ymin = max(top.xmin, base.xmin), max(top.ymin, base.ymin)
+        xmax, ymax = min(top.xmax, base.xmax), min(top.ymax, base.ymax)
+        if (xmin > xmax) or (ymin > ymax):
+            return cls.LayerSummary(solid.name, *[np.nan] * 8)
+        return cls.LayerSummary(solid.name,
+            xmin, ymin, xmax, ymax,
+            top.vmin, top.vmax, base.vmin, base.vmax,
+            )
+
+    def summary_is_current(self, summaryfile):
+        '''summary file exists and is newer than index file and rasters'''
+        summaryfile = Path(summaryfile)
+        if not summaryfile.exists():
+            return False
+        sources = [Path(self.indexfile)] if self.indexfile else []
+        for number, solid in self.solids:
+            sources += [Path(solid.topfile), Path(solid.basefile)]
+        modified = max((f.stat().st_mtime for f in sources), default=0.)
+        return summaryfile.stat().st_mtime >= modified
+
+    def read_summaries(self, summaryfile):
+        with open(summaryfile) as f:
+            reader = csv.DictReader(f)
+            return {
+                row['name']: self.LayerSummary(row['name'], *(
+                    float(row[k]) for k in self.LayerSummary._fields[1:]
+                    ))
+                for row in reader
+                }
+
+    def write_summaries(self, summaryfile):
+        with open(summaryfile, 'w') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(self.LayerSummary._fields)
+            for summary in self.summaries.values():
+                writer.writerow(summary)
+
+    def summarize(self, summaryfile=None):
+        '''read per-layer summaries, or build them once and save'''
+        summaryfile = summaryfile or self.summaryfile
+        if (summaryfile is not None) and self.summary_is_current(summaryfile):
+            log.debug('reading summaries from {f:}'.format(
+                f=os.path.basename(summaryfile)))
+            self.summaries = self.read_summaries(summaryfile)
+            if all(s.name in self.summaries for n, s in self.solids):
+                return
+
+        log.info('summarizing {s:}'.format(s=self))
+        self.summaries = {
+            solid.name: self.summarize_solid(solid)
+            for number, solid in self.solids
+            }
+        if summaryfile is not None:
+            try:
+                self.write_summaries(summaryfile)
+            except OSError:
+                log.warning('cannot write summaries to {f:}'.format(
+                    f=summaryfile))
+
+    def solid_may_have_values(self, solid, bounds, ylim=None):
+        '''test summary of solid against bounds and y limits, no pixel reads'''
+        summary = self.summaries.get(solid.name)
+        if summary is None:
+            return True
+        xmin, ymin, xmax, ymax = bounds
+        # no values when solid has no data or footprint outside bounds
+        no_values = (
+            np.isnan(summary.xmin) or
+            (xmax < summary.xmin) or (xmin > summary.xmax) or
+            (ymax < summary.ymin) or (ymin > summary.ymax)
+            )
+        if ylim is not None:
+            lower, upper = ylim
+            # no values when solid completely above or below y limits
+            no_values = (
+                no_values or
+                (summary.topmax < lower) or
+                (summary.basemin > upper)
+                )
+        return not no_values
+
+    def sample_profiles(self, coords):
+        '''sample all solids at coords in one pass if backed by a cube'''
+        if self.cube is None:
+            return
+        values = self.cube.sample(coords)
+        for number, solid in self.solids:
+            solid.add_profile(coords, *values[solid.layer])
+
+    def release(self, coords=None):
+        '''release profiles of all solids sampled at coords'''
+        for number, solid in self.solids:
+            solid.release(coords)
+
     @staticmethod
     def solid_has_values(solid, coords, ylim=None):
-        top, base = zip(*((t, b) for t, b in solid.sample(coords)))
-        top = np.array(top, dtype=np.float)
-        base = np.array(base, dtype=np.float)
+        top, base = solid.sample_profile(coords)
         # no values when top or base only NaN
         no_values = (
             np.isnan(top).all() or
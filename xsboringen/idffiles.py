@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+# Tom van Steijn, Royal HaskoningDHV
+# Erik van Onselen, Deltares
+
+import numpy as np
+
+from collections import namedtuple
+from pathlib import Path
+import logging
+import struct
+import os
+
+log = logging.getLogger(os.path.basename(__file__))
+
+
+class IDFFile(object):
+    '''iMOD IDF file with memory-mapped grid'''
+
+    # Lahey record length identification, 2296 written by older iMOD
+    _single_precision = 1271
+    _double_precision = 2295
+    _double_precision_ids = 2295, 2296
+
+    Header = namedtuple('Header', [
+        'ncol', 'nrow', 'xmin', 'xmax', 'ymin', 'ymax',
+        'dmin', 'dmax', 'nodata', 'ieq', 'itb', 'dx', 'dy', 'top', 'bot',
+        'dtype', 'offset',
+        ])
+
+    def __init__(self, idffile):
+        self.file = Path(idffile)
+        self.header = self.read_header(self.file)
+        self._grid = None
+
+    def __repr__(self):
+        return ('{s.__class__.__name__:}(file={s.file.name:}, '
+            'ncol={s.header.ncol:d}, nrow={s.header.nrow:d})').format(s=self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    @classmethod
+    def read_header(cls, idffile):
+        '''read IDF header and return as Header'''
+        with open(idffile, 'rb') as f:
+            reclen, = struct.unpack('i', f.read(4))
+            if reclen == cls._single_precision:
+                intfmt, floatfmt, dtype = 'i', 'f', np.dtype('<f4')
+            elif reclen in cls._double_precision_ids:
+                intfmt, floatfmt, dtype = 'q', 'd', np.dtype('<f8')
+                f.read(4)  # padding
+            else:
+                raise ValueError(
+                    'not a valid IDF file: \'{f:}\''.format(f=idffile))
+            double_precision = dtype.itemsize == 8
+            intsize = struct.calcsize(intfmt)
+            floatsize = struct.calcsize(floatfmt)
+            read_int = lambda: struct.unpack(intfmt, f.read(intsize))[0]
+            read_float = lambda: struct.unpack(floatfmt, f.read(floatsize))[0]
+
+            ncol = read_int()
+            nrow = read_int()
+            xmin, xmax, ymin, ymax = (read_float() for _ in range(4))
+            dmin, dmax, nodata = (read_float() for _ in range(3))
+            ieq, itb = struct.unpack('??', f.read(2))
+            f.read(2)  # not used
+            if double_precision:
+                f.read(4)  # padding
+
+            # cell sizes (equidistant) and top, bottom
+            if not ieq:
+                dx, dy = read_float(), read_float()
+            if itb:
+                top, bot = read_float(), read_float()
+            else:
+                top, bot = None, None
+
+            # cell sizes (non-equidistant)
+            if ieq:
+                dx = np.fromfile(f, dtype=dtype, count=ncol).astype(float)
+                dy = np.fromfile(f, dtype=dtype, count=nrow).astype(float)
+            offset = f.tell()
+
+        return cls.Header(
+            ncol=ncol, nrow=nrow,
+            xmin=xmin, xmax=xmax, ymin=ymin, ymax=ymax,
+            dmin=dmin, dmax=dmax, nodata=nodata,
+            ieq=ieq, itb=itb, dx=dx, dy=dy, top=top, bot=bot,
+            dtype=dtype, offset=offset,
+            )
+
+    @property
+    def grid(self):
+        '''grid values as read-only memory-mapped array (nrow, ncol)'''
+        if self._grid is None:
+            log.debug('mapping idf file {f:}'.format(f=self.file.name))
+            self._grid = np.memmap(self.file,
+                dtype=self.header.dtype,
+                mode='r',
+                offset=self.header.offset,
+                shape=(self.header.nrow, self.header.ncol),
+                )
+        return self._grid
+
+    def close(self):
+        self._grid = None
+
+    @property
+    def edges(self):
+        '''x cell edges from left to right, y cell edges from top to bottom'''
+        header = self.header
+        if header.ieq:
+            xedges = header.xmin + np.cumsum(np.append(0., header.dx))
+            yedges = header.ymax - np.cumsum(np.append(0., header.dy))
+        else:
+            xedges = header.xmin + np.arange(header.ncol + 1) * header.dx
+            yedges = header.ymax - np.arange(header.nrow + 1) * header.dy
+        return xedges, yedges
+
+    def index(self, xs, ys):
+        '''row and column index for x and y arrays, -1 if outside grid'''
+        header = self.header
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        if header.ieq:
+            xedges, yedges = self.edges
+            cols = np.searchsorted(xedges[1:], xs, side='right')
+            rows = np.searchsorted(-yedges[1:], -ys, side='right')
+        else:
+            cols = np.floor((xs - header.xmin) / header.dx).astype(int)
+            rows = np.floor((header.ymax - ys) / header.dy).astype(int)
+        outside = (
+            (xs < header.xmin) | (xs >= header.xmax) |
+            (ys <= header.ymin) | (ys > header.ymax) |
+            (rows < 0) | (rows >= header.nrow) |
+            (cols < 0) | (cols >= header.ncol)
+            )
+        rows[outside] = -1
+        cols[outside] = -1
+        return rows, cols
+
+    def sample(self, coords):
+        '''sample grid at coords and return as masked array'''
+        coords = np.asarray(coords, dtype=float).reshape(-1, 2)
+        rows, cols = self.index(coords[:, 0], coords[:, 1])
+        outside = rows < 0
+        values = self.grid[
+            np.where(outside, 0, rows),
+            np.where(outside, 0, cols),
+            ].astype(float)
+        mask = outside | np.isnan(values)
+        if not np.isnan(self.header.nodata):
+            mask |= np.isclose(values, self.header.nodata)
+        return np.ma.masked_array(values, mask=mask)
+
+
+def write_idf(idffile, values, xmin, ymax, dx, dy=None, nodata=-9999.,
+        double_precision=False):
+    '''write 2D array to IDF file, non-equidistant if dx and dy are arrays
+    of cell sizes'''
+    if double_precision:
+        reclen, intfmt, floatfmt, dtype = (IDFFile._double_precision,
+            'q', 'd', np.dtype('<f8'))
+    else:
+        reclen, intfmt, floatfmt, dtype = (IDFFile._single_precision,
+            'i', 'f', np.dtype('<f4'))
+    values = np.asarray(values, dtype=dtype)
+    nrow, ncol = values.shape
+    ieq = np.ndim(dx) > 0
+    if dy is None:
+        dy = dx
+    if ieq:
+        dx = np.asarray(dx, dtype=dtype)
+        dy = np.asarray(dy, dtype=dtype)
+        xmax, ymin = xmin + float(dx.sum()), ymax - float(dy.sum())
+    else:
+        xmax, ymin = xmin + ncol * dx, ymax - nrow * dy
+    valid = values[~(np.isnan(values) | (values == nodata))]
+    if valid.size > 0:
+        dmin, dmax = float(valid.min()), float(valid.max())
+    else:
+        dmin, dmax = nodata, nodata
+    with open(idffile, 'wb') as f:
+        f.write(struct.pack('i', reclen))
+        if double_precision:
+            f.write(bytes(4))  # padding
+        f.write(struct.pack(intfmt * 2, ncol, nrow))
+        f.write(struct.pack(floatfmt * 4, xmin, xmax, ymin, ymax))
+        f.write(struct.pack(floatfmt * 3, dmin, dmax, nodata))
+        f.write(struct.pack('??xx', ieq, False))
+        if double_precision:
+            f.write(bytes(4))  # padding
+        if ieq:
+            dx.tofile(f)
+            dy.tofile(f)
+        else:
+            f.write(struct.pack(floatfmt * 2, dx, dy))
+        values.tofile(f)
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+# Tom van Steijn, Royal HaskoningDHV
+# Erik van Onselen, Deltares
+
+from xsboringen.rasterfiles import grid, sample_many, profile_key
+from xsboringen.solid import Solid
+
+import numpy as np
+
+from pathlib import Path
+import logging
+import json
+import os
+
+log = logging.getLogger(os.path.basename(__file__))
+
+
+class LayerCube(object):
+    '''Memory-mapped cube of layer top and base values on a common grid
+
+    Values are stored in square tiles as (tilerow, tilecol, row, col, layer,
+    top/base), so all layers at one cell are read in a single contiguous
+    read and neighbouring cells along a line share tiles.'''
+
+    def __init__(self, cubefile):
+        self.file = Path(cubefile)
+        with open(self.metafile(self.file)) as f:
+            self.meta = json.load(f)
+        self.xmin = self.meta['xmin']
+        self.ymax = self.meta['ymax']
+        self.dx = self.meta['dx']
+        self.dy = self.meta['dy']
+        self.nrow = self.meta['nrow']
+        self.ncol = self.meta['ncol']
+        self.tilesize = self.meta['tilesize']
+        self.layers = self.meta['layers']
+        self._data = None
+
+    def __repr__(self):
+        return ('{s.__class__.__name__:}(file={s.file.name:}, '
+            'layers={n:d})').format(s=self, n=len(self))
+
+    def __len__(self):
+        return len(self.layers)
+
+    @staticmethod
+    def metafile(cubefile):
+        '''metadata file next to cube file'''
+        return Path(cubefile).with_suffix('.json')
+
+    @property
+    def data(self):
+        '''tiled values as read-only memory-mapped array'''
+        if self._data is None:
+            log.debug('mapping cube {f:}'.format(f=self.file.name))
+            self._data = np.load(self.file, mmap_mode='r')
+        return self._data
+
+    def sample(self, coords):
+        '''sample all layers at coords as array (layer, top/base, coord)'''
+        coords = np.asarray(coords, dtype=float).reshape(-1, 2)
+        cols = np.floor((coords[:, 0] - self.xmin) / self.dx).astype(int)
+        rows = np.floor((self.ymax - coords[:, 1]) / self.dy).astype(int)
+        inside = (
+            (rows >= 0) & (rows < self.nrow) &
+            (cols >= 0) & (cols < self.ncol)
+            )
+        rows, cols = rows[inside], cols[inside]
+        values = np.full((len(coords), len(self), 2), np.nan)
+        values[inside] = self.data[
+            rows // self.tilesize, cols // self.tilesize,
+            rows % self.tilesize, cols % self.tilesize,
+            ]
+        return values.transpose(1, 2, 0)
+
+
+class CubeSolid(Solid):
+    '''Solid backed by a layer in a LayerCube'''
+    def __init__(self, name, cube, layer, res, stylekey=None):
+        super().__init__(name,
+            topfile=cube.file,
+            basefile=cube.file,
+            res=res,
+            stylekey=stylekey,
+            )
+        self.cube = cube
+        self.layer = layer
+
+    def sample(self, coords):
+        profile = self.profiles.get(profile_key(coords))
+        if profile is None:
+            profile = self.cube.sample(coords)[self.layer]
+        for top, base in zip(*profile):
+            yield top, base
+
+
+def common_grid(gridfiles, bounds=None):
+    '''grid covering all gridfiles, aligned to the first, clipped to bounds'''
+    grids = [grid(str(f)) for f in gridfiles]
+    first = grids[0]
+    xmin = min(g.xmin for g in grids)
+    xmax = max(g.xmin + g.ncol * g.dx for g in grids)
+    ymin = min(g.ymax - g.nrow * g.dy for g in grids)
+    ymax = max(g.ymax for g in grids)
+    if bounds is not None:
+        xmin, ymin = max(xmin, bounds[0]), max(ymin, bounds[1])
+        xmax, ymax = min(xmax, bounds[2]), min(ymax, bounds[3])
+
+    # align to cells of first grid
+    xmin = first.xmin + np.floor((xmin - first.xmin) / first.dx) * first.dx
+    ymax = first.ymax + np.ceil((ymax - first.ymax) / first.dy) * first.dy
+    ncol = int(np.ceil((xmax - xmin) / first.dx))
+    nrow = int(np.ceil((ymax - ymin) / first.dy))
+    return float(xmin), float(ymax), first.dx, first.dy, nrow, ncol
+
+
+def compile_ground_layer_model(model, cubefile, tilesize=64, bounds=None):
+    '''compile ground layer model to LayerCube file'''
+    solids = [s for n, s in model.solids]
+    numbers = [n for n, s in model.solids]
+    xmin, ymax, dx, dy, nrow, ncol = common_grid(
+        [s.topfile for s in solids], bounds=bounds)
+    ntilerows = -(-nrow // tilesize)
+    ntilecols = -(-ncol // tilesize)
+    nlayer = len(solids)
+    log.info('compiling {m:} to {nrow:d} x {ncol:d} cells'.format(
+        m=model, nrow=nrow, ncol=ncol))
+
+    # per-layer footprint (row, col limits) and value range
+    rowlims = np.tile([nrow, -1], (nlayer, 1))
+    collims = np.tile([ncol, -1], (nlayer, 1))
+    ranges = np.tile([np.inf, -np.inf], (nlayer, 2, 1))
+
+    xs = xmin + (np.arange(ncol) + 0.5) * dx
+    cube = np.lib.format.open_memmap(str(cubefile), mode='w+',
+        dtype='<f4',
+        shape=(ntilerows, ntilecols, tilesize, tilesize, nlayer, 2),
+        )
+    for tilerow in range(ntilerows):
+        firstrow = tilerow * tilesize
+        bandrows = min(tilesize, nrow - firstrow)
+        ys = ymax - (np.arange(firstrow, firstrow + bandrows) + 0.5) * dy
+        coords = np.column_stack([
+            np.tile(xs, bandrows),
+            np.repeat(ys, ncol),
+            ])
+
+        # sample all layers for band of tiles
+        band = np.full((tilesize, ntilecols * tilesize, nlayer, 2), np.nan,
+            dtype='<f4')
+        for layer, solid in enumerate(solids):
+            for i, gridfile in enumerate((solid.topfile, solid.basefile)):
+                values, = sample_many(str(gridfile), [coords])
+                band[:bandrows, :ncol, layer, i] = values.reshape(
+                    bandrows, ncol)
+
+        # update footprints and value ranges
+        valid = np.isfinite(band).all(axis=-1)
+        rows_valid = valid.any(axis=1).T
+        cols_valid = valid.any(axis=0).T
+        for layer in range(nlayer):
+            rows = np.flatnonzero(rows_valid[layer])
+            cols = np.flatnonzero(cols_valid[layer])
+            if len(rows) == 0:
+                continue
+            rowlims[layer] = (
+                min(rowlims[layer, 0], firstrow + rows[0]),
+                max(rowlims[layer, 1], firstrow + rows[-1]),
+                )
+            collims[layer] = (
+                min(collims[layer, 0], cols[0]),
+                max(collims[layer, 1], cols[-1]),
+                )
+            values = band[:, :, layer][valid[:, :, layer]]
+            ranges[layer, :, 0] = np.minimum(ranges[layer, :, 0],
+                values.min(axis=0))
+            ranges[layer, :, 1] = np.maximum(ranges[layer, :, 1],
+                values.max(axis=0))
+
+        # write band as row of tiles
+        cube[tilerow] = band.reshape(
+            tilesize, ntilecols, tilesize, nlayer, 2).transpose(1, 0, 2, 3, 4)
+    cube.flush()
+    del cube
+
+    # layer metadata
+    layers = []
+    for layer, (number, solid) in enumerate(zip(numbers, solids)):
+        style = model.styles.get(solid.name) or {}
+        item = {
+            'number': number,
+            'name': solid.name,
+            'color': style.get('facecolor'),
+            }
+        if rowlims[layer, 1] >= 0:
+            item.update({
+                'xmin': xmin + collims[layer, 0] * dx,
+                'xmax': xmin + (collims[layer, 1] + 1) * dx,
+                'ymin': ymax - (rowlims[layer, 1] + 1) * dy,
+                'ymax': ymax - rowlims[layer, 0] * dy,
+                'topmin': float(ranges[layer, 0, 0]),
+                'topmax': float(ranges[layer, 0, 1]),
+                'basemin': float(ranges[layer, 1, 0]),
+                'basemax': float(ranges[layer, 1, 1]),
+                })
+        layers.append(item)
+
+    meta = {
+        'name': model.name,
+        'xmin': xmin, 'ymax': ymax, 'dx': dx, 'dy': dy,
+        'nrow': nrow, 'ncol': ncol,
+        'tilesize': tilesize,
+        'layers': layers,
+        }
+    with open(LayerCube.metafile(cubefile), 'w') as f:
+        json.dump(meta, f, indent=2)
+    return LayerCube(cubefile)
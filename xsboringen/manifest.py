@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+# Tom van Steijn, Royal HaskoningDHV
+# Erik van Onselen, Deltares
+
+from xsboringen.mixins import AsDictMixin
+
+import numpy as np
+
+from collections.abc import Mapping
+from pathlib import Path
+import hashlib
+import logging
+import json
+import os
+
+log = logging.getLogger(os.path.basename(__file__))
+
+
+def update_hash(h, value):
+    '''update hash with canonical representation of value'''
+    if isinstance(value, AsDictMixin):
+        h.update(value.__class__.__name__.encode())
+        update_hash(h, value.as_dict())
+    elif isinstance(value, Mapping):
+        h.update(b'{')
+        for key in sorted(value, key=str):
+            update_hash(h, key)
+            update_hash(h, value[key])
+        h.update(b'}')
+    elif isinstance(value, (list, tuple)):
+        h.update(b'[')
+        for item in value:
+            update_hash(h, item)
+        h.update(b']')
+    elif isinstance(value, np.ndarray):
+        h.update(value.dtype.str.encode())
+        h.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, bytes):
+        h.update(value)
+    else:
+        h.update(repr(value).encode())
+    h.update(b';')
+
+
+def content_hash(*values):
+    '''content hash of values as hex string'''
+    h = hashlib.sha1()
+    for value in values:
+        update_hash(h, value)
+    return h.hexdigest()
+
+
+def file_identity(filename):
+    '''path, size and modification time of file, None if missing'''
+    path = Path(filename)
+    try:
+        stat = path.stat()
+    except OSError:
+        return str(path), None, None
+    return str(path.resolve()), stat.st_size, stat.st_mtime_ns
+
+
+class BuildManifest(object):
+    '''Input hashes and output files of sections plotted in result folder'''
+    def __init__(self, manifestfile):
+        self.file = Path(manifestfile)
+        self.sections = {}
+        if self.file.exists():
+            try:
+                with open(self.file) as f:
+                    self.sections = json.load(f)
+            except ValueError:
+                log.warning('cannot read manifest {f:}, rebuilding'.format(
+                    f=self.file.name))
+
+    def __repr__(self):
+        return ('{s.__class__.__name__:}(sections={n:d})').format(
+            s=self,
+            n=len(self.sections),
+            )
+
+    def is_current(self, key, digest):
+        '''section has same input hash and all output files exist'''
+        entry = self.sections.get(key)
+        if (entry is None) or (entry['hash'] != digest):
+            return False
+        folder = self.file.parent
+        return all((folder / f).exists() for f in entry['outputs'])
+
+    def update(self, key, digest, outputs):
+        self.sections[key] = {
+            'hash': digest,
+            'outputs': [str(f) for f in outputs],
+            }
+
+    def save(self):
+        tmpfile = self.file.with_name(self.file.name + '.tmp')
+        with open(tmpfile, 'w') as f:
+            json.dump(self.sections, f, indent=2, sort_keys=True)
+        os.replace(tmpfile, self.file)
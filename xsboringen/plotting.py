@@ -3,20 +3,29 @@
 # Erik van Onselen, Deltares
 
 import matplotlib.patheffects as PathEffects
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.colors import ListedColormap, to_rgba
 from matplotlib import pyplot as plt
 from matplotlib import transforms
 import numpy as np
 
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
+from pathlib import Path
 import logging
 import os
 
 
 class CrossSectionPlot(object):
     Extension = namedtuple('Extension', ['point', 'dx'])
+
+    # vector formats, text embedded as searchable TrueType fonts
+    vector_formats = {'.pdf', '.svg', '.eps', '.ps'}
+    vector_rc = {'pdf.fonttype': 42, 'ps.fonttype': 42, 'svg.fonttype': 'none'}
+
     def __init__(self, cross_section, styles, config,
         xtickstep=None, ylim=None, xlabel=None, ylabel=None, dist_txt=None,
         label_option=None, metadata=False, legend_ncol=1,
+        render_mode='publication',
         ):
         self.cs = cross_section
         self.styles = styles
@@ -29,6 +38,13 @@ class CrossSectionPlot(object):
         self.metadata = metadata
         self.label_option = label_option
         self.legend_ncol = legend_ncol
+        self.render_mode = render_mode
+
+        # segment styles used in plot, for draft legend
+        self.segment_styles_used = OrderedDict()
+
+        # vector output, set by to_image
+        self.vector = False
         
         self.dist_txt = dist_txt
     
@@ -52,17 +68,88 @@ class CrossSectionPlot(object):
     def title(self):
         return self.cs.title
 
-    def plot_borehole(self, fig, ax, left, borehole, width):
-        for segment in borehole:
-            height = segment.thickness
-            bottom = borehole.z - segment.base
-            segment_style = self.styles['segments'].lookup(segment)
+    @property
+    def draft(self):
+        return self.render_mode == 'draft'
 
-            # plot segment as bar
-            rect = ax.bar(left, height, width, bottom,
-                align='center', zorder=2,
-                **segment_style)
+    @property
+    def dpi(self):
+        '''output dpi, resolution of rasterized layers for vector output'''
+        if self.draft:
+            return self.cfg.get('draft_dpi', 72)
+        if self.vector:
+            return self.cfg.get('vector_raster_dpi',
+                self.cfg.get('figure_dpi', 200))
+        return self.cfg.get('figure_dpi', 200)
+
+    @property
+    def rasterized(self):
+        '''rasterize dense layers (segments, verticals, solids, voxels)'''
+        return self.draft or self.vector
+
+    @staticmethod
+    def patch_style(style):
+        '''face, edge colour and line width of a patch style'''
+        alpha = style.get('alpha')
+        facecolor = style.get('facecolor', style.get('color', 'none'))
+        edgecolor = style.get('edgecolor', 'none')
+        linewidth = style.get('linewidth', plt.rcParams['patch.linewidth'])
+        return to_rgba(facecolor, alpha), to_rgba(edgecolor, alpha), linewidth
+
+    def plot_segments(self, ax, boreholes, lefts, width):
+        '''plot segments of all boreholes as one collection with per-patch
+        colours, keeping drawing order; a new collection per run of hatched
+        segments'''
+        merge_segments = self.cfg.get('merge_segments', True)
+        self.segment_styles_used = OrderedDict()
+        rects = []
+        for borehole, left in zip(boreholes, lefts):
+            previous = None
+            for segment in borehole:
+                style = self.styles['segments'].lookup(segment)
+                bottom = borehole.z - segment.base
+                top = bottom + segment.thickness
+
+                # merge with adjacent segment above if same style
+                if (merge_segments and (previous is not None) and
+                        (previous[0] is style) and
+                        np.isclose(previous[1][1], top)):
+                    previous[1][1] = bottom
+                    continue
+                rect = [left - width / 2., bottom, left + width / 2., top]
+                rects.append((style, rect))
+                self.segment_styles_used.setdefault(id(style), style)
+                previous = style, rect
+
+        # collect patches in runs of the same hatch, hatch cannot vary per
+        # patch; one collection per run keeps the drawing order of the bars
+        runs = []
+        for style, (x0, y0, x1, y1) in rects:
+            hatch = style.get('hatch')
+            if not runs or runs[-1][0] != hatch:
+                runs.append((hatch, [], [], [], []))
+            _, verts, facecolors, edgecolors, linewidths = runs[-1]
+            facecolor, edgecolor, linewidth = self.patch_style(style)
+            verts.append([(x0, y0), (x1, y0), (x1, y1), (x0, y1)])
+            facecolors.append(facecolor)
+            edgecolors.append(edgecolor)
+            linewidths.append(linewidth)
+
+        collections = []
+        for hatch, verts, facecolors, edgecolors, linewidths in runs:
+            collection = PolyCollection(verts,
+                facecolors=facecolors,
+                edgecolors=edgecolors,
+                linewidths=linewidths,
+                hatch=hatch,
+                zorder=2,
+                rasterized=self.rasterized,
+                )
+            ax.add_collection(collection)
+            collections.append(collection)
+        return collections
 
+    def plot_borehole(self, fig, ax, left, borehole, width):
         # plot borehole code as text
         txt = []
         codelabel_position = self.cfg.get('codelabel_position')
@@ -78,10 +165,11 @@ class CrossSectionPlot(object):
             transform=vtrans,
             ))
         if self.dist_txt[0]:
+            dist_dir = self.cs.dist_dir(borehole)
             if self.dist_txt[2] == 'double_line':
-                text_label = '' + borehole.dist_dir[2] + '\n' + str(int(np.round(borehole.dist_dir[0]))) + '\n'
+                text_label = '' + dist_dir[2] + '\n' + str(int(np.round(dist_dir[0]))) + '\n'
             elif self.dist_txt[2] == 'single_line':
-                text_label = '    ' + borehole.dist_dir[2] + ' ' + str(int(np.round(borehole.dist_dir[0]))) + ' m'
+                text_label = '    ' + dist_dir[2] + ' ' + str(int(np.round(dist_dir[0]))) + ' m'
             
             txt.append(ax.text(left, borehole.z, text_label,
                 size=codelabel_fontsize-2,
@@ -94,11 +182,51 @@ class CrossSectionPlot(object):
 
         return txt
 
+    @staticmethod
+    def decimate(x, y, step):
+        '''keep first, last, min and max x per row of height step in y,
+        and the ends of every gap, in original order'''
+        valid = np.isfinite(x) & np.isfinite(y)
+        rows = np.full(len(y), -1)
+        rows[valid] = np.floor(y[valid] / step).astype(int)
+
+        # runs of consecutive valid samples in the same row
+        change = np.ones(len(y), dtype=bool)
+        change[1:] = (rows[1:] != rows[:-1]) | (valid[1:] != valid[:-1])
+        runs = np.cumsum(change)
+
+        # sort by run, then x: first and last in run are min and max
+        order = np.lexsort((x, runs))
+        sorted_runs = runs[order]
+        firsts = np.flatnonzero(np.diff(sorted_runs, prepend=-1) != 0)
+        lasts = np.append(firsts[1:] - 1, len(order) - 1)
+
+        starts = np.flatnonzero(change)
+        ends = np.append(starts[1:] - 1, len(y) - 1)
+        keep = np.unique(np.concatenate([
+            starts, ends, order[firsts], order[lasts],
+            ]))
+        return x[keep], y[keep]
+
+    def vertical_step(self, ax):
+        '''height of a pixel row in data units, None if unknown'''
+        if (self.ylim is None) or not self.cfg.get('decimate_verticals', True):
+            return None
+        figsize = self.cfg.get('figure_size')
+        if figsize is None:
+            return None
+        ymin, ymax = self.ylim
+        pixels = figsize[1] * self.dpi * ax.get_position().height
+        return abs(ymax - ymin) / pixels
+
     def plot_vertical(self, ax, distance, vertical, width, style):
         depth = np.array(vertical.depth, dtype=np.float)
         rescaled = np.array(vertical.rescaled().values, dtype=np.float)
         transformed = distance + (rescaled - 0.5)*width
-        vert = ax.plot(transformed, depth, **style)
+        step = self.vertical_step(ax)
+        if step is not None:
+            transformed, depth = self.decimate(transformed, depth, step)
+        vert = ax.plot(transformed, depth, rasterized=self.rasterized, **style)
         return vert
 
     def plot_edge(self, ax, distance, vertical, width, style):
@@ -203,15 +331,55 @@ class CrossSectionPlot(object):
         plot_distance = distance.copy()
         for extension in extensions:
             plot_distance[distance > extension.point] += extension.dx
-        top, base = zip(*((t, b) for t, b in solid.sample(coords)))
-        top = np.array(top)
-        base = np.array(base)
+        top, base = solid.sample_profile(coords)
         style = self.styles['solids'].lookup(solid.stylekey)
         sld = ax.fill_between(plot_distance, base, top,
             where=(top - base) > min_thickness,
+            rasterized=self.rasterized,
             **style,
             )
 
+    @staticmethod
+    def cell_edges(centers):
+        '''cell edges halfway between centers'''
+        mids = (centers[1:] + centers[:-1]) / 2.
+        return np.concatenate([
+            [centers[0] - (mids[0] - centers[0])],
+            mids,
+            [centers[-1] + (centers[-1] - mids[-1])],
+            ])
+
+    def plot_voxels(self, ax, voxelmodel, extensions):
+        distance, coords = zip(*self.cs.discretize(voxelmodel.res))
+        distance = np.array(distance)
+        plot_distance = distance.copy()
+        for extension in extensions:
+            plot_distance[distance > extension.point] += extension.dx
+        values, z = voxelmodel.sample_profile(coords)
+
+        # colour index per voxel class
+        valid = np.isfinite(values)
+        classes = np.unique(values[valid])
+        if len(classes) == 0:
+            return None
+        lookup = self.styles['voxels'].lookup
+        colors = [lookup(int(c)).get('facecolor', 'none') for c in classes]
+        index = np.ma.masked_array(
+            np.searchsorted(classes, np.where(valid, values, classes[0])),
+            mask=~valid,
+            )
+
+        # plot voxels as a single image
+        vxl = ax.pcolormesh(
+            self.cell_edges(plot_distance), self.cell_edges(z), index,
+            cmap=ListedColormap(colors),
+            vmin=-0.5, vmax=len(classes) - 0.5,
+            shading='flat',
+            zorder=1,
+            rasterized=self.rasterized,
+            )
+        return vxl
+
     def plot_label(self, ax):
         if self.label_option == 'both':
             label_to_add_l = self.label + ' ' + f'({self.cs.wind_label_l})'
@@ -263,7 +431,36 @@ class CrossSectionPlot(object):
             )
         return plot_distance, extensions
 
+    def get_draft_legend(self, ax):
+        '''legend with used segment styles and solids only'''
+        handles_labels = []
+        for style in self.segment_styles_used.values():
+            handles_labels.append((
+                plt.Rectangle((0, 0), 1, 1,
+                    **style,
+                    ),
+                style.get('label'),
+                ))
+        for label, style in self.styles['solids'].items():
+            handles_labels.append((
+                plt.Rectangle((0, 0), 1, 1,
+                    **style,
+                    ),
+                label
+                ))
+        if len(handles_labels) == 0:
+            return None
+        handles, labels = zip(*handles_labels)
+        lgd = ax.legend(handles, labels,
+            fontsize=self.cfg.get('legend_fontsize'),
+            loc='lower left',
+            bbox_to_anchor=(1.01, 0),
+            )
+        return lgd
+
     def get_legend(self, ax):
+        if self.draft:
+            return self.get_draft_legend(ax)
         handles_labels = []
         if len(self.cs.boreholes) > 0:
             for label, style in self.styles['verticals'].items():
@@ -295,6 +492,14 @@ class CrossSectionPlot(object):
                         ),
                     label
                     ))
+        if len(self.cs.voxelmodels) > 0:
+            for label, style in self.styles['voxels'].items():
+                handles_labels.append((
+                    plt.Rectangle((0, 0), 1, 1,
+                        **style,
+                        ),
+                    label
+                    ))
         for label, style in self.styles['solids'].items():
             handles_labels.append((
                 plt.Rectangle((0, 0), 1, 1,
@@ -359,6 +564,9 @@ class CrossSectionPlot(object):
         barwidth = barwidth_factor * (xmax - xmin)
         verticalwidth = verticalwidth_factor * (xmax - xmin)
 
+        # plot borehole segments
+        self.plot_segments(ax, boreholes, plot_distances, barwidth)
+
         # plot boreholes
         for borehole, plot_distance in boreholes_plot_distances:
 
@@ -432,6 +640,13 @@ class CrossSectionPlot(object):
                 extensions=extensions,
                 )
 
+        # plot voxel models
+        for voxelmodel in self.cs.voxelmodels:
+            self.plot_voxels(ax,
+                voxelmodel=voxelmodel,
+                extensions=extensions,
+                )
+
         # plot solids
         for solid in self.cs.solids:
             self.plot_solid(ax,
@@ -493,6 +708,14 @@ class CrossSectionPlot(object):
         return bxa
 
     def to_image(self, imagefile, **save_kwargs):
+        # image format from keyword (file object) or file suffix
+        imageformat = (
+            save_kwargs.get('format') or Path(str(imagefile)).suffix.lstrip('.')
+            ).lower()
+
+        # vector output with rasterized dense layers
+        self.vector = '.' + imageformat in self.vector_formats
+
         # figure
         figsize = self.cfg.get('figure_size')
         fig, ax = plt.subplots(figsize=figsize)
@@ -500,17 +723,163 @@ class CrossSectionPlot(object):
         # plot cross-section
         bxa = self.plot(fig, ax)
 
+        # save figure (not through pyplot, which redraws the canvas after
+        # saving)
+        rc = self.vector_rc if self.vector else {}
+        with plt.rc_context(rc):
+            if self.draft:
+                # fixed layout instead of tight bounding box, fast compression
+                fig.subplots_adjust(**self.cfg.get('draft_layout') or {})
+                if imageformat == 'png':
+                    save_kwargs.setdefault('pil_kwargs', {'compress_level': 1})
+                fig.savefig(imagefile,
+                    dpi=self.dpi,
+                    **save_kwargs,
+                    )
+            else:
+                fig.savefig(imagefile,
+                    bbox_inches='tight',
+                    bbox_extra_artists=bxa,
+                    dpi=self.dpi,
+                    **save_kwargs,
+                    )
+
+        # clos figure
+        plt.close(fig)
+
+
+class MapPlot(object):
+    '''Overview map of borehole locations, cross-section lines and buffers'''
+    def __init__(self, cross_sections, boreholes, styles, config,
+        title=None,
+        ):
+        self.css = cross_sections
+        self.boreholes = boreholes
+        self.styles = styles
+        self.cfg = config
+        self.title = title
+
+    def __repr__(self):
+        return ('{s.__class__.__name__:}(cross_sections={n:d}, '
+                'styles={s.styles:})').format(s=self, n=len(self.css))
+
+    def locations_by_format(self):
+        '''borehole coordinates as (n, 2) array by format'''
+        coords = OrderedDict()
+        for borehole in self.boreholes:
+            if (borehole.x is None) or (borehole.y is None):
+                continue
+            coords.setdefault(borehole.format, []).append(
+                (borehole.x, borehole.y))
+        return OrderedDict(
+            (f, np.array(xy, dtype=float)) for f, xy in sorted(
+                coords.items(), key=lambda i: str(i[0]))
+            )
+
+    def plot_locations(self, ax, locations):
+        '''plot locations as one scatter collection per format'''
+        for format_, xy in locations.items():
+            lookup = self.styles['locations']
+            style = dict(lookup.lookup(format_))
+            if format_ not in lookup.records:
+                style['label'] = format_
+            style['label'] = '{label:} ({n:d})'.format(
+                label=style['label'], n=len(xy))
+            ax.scatter(xy[:, 0], xy[:, 1], **style)
+
+    def plot_density(self, fig, ax, locations):
+        '''plot location count per hexagonal bin'''
+        xy = np.concatenate(list(locations.values()))
+        hb = ax.hexbin(xy[:, 0], xy[:, 1],
+            gridsize=self.cfg.get('density_gridsize', 100),
+            mincnt=1,
+            **self.cfg.get('density_style') or {},
+            )
+        cb = fig.colorbar(hb, ax=ax, shrink=0.5)
+        cb.set_label(self.cfg.get('density_label', 'count'))
+
+    def plot_buffers(self, ax):
+        '''plot buffers of cross-section lines as one collection'''
+        polygons = []
+        for cs in self.css:
+            buffers = getattr(cs.buffer, 'geoms', [cs.buffer])
+            for buffer in buffers:
+                if not buffer.is_empty:
+                    polygons.append(np.array(buffer.exterior.coords))
+        facecolor, edgecolor, linewidth = CrossSectionPlot.patch_style(
+            self.cfg.get('buffer_style') or {})
+        ax.add_collection(PolyCollection(polygons,
+            facecolors=facecolor,
+            edgecolors=edgecolor,
+            linewidths=linewidth,
+            zorder=2,
+            ))
+
+    def plot_lines(self, ax):
+        '''plot cross-section lines as one collection, label at start'''
+        lines = [np.array(cs.shape.coords) for cs in self.css]
+        ax.add_collection(LineCollection(lines,
+            zorder=3,
+            **self.cfg.get('line_style') or {},
+            ))
+        for cs, line in zip(self.css, lines):
+            if cs.label is None:
+                continue
+            ax.text(line[0, 0], line[0, 1], cs.label,
+                zorder=4,
+                **self.cfg.get('linelabel_style') or {},
+                )
+
+    def plot(self, fig, ax):
+        # cross-section buffers and lines
+        self.plot_buffers(ax)
+        self.plot_lines(ax)
+
+        # borehole locations, binned by density if many
+        locations = self.locations_by_format()
+        count = sum(len(xy) for xy in locations.values())
+        if count > self.cfg.get('density_threshold', 10000):
+            self.plot_density(fig, ax, locations)
+        elif count > 0:
+            self.plot_locations(ax, locations)
+
+        # title
+        if self.title is not None:
+            ax.set_title(self.title)
+
+        # axis limits and aspect
+        ax.autoscale_view()
+        ax.set_aspect('equal')
+        ax.grid(linestyle='--', linewidth=0.5, color='black', alpha=0.5,
+            zorder=0)
+
+        # legend
+        handles, labels = ax.get_legend_handles_labels()
+        if handles:
+            return [ax.legend(handles, labels,
+                loc='upper left',
+                bbox_to_anchor=(1.01, 1),
+                fontsize=self.cfg.get('legend_fontsize', 10.),
+                title=self.cfg.get('legend_title'),
+                markerscale=self.cfg.get('legend_markerscale', 2.),
+                )]
+        return []
+
+    def to_image(self, imagefile, **save_kwargs):
+        # figure
+        figsize = self.cfg.get('figure_size')
+        fig, ax = plt.subplots(figsize=figsize)
+
+        # plot map
+        bxa = self.plot(fig, ax)
+
         # save figure
-        plt.savefig(imagefile,
+        fig.savefig(imagefile,
             bbox_inches='tight',
             bbox_extra_artists=bxa,
             dpi=self.cfg.get('figure_dpi', 200),
             **save_kwargs,
             )
 
-        # clos figure
-        plt.close()
-
-
-def MapPlot(object):
-    pass
+        # close figure
+        plt.close(fig)
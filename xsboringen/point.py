@@ -32,8 +32,6 @@ class Point(AsDictMixin, CopyMixin):
         self.base = base
 
         self.values = [self.Value(**v) for v in values or []]
-        
-        self.dist_dir = []
 
     def __repr__(self):
         return ('{s.__class__.__name__:}(code={s.code:})').format(
@@ -73,7 +71,6 @@ class PointsOfInterest():
     def __init__(self, poi_shape, label, ylim):
         self.poi_shape = poi_shape  
         self.label = label
-        self.dist_dir = ()
         self.ylim = ylim
         
     @property
@@ -0,0 +1,468 @@
+# -*- coding: utf-8 -*-
+# Tom van Steijn, Royal HaskoningDHV
+# Erik van Onselen, Deltares
+
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+import tracemalloc
+import logging
+import csv
+import json
+import time
+import sys
+import os
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+log = logging.getLogger(os.path.basename(__file__))
+
+# active profiler, None if profiling is off
+_profiler = None
+
+# active ingest log, None if not tracking files
+_ingest = None
+
+MB = 1024. * 1024.
+
+
+def rss():
+    '''current and peak resident set size of process in bytes, None if
+    unknown'''
+    current, peak = None, None
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        current = info.rss
+        peak = getattr(info, 'peak_wset', None)
+    elif os.path.exists('/proc/self/statm'):
+        with open('/proc/self/statm') as f:
+            current = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    if (peak is None) and (resource is not None):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform != 'darwin':
+            peak *= 1024  # kilobytes
+    return current, peak
+
+
+class StageTiming(object):
+    '''Calls, wall and CPU time of a stage, total and exclusive of nested
+    stages'''
+    fieldnames = ('calls', 'wall', 'cpu', 'self_wall', 'self_cpu')
+    memory_fieldnames = ('memory', 'memory_peak', 'rss', 'rss_peak')
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.wall = 0.
+        self.cpu = 0.
+        self.self_wall = 0.
+        self.self_cpu = 0.
+
+        # traced memory and process RSS at end of stage, peak during stage
+        self.memory = None
+        self.memory_peak = None
+        self.rss = None
+        self.rss_peak = None
+
+        # largest allocation sites at end of stage as (site, size, count)
+        self.allocations = None
+
+    def __repr__(self):
+        return ('{s.__class__.__name__:}(name={s.name:}, calls={s.calls:d}, '
+            'wall={s.wall:.3f})').format(s=self)
+
+    def as_dict(self):
+        d = {'name': self.name}
+        d.update((f, getattr(self, f)) for f in self.fieldnames)
+        if self.memory is not None:
+            d.update((f, getattr(self, f)) for f in self.memory_fieldnames)
+        if self.allocations is not None:
+            d['allocations'] = [
+                {'site': site, 'size': size, 'count': count}
+                for site, size, count in self.allocations
+                ]
+        return d
+
+    def update_memory(self, memory, memory_peak, rss, rss_peak):
+        self.memory = memory
+        self.memory_peak = max(self.memory_peak or 0, memory_peak)
+        self.rss = rss
+        if rss_peak is not None:
+            self.rss_peak = max(self.rss_peak or 0, rss_peak)
+
+
+class Profiler(object):
+    '''Wall and CPU time per pipeline stage, optionally traced memory and
+    process RSS'''
+    def __init__(self):
+        self.stages = OrderedDict()
+
+        # open stages as [name, wall, cpu, nested wall, nested cpu, peak]
+        self.stack = []
+
+        # memory tracing, see trace_memory
+        self.memory = False
+        self.allocations = 0
+        self.snapshot_memory = 0
+
+        self.started = time.perf_counter(), time.process_time()
+
+    def __repr__(self):
+        return ('{s.__class__.__name__:}(stages={n:d})').format(
+            s=self,
+            n=len(self.stages),
+            )
+
+    def trace_memory(self, allocations=10):
+        '''trace memory from now on and keep largest allocation sites at
+        end of outer stages that reach a new high'''
+        self.memory = True
+        self.allocations = allocations
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def traced_peak(self):
+        '''traced memory peak since last call, update enclosing stage'''
+        _, peak = tracemalloc.get_traced_memory()
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        if self.stack:
+            self.stack[-1][5] = max(self.stack[-1][5], peak)
+        return peak
+
+    def start(self, name):
+        if self.memory:
+            self.traced_peak()
+        self.stack.append(
+            [name, time.perf_counter(), time.process_time(), 0., 0., 0]
+            )
+
+    def stop(self):
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        if self.memory:
+            self.traced_peak()
+        name, started_wall, started_cpu, nested_wall, nested_cpu, peak = (
+            self.stack.pop())
+        wall -= started_wall
+        cpu -= started_cpu
+        timing = self.stages.get(name)
+        if timing is None:
+            timing = self.stages[name] = StageTiming(name)
+        timing.calls += 1
+        timing.wall += wall
+        timing.cpu += cpu
+        timing.self_wall += wall - nested_wall
+        timing.self_cpu += cpu - nested_cpu
+
+        # exclude from self time of enclosing stage
+        if self.stack:
+            self.stack[-1][3] += wall
+            self.stack[-1][4] += cpu
+
+        if self.memory:
+            self.record_memory(timing, peak)
+
+    def record_memory(self, timing, peak):
+        '''record memory at end of stage, peak included in enclosing stage'''
+        current, _ = tracemalloc.get_traced_memory()
+        timing.update_memory(current, peak, *rss())
+        if self.stack:
+            self.stack[-1][5] = max(self.stack[-1][5], peak)
+        elif self.allocations and (current > self.snapshot_memory * 1.1):
+            # largest allocation sites still held at end of outer stage,
+            # only at a new high to limit snapshot overhead
+            self.snapshot_memory = current
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+                ])
+            timing.allocations = [
+                (str(s.traceback), s.size, s.count)
+                for s in snapshot.statistics('lineno')[:self.allocations]
+                ]
+
+    @contextmanager
+    def stage(self, name):
+        self.start(name)
+        try:
+            yield
+        finally:
+            self.stop()
+
+    def iterate(self, name, iterable):
+        '''time each step of (lazy) iterable as a call of stage'''
+        iterator = iter(iterable)
+        while True:
+            self.start(name)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.stop()
+            yield item
+
+    @property
+    def total(self):
+        wall, cpu = self.started
+        return time.perf_counter() - wall, time.process_time() - cpu
+
+    def close(self):
+        if self.memory:
+            tracemalloc.stop()
+
+    def as_dict(self):
+        wall, cpu = self.total
+        total = {'wall': wall, 'cpu': cpu}
+        if self.memory:
+            total['rss'], total['rss_peak'] = rss()
+        return {
+            'total': total,
+            'stages': [t.as_dict() for t in self.stages.values()],
+            }
+
+    def report(self):
+        '''summary table of stages'''
+        width = max([len(n) for n in self.stages] + [len('stage')])
+        columns = ['calls', 'wall [s]', 'self [s]', 'cpu [s]', 'self cpu']
+        if self.memory:
+            columns += ['mem [MB]', 'peak [MB]', 'rss [MB]', 'max rss']
+        fmt = '{:<{w:d}s}' + '  {:>9}' * len(columns)
+        lines = [fmt.format('stage', *columns, w=width)]
+        for t in self.stages.values():
+            values = [t.calls,
+                '{:.3f}'.format(t.wall), '{:.3f}'.format(t.self_wall),
+                '{:.3f}'.format(t.cpu), '{:.3f}'.format(t.self_cpu),
+                ]
+            if self.memory:
+                values += [self.megabytes(v) for v in
+                    (t.memory, t.memory_peak, t.rss, t.rss_peak)]
+            lines.append(fmt.format(t.name, *values, w=width))
+        wall, cpu = self.total
+        values = ['', '{:.3f}'.format(wall), '', '{:.3f}'.format(cpu), '']
+        if self.memory:
+            current, peak = rss()
+            values += ['', '', self.megabytes(current), self.megabytes(peak)]
+        lines.append(fmt.format('total', *values, w=width))
+        return '\n'.join(lines)
+
+    @staticmethod
+    def megabytes(value):
+        if value is None:
+            return ''
+        return '{:.1f}'.format(value / MB)
+
+    def save(self, jsonfile, **extra):
+        '''write report to JSON file'''
+        report = self.as_dict()
+        report.update(extra)
+        with open(jsonfile, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+def enable():
+    '''start profiling stages, return profiler'''
+    global _profiler
+    _profiler = Profiler()
+    return _profiler
+
+
+def disable():
+    '''stop profiling stages, return profiler'''
+    global _profiler
+    profiler, _profiler = _profiler, None
+    if profiler is not None:
+        profiler.close()
+    return profiler
+
+
+def stage(name):
+    '''context timing a stage, does nothing if profiling is off'''
+    if _profiler is None:
+        return nullcontext()
+    return _profiler.stage(name)
+
+
+def iterate(name, iterable):
+    '''time steps of iterable as stage, iterable as is if profiling is off'''
+    if _profiler is None:
+        return iterable
+    return _profiler.iterate(name, iterable)
+
+
+class FileStats(object):
+    '''Parse time, size, item count and problems of an input file'''
+    fieldnames = ('file', 'format', 'size', 'seconds', 'count', 'fallback',
+        'skipped')
+
+    def __init__(self, filepath, format_):
+        self.file = str(filepath)
+        self.format = format_
+        try:
+            self.size = os.path.getsize(filepath)
+        except OSError:
+            self.size = None
+        self.seconds = 0.
+        self.count = 0
+        self.fallback = None
+        self.skipped = None
+
+    def __repr__(self):
+        return ('{s.__class__.__name__:}(file={name:}, '
+            'seconds={s.seconds:.3f})').format(
+                s=self,
+                name=os.path.basename(self.file),
+                )
+
+    def as_dict(self):
+        return {f: getattr(self, f) for f in self.fieldnames}
+
+    def note(self, borehole=None, fallback=None, skipped=None):
+        if borehole is not None:
+            self.count += item_count(borehole)
+        if fallback is not None:
+            self.fallback = fallback
+        if skipped is not None:
+            self.skipped = skipped
+
+
+def item_count(borehole):
+    '''number of segments and vertical rows of borehole'''
+    try:
+        count = len(borehole.segments)
+    except TypeError:
+        count = 0
+    verticals = getattr(borehole, 'verticals', None) or {}
+    return count + max((len(v.depth) for v in verticals.values()), default=0)
+
+
+class IngestLog(object):
+    '''Statistics of input files read in a run'''
+    def __init__(self):
+        self.files = []
+        self.current = None
+
+    def __repr__(self):
+        return ('{s.__class__.__name__:}(files={n:d})').format(
+            s=self,
+            n=len(self.files),
+            )
+
+    @contextmanager
+    def read_file(self, filepath, format_):
+        stats = FileStats(filepath, format_)
+        self.files.append(stats)
+        self.current = stats
+        started = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            stats.seconds += time.perf_counter() - started
+            self.current = None
+
+    def read_items(self, filepath, format_, items):
+        '''time reading each of items from file, count segments'''
+        stats = FileStats(filepath, format_)
+        self.files.append(stats)
+        iterator = iter(items)
+        while True:
+            self.current = stats
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                stats.seconds += time.perf_counter() - started
+                self.current = None
+            if item is not None:
+                stats.note(borehole=item)
+            yield item
+
+    def note(self, **kwargs):
+        if self.current is not None:
+            self.current.note(**kwargs)
+
+    def report_rows(self, top=20):
+        '''slowest and largest files, files with fallbacks and skipped files
+        as (category, rank, stats)'''
+        slowest = sorted(self.files, key=lambda f: f.seconds, reverse=True)
+        largest = sorted(self.files, key=lambda f: f.size or 0, reverse=True)
+        for rank, stats in enumerate(slowest[:top]):
+            yield 'slowest', rank + 1, stats
+        for rank, stats in enumerate(largest[:top]):
+            yield 'largest', rank + 1, stats
+        for stats in self.files:
+            if stats.fallback is not None:
+                yield 'fallback', None, stats
+        for stats in self.files:
+            if stats.skipped is not None:
+                yield 'skipped', None, stats
+
+    def to_csv(self, csvfile, top=20):
+        '''write top-N report of input files to CSV file'''
+        log.info('writing ingest report to {f:}'.format(
+            f=os.path.basename(csvfile)))
+        with open(csvfile, 'w', newline='') as f:
+            writer = csv.DictWriter(f,
+                fieldnames=('category', 'rank') + FileStats.fieldnames,
+                lineterminator='\n',
+                )
+            writer.writeheader()
+            for category, rank, stats in self.report_rows(top):
+                row = {'category': category, 'rank': rank}
+                row.update(stats.as_dict())
+                writer.writerow(row)
+
+    def summary(self):
+        '''one line summary of files read'''
+        return ('read {n:d} files, {size:.1f} MB in {seconds:.1f} s, '
+            '{fallback:d} with fallback, {skipped:d} skipped').format(
+                n=len(self.files),
+                size=sum(f.size or 0 for f in self.files) / MB,
+                seconds=sum(f.seconds for f in self.files),
+                fallback=sum(f.fallback is not None for f in self.files),
+                skipped=sum(f.skipped is not None for f in self.files),
+                )
+
+
+def track_files():
+    '''start recording input file statistics, return ingest log'''
+    global _ingest
+    _ingest = IngestLog()
+    return _ingest
+
+
+def untrack_files():
+    '''stop recording input file statistics, return ingest log'''
+    global _ingest
+    ingest, _ingest = _ingest, None
+    return ingest
+
+
+def read_file(filepath, format_):
+    '''context recording a single input file, does nothing if not tracking'''
+    if _ingest is None:
+        return nullcontext()
+    return _ingest.read_file(filepath, format_)
+
+
+def read_items(filepath, format_, items):
+    '''record reading items from input file, items as is if not tracking'''
+    if _ingest is None:
+        return items
+    return _ingest.read_items(filepath, format_, items)
+
+
+def note_file(**kwargs):
+    '''note borehole read, depth fallback or skip reason for current file'''
+    if _ingest is not None:
+        _ingest.note(**kwargs)
@@ -2,21 +2,26 @@
 # Tom van Steijn, Royal HaskoningDHV
 # Erik van Onselen, Deltares
 
-try:
-    import idfpy
-    idfpy_imported = True
-except ImportError:
-    idfpy_imported = False
+from xsboringen.idffiles import IDFFile
 
+from rasterio.windows import Window
+import rasterio
 import xarray as xr
 import numpy as np
 
+from collections import namedtuple, OrderedDict
 from functools import partial
 import logging
 import os
 
 log = logging.getLogger(os.path.basename(__file__))
 
+# data footprint and value range of a gridfile
+Summary = namedtuple('Summary', ['xmin', 'ymin', 'xmax', 'ymax', 'vmin', 'vmax'])
+
+# origin, cell size and shape of a gridfile
+Grid = namedtuple('Grid', ['xmin', 'ymax', 'dx', 'dy', 'nrow', 'ncol'])
+
 def sample_raster(rasterfile, coords):
     log.debug('reading rasterfile {}'.format(os.path.basename(rasterfile)))
     da = xr.open_rasterio(rasterfile).squeeze()
@@ -36,20 +41,202 @@ def sample_raster(rasterfile, coords):
 def sample_idf(idffile, coords):
     '''sample IDF file at coords'''
     log.debug('reading idf file {}'.format(os.path.basename(idffile)))
-    with idfpy.open(idffile) as src:
-        for value in src.sample(coords):
-            if value[0] == src.header['nodata']:
-                yield np.nan
-            elif np.isnan(value[0]) and any(np.isnan(src.header['nodata'])):
-                yield np.nan
-            else:
-                yield float(value[0])
+    with IDFFile(idffile) as src:
+        values = src.sample(coords).filled(np.nan)
+    for value in values:
+        yield value
 
 
 def sample(gridfile, coords):
     '''sample gridfile at coords'''
-    if idfpy_imported and gridfile.lower().endswith('.idf'):
+    if gridfile.lower().endswith('.idf'):
         sample = partial(sample_idf)
     else:
         sample = partial(sample_raster)
     return sample(gridfile, coords)
+
+
+def sample_raster_blocks(rasterfile, coordsets):
+    '''sample rasterfile at several sets of coords, reading each block once'''
+    log.debug('reading rasterfile {} by block'.format(
+        os.path.basename(rasterfile)))
+    coords = [np.asarray(c, dtype=float).reshape(-1, 2) for c in coordsets]
+    sizes = [len(c) for c in coords]
+    coords = np.concatenate(coords)
+    values = np.full(len(coords), np.nan)
+    with rasterio.open(rasterfile) as src:
+        blockheight, blockwidth = src.block_shapes[0]
+        nblockcols = -(-src.width // blockwidth)
+
+        # pixel row and column of every coordinate
+        cols, rows = ~src.transform * (coords[:, 0], coords[:, 1])
+        rows = np.floor(rows).astype(int)
+        cols = np.floor(cols).astype(int)
+        inside = (
+            (rows >= 0) & (rows < src.height) &
+            (cols >= 0) & (cols < src.width)
+            )
+
+        # sort coordinates by block and read blocks in file order
+        idx = np.flatnonzero(inside)
+        blockids = (
+            (rows[idx] // blockheight) * nblockcols +
+            (cols[idx] // blockwidth)
+            )
+        order = np.argsort(blockids, kind='stable')
+        idx, blockids = idx[order], blockids[order]
+        starts = np.flatnonzero(np.diff(blockids, prepend=-1) != 0)
+        ends = np.append(starts[1:], len(idx))
+        for start, end in zip(starts, ends):
+            blockrow, blockcol = divmod(int(blockids[start]), nblockcols)
+            row_off = blockrow * blockheight
+            col_off = blockcol * blockwidth
+            window = Window(col_off, row_off,
+                min(blockwidth, src.width - col_off),
+                min(blockheight, src.height - row_off),
+                )
+            block = src.read(1, window=window)
+            block_idx = idx[start:end]
+            values[block_idx] = block[
+                rows[block_idx] - row_off,
+                cols[block_idx] - col_off,
+                ]
+        nodata = src.nodata
+
+    # scatter values back to coordinate sets
+    if nodata is not None:
+        values[np.isclose(values, nodata)] = np.nan
+    return np.split(values, np.cumsum(sizes)[:-1])
+
+
+def sample_idf_sets(idffile, coordsets):
+    '''sample IDF file at several sets of coords'''
+    log.debug('reading idf file {}'.format(os.path.basename(idffile)))
+    coords = [np.asarray(c, dtype=float).reshape(-1, 2) for c in coordsets]
+    sizes = [len(c) for c in coords]
+    coords = np.concatenate(coords)
+    with IDFFile(idffile) as src:
+        values = src.sample(coords).filled(np.nan)
+    return np.split(values, np.cumsum(sizes)[:-1])
+
+
+def sample_many(gridfile, coordsets):
+    '''sample gridfile at several sets of coords in one pass'''
+    if gridfile.lower().endswith('.idf'):
+        sample_many = partial(sample_idf_sets)
+    else:
+        sample_many = partial(sample_raster_blocks)
+    return sample_many(gridfile, coordsets)
+
+
+def summarize_raster(rasterfile):
+    '''data footprint and value range of rasterfile, None if no data'''
+    log.debug('summarizing rasterfile {}'.format(os.path.basename(rasterfile)))
+    with rasterio.open(rasterfile) as src:
+        values = src.read(1, masked=True).astype(float)
+        valid = ~np.ma.getmaskarray(values) & np.isfinite(values.data)
+        if not valid.any():
+            return None
+        rows = np.flatnonzero(valid.any(axis=1))
+        cols = np.flatnonzero(valid.any(axis=0))
+        window = Window(cols[0], rows[0],
+            cols[-1] - cols[0] + 1,
+            rows[-1] - rows[0] + 1,
+            )
+        xmin, ymin, xmax, ymax = src.window_bounds(window)
+    data = values.data[valid]
+    return Summary(xmin, ymin, xmax, ymax, float(data.min()), float(data.max()))
+
+
+def summarize_idf(idffile):
+    '''data footprint and value range of IDF file, None if no data'''
+    log.debug('summarizing idf file {}'.format(os.path.basename(idffile)))
+    with IDFFile(idffile) as src:
+        values = np.asarray(src.grid, dtype=float)
+        valid = np.isfinite(values)
+        if not np.isnan(src.header.nodata):
+            valid &= ~np.isclose(values, src.header.nodata)
+        if not valid.any():
+            return None
+        rows = np.flatnonzero(valid.any(axis=1))
+        cols = np.flatnonzero(valid.any(axis=0))
+        xedges, yedges = src.edges
+    data = values[valid]
+    return Summary(
+        xedges[cols[0]], yedges[rows[-1] + 1],
+        xedges[cols[-1] + 1], yedges[rows[0]],
+        float(data.min()), float(data.max()),
+        )
+
+
+def summarize(gridfile):
+    '''data footprint and value range of gridfile, None if no data'''
+    if gridfile.lower().endswith('.idf'):
+        summarize = partial(summarize_idf)
+    else:
+        summarize = partial(summarize_raster)
+    return summarize(gridfile)
+
+
+def grid_raster(rasterfile):
+    '''origin, cell size and shape of rasterfile'''
+    with rasterio.open(rasterfile) as src:
+        transform = src.transform
+        return Grid(transform.c, transform.f, transform.a, -transform.e,
+            src.height, src.width,
+            )
+
+
+def grid_idf(idffile):
+    '''origin, cell size and shape of IDF file, smallest cell if not equidistant'''
+    header = IDFFile(idffile).header
+    dx, dy = np.min(header.dx), np.min(header.dy)
+    return Grid(header.xmin, header.ymax, float(dx), float(dy),
+        int(round((header.ymax - header.ymin) / dy)),
+        int(round((header.xmax - header.xmin) / dx)),
+        )
+
+
+def grid(gridfile):
+    '''origin, cell size and shape of gridfile'''
+    if gridfile.lower().endswith('.idf'):
+        grid = partial(grid_idf)
+    else:
+        grid = partial(grid_raster)
+    return grid(gridfile)
+
+
+def profile_key(coords):
+    '''hashable key for a sampled profile along coords'''
+    return tuple(coords)
+
+
+class BatchSampler(object):
+    '''Collect coords of many lines and sample each gridfile in one pass'''
+    def __init__(self):
+        self.requests = OrderedDict()
+        self.profiles = {}
+
+    def __repr__(self):
+        return ('{s.__class__.__name__:}(gridfiles={n:d})').format(
+            s=self,
+            n=len(self.requests),
+            )
+
+    def add(self, gridfile, coords):
+        '''add coords to be sampled from gridfile'''
+        coordsets = self.requests.setdefault(str(gridfile), OrderedDict())
+        coordsets[profile_key(coords)] = coords
+
+    def run(self):
+        '''sample all requested coords, one gridfile at a time'''
+        for gridfile, coordsets in self.requests.items():
+            keys = list(coordsets.keys())
+            values = sample_many(gridfile, [coordsets[k] for k in keys])
+            for key, profile in zip(keys, values):
+                self.profiles[gridfile, key] = profile
+        self.requests.clear()
+
+    def get(self, gridfile, coords):
+        '''get sampled profile for gridfile and coords'''
+        return self.profiles.get((str(gridfile), profile_key(coords)))
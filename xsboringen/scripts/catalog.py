@@ -0,0 +1,37 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# Tom van Steijn, Royal HaskoningDHV
+# Erik van Onselen, Deltares
+
+from xsboringen.calc import AdmixClassifier
+from xsboringen.catalog import Catalog
+from xsboringen import profiling
+
+from pathlib import Path
+import logging
+import os
+
+log = logging.getLogger(os.path.basename(__file__))
+
+
+def build_catalog(**kwargs):
+    # args
+    datasources = kwargs['datasources']
+    result = kwargs['result']
+    config = kwargs['config']
+
+    admixclassifier = AdmixClassifier(
+        config['admix_fieldnames']
+        )
+
+    # scan new and modified files of borehole datasources
+    catalogfile = Path(result['catalogfile'])
+    catalogfile.parent.mkdir(parents=True, exist_ok=True)
+    with Catalog(catalogfile) as catalog:
+        with profiling.stage('refresh catalog'):
+            counts = catalog.refresh(datasources.get('boreholes') or [],
+                admixclassifier=admixclassifier,
+                )
+        log.info(('scanned {c[scanned]:d} files, {c[unchanged]:d} unchanged, '
+            '{c[removed]:d} removed').format(c=counts))
+        log.info('saved {c:}'.format(c=catalog))
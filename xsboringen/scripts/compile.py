@@ -0,0 +1,48 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# Tom van Steijn, Royal HaskoningDHV
+# Erik van Onselen, Deltares
+
+from xsboringen.groundlayermodel import GroundLayerModel
+from xsboringen.layercube import compile_ground_layer_model
+
+from pathlib import Path
+import logging
+import os
+
+log = logging.getLogger(os.path.basename(__file__))
+
+
+def compile_regismodel(**kwargs):
+    # args
+    datasources = kwargs['datasources']
+    result = kwargs['result']
+    config = kwargs['config']
+
+    # optional args
+    tilesize = result.get('tilesize', 64)
+    bounds = result.get('bounds')
+
+    # read regis from index file
+    regismodel = datasources['regismodel']
+    regismodel = GroundLayerModel.from_folder(
+        folder=regismodel['folder'],
+        indexfile=regismodel['indexfile'],
+        fieldnames=regismodel['fieldnames'],
+        delimiter=regismodel.get('delimiter') or ',',
+        res=regismodel.get('res', 10.),
+        default=config['cross_section_plot']['regis_style'],
+        name='Regis',
+        )
+
+    # sort regis by layer number
+    regismodel.sort()
+
+    # compile all layers to a single cube file
+    cubefile = Path(result['cubefile'])
+    cubefile.parent.mkdir(parents=True, exist_ok=True)
+    cube = compile_ground_layer_model(regismodel, cubefile,
+        tilesize=tilesize,
+        bounds=bounds,
+        )
+    log.info('saved {c:}'.format(c=cube))
@@ -3,10 +3,12 @@
 # Tom van Steijn, Royal HaskoningDHV
 # Erik van Onselen, Deltares
 
-from xsboringen import plotting
+from xsboringen.cross_section import CrossSection
+from xsboringen.datasources import boreholes_from_sources
+from xsboringen.plotting import MapPlot
+from xsboringen.utils import input_or_default
 from xsboringen import shapefiles
-
-import yaml
+from xsboringen import styles
 
 from pathlib import Path
 import logging
@@ -22,9 +24,42 @@ def plot_map(**kwargs):
     result = kwargs['result']
     config = kwargs['config']
 
+    # optional args
+    buffer_distance = kwargs.get('buffer_distance', 0.)
+    title = kwargs.get('title')
+
+    # read boreholes and CPT's from data folders
+    borehole_sources = datasources.get('boreholes') or []
+    boreholes = boreholes_from_sources(borehole_sources)
+
+    # location styles lookup
+    locationstyles = styles.SimpleStylesLookup(
+        **input_or_default(config, ['styles', 'locations']))
+
+    # default labels
+    defaultlabels = iter(config['defaultlabels'])
+
+    # define cross-sections
     css = []
     for row in shapefiles.read(cross_section_lines['file']):
-        plt = plotting.MapPlot(
-
-            )
+        if cross_section_lines.get('labelfield') is not None:
+            label = row['properties'][cross_section_lines['labelfield']]
+        else:
+            label = next(defaultlabels)
+        css.append(CrossSection(
+            geometry=row['geometry'],
+            label=label,
+            buffer_distance=buffer_distance,
+            ))
 
+    # plot and save to image file
+    plt = MapPlot(
+        cross_sections=css,
+        boreholes=boreholes,
+        styles={'locations': locationstyles},
+        config=config['map_plot'],
+        title=title,
+        )
+    imagefile = Path(result['imagefile'])
+    log.info('saving {f.name:}'.format(f=imagefile))
+    plt.to_image(str(imagefile))
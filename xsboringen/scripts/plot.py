@@ -5,14 +5,19 @@
 
 from xsboringen import cross_section
 from xsboringen.calc import SandmedianClassifier, AdmixClassifier, LithologyClassifier
-from xsboringen.csvfiles import cross_section_to_csv
-from xsboringen.datasources import boreholes_from_sources, points_from_sources
+from xsboringen.csvfiles import cross_section_to_csv, write_cross_section_csv
+from xsboringen.datasources import boreholes_from_sources, points_from_sources, SourceFilter
 from xsboringen.point import PointsOfInterest
 from xsboringen.surface import Surface, RefPlane
 from xsboringen.solid import Solid
 from xsboringen.groundlayermodel import GroundLayerModel
+from xsboringen.manifest import BuildManifest, content_hash, file_identity
+from xsboringen.voxelmodel import VoxelModel
+from xsboringen.writer import BackgroundWriter
 from xsboringen.utils import input_or_default
 from xsboringen import plotting
+from xsboringen import profiling
+from xsboringen import rasterfiles
 from xsboringen import shapefiles
 from xsboringen import styles
 
@@ -20,13 +25,267 @@ import click
 import yaml
 
 from collections import ChainMap
+from functools import partial
 from pathlib import Path
+import multiprocessing as mp
 import logging
+import io
 import os
 
 log = logging.getLogger(os.path.basename(__file__))
 
 
+def sample_cross_sections(css, regismodel=None, ylim=None):
+    '''sample surfaces and solids of all cross-sections in one pass per raster'''
+    sampler = rasterfiles.BatchSampler()
+    surface_coords = []
+    solid_coords = []
+    for cs in css:
+        # surfaces
+        for surface in cs.surfaces:
+            _, coords = zip(*cs.discretize(surface.res))
+            sampler.add(surface.file, coords)
+            surface_coords.append((surface, coords))
+
+        # solids
+        for solid in cs.solids:
+            _, coords = zip(*cs.discretize(solid.res))
+            sampler.add(solid.topfile, coords)
+            sampler.add(solid.basefile, coords)
+            solid_coords.append((solid, coords))
+
+        # regis solids
+        if (regismodel is not None) and (regismodel.cube is not None):
+            # all layers from compiled cube in one read
+            _, coords = zip(*cs.discretize(regismodel.res))
+            regismodel.sample_profiles(coords)
+        elif regismodel is not None:
+            _, coords = zip(*cs.discretize(regismodel.res))
+            for number, solid in regismodel.solids:
+                if not regismodel.solid_may_have_values(
+                        solid, cs.shape.bounds, ylim):
+                    continue
+                sampler.add(solid.topfile, coords)
+                sampler.add(solid.basefile, coords)
+                solid_coords.append((solid, coords))
+
+    # read each raster once
+    log.info('sampling {s:}'.format(s=sampler))
+    sampler.run()
+
+    # scatter sampled profiles back to surfaces and solids
+    for surface, coords in surface_coords:
+        surface.add_profile(coords, sampler.get(surface.file, coords))
+    for solid, coords in solid_coords:
+        solid.add_profile(coords,
+            top=sampler.get(solid.topfile, coords),
+            base=sampler.get(solid.basefile, coords),
+            )
+
+
+def output_filenames(cs, config):
+    '''PNG and CSV filename of cross-section'''
+    if cs.title:
+        file_label = cs.title
+    else:
+        file_label = cs.label
+    imagefilename = config['image_filename_format'].format(label=file_label)
+    csvfilename = config['csv_filename_format'].format(label=file_label)
+    return imagefilename, csvfilename
+
+
+def section_hash(cs, label_option, regismodel=None, settings=None):
+    '''content hash of all inputs of a cross-section'''
+    # raster and model files by identity (path, size, modification time)
+    gridfiles = [s.file for s in cs.surfaces]
+    gridfiles += [f for s in cs.solids for f in (s.topfile, s.basefile)]
+    gridfiles += [v.file for v in cs.voxelmodels]
+    if regismodel is not None:
+        gridfiles += [
+            f for n, s in regismodel.solids for f in (s.topfile, s.basefile)
+            ]
+        if regismodel.indexfile is not None:
+            gridfiles.append(regismodel.indexfile)
+    gridfiles = sorted(set(str(f) for f in gridfiles))
+
+    # projected boreholes and points by code
+    by_code = lambda item: (str(item[1].code), item[0])
+    boreholes = [(b.code, d, b) for d, b in sorted(cs.boreholes, key=by_code)]
+    points = [(p.code, d, p) for d, p in sorted(cs.points, key=by_code)]
+    pois = [(d, p.label, p.ylim) for d, p in cs.pois]
+    refplanes = [
+        (r.name, r.value, r.stylekey,
+         r.tied_surface.name if r.tied_surface is not None else None)
+        for r in cs.refplanes
+        ]
+    return content_hash(
+        cs.shape.wkb,
+        cs.label, cs.title, label_option, cs.buffer_distance,
+        boreholes, points, pois, refplanes,
+        [file_identity(f) for f in gridfiles],
+        settings,
+        )
+
+
+def render_cross_section(cs, label_option, folder, config, result,
+        plotting_styles,
+        regismodel=None,
+        batch_sampling=False,
+        xtickstep=None,
+        ylim=None,
+        xlabel=None,
+        ylabel=None,
+        dist_txt=None,
+        metadata=None,
+        render_mode='publication',
+        writer=None,
+        ):
+    '''plot cross-section to PNG file and write CSV file, in background if
+    writer is given'''
+    # log message
+    log.info('plotting cross-section {label:}'.format(label=cs.label))
+
+    # add regis solids to cross-section
+    with profiling.stage('sample {label:}'.format(label=cs.label)):
+        solidstyles_with_regis = plotting_styles['solids'].copy(deep=True)
+        if regismodel is not None:
+            # get coordinates along cross-section line
+            _, coords = zip(*cs.discretize(regismodel.res))
+
+            # sample all layers at once if regis is a compiled cube
+            if not batch_sampling:
+                regismodel.sample_profiles(coords)
+
+            # add solids to cross-section
+            for number, solid in regismodel.solids:
+                if not regismodel.solid_may_have_values(
+                        solid, cs.shape.bounds, ylim):
+                    continue
+                if not regismodel.solid_has_values(solid, coords, ylim):
+                    continue
+                cs.add_solid(solid)
+                solidstyles_with_regis.add(
+                    key=solid.name,
+                    label=solid.name,
+                    record=regismodel.styles.get(solid.name) or {},
+                    )
+
+    # definest styles lookup
+    section_styles = dict(plotting_styles)
+    section_styles['solids'] = solidstyles_with_regis
+
+    # define plot
+    plt = plotting.CrossSectionPlot(
+        cross_section=cs,
+        config=config['cross_section_plot'],
+        styles=section_styles,
+        xtickstep=xtickstep,
+        ylim=ylim,
+        xlabel=xlabel,
+        ylabel=ylabel,
+        dist_txt=dist_txt,
+        label_option=label_option,
+        metadata=metadata,
+        legend_ncol=int(regismodel is not None) + 1,
+        render_mode=render_mode,
+        )
+
+    # plot and save to PNG file
+    imagefilename, csvfilename = output_filenames(cs, config)
+    imagefile = folder / imagefilename
+    csvfile = folder / csvfilename
+    extra_fields = result.get('extra_fields') or {}
+    extra_fields = {k: tuple(v) for k, v in extra_fields.items()}
+    if writer is not None:
+        # render to memory and write in background
+        buffer = io.BytesIO()
+        with profiling.stage('render {label:}'.format(label=cs.label)):
+            plt.to_image(buffer, format=imagefile.suffix.lstrip('.'))
+        writer.write(cs.label, imagefile, buffer.getvalue())
+
+        buffer = io.BytesIO()
+        with io.TextIOWrapper(buffer, write_through=True) as f:
+            with profiling.stage('write {label:}'.format(label=cs.label)):
+                write_cross_section_csv(cs, f, extra_fields=extra_fields)
+            writer.write(cs.label, csvfile, buffer.getvalue())
+    else:
+        log.info('saving {f.name:}'.format(f=imagefile))
+        with profiling.stage('render {label:}'.format(label=cs.label)):
+            plt.to_image(str(imagefile))
+
+        # save to CSV file
+        log.info('saving {f.name:}'.format(f=csvfile))
+        with profiling.stage('write {label:}'.format(label=cs.label)):
+            cross_section_to_csv(cs, str(csvfile),
+                extra_fields=extra_fields,
+                )
+
+    # release profiles sampled for this cross-section
+    cs.release_profiles()
+    if regismodel is not None:
+        regismodel.release(coords)
+
+
+# render function and sections, inherited by forked worker processes
+_rendering = None
+
+
+def _render_section(index):
+    render, sections = _rendering
+    cs, label_option = sections[index]
+    render(cs, label_option)
+    return index
+
+
+def render_sequential(render, sections):
+    '''render sections one by one, yield rendered cross-sections'''
+    for cs, label_option in sections:
+        render(cs, label_option)
+        yield cs
+
+
+def render_parallel(render, sections, processes):
+    '''render sections in forked worker processes, longest first, yield
+    rendered cross-sections'''
+    global _rendering
+    if 'fork' not in mp.get_all_start_methods():
+        log.warning('parallel rendering needs fork, rendering sequentially')
+        yield from render_sequential(render, sections)
+        return
+
+    # schedule longest sections first for load balancing
+    order = sorted(range(len(sections)),
+        key=lambda i: sections[i][0].length,
+        reverse=True,
+        )
+    log.info('rendering {n:d} cross-sections in {p:d} processes'.format(
+        n=len(sections), p=processes))
+    _rendering = render, sections
+    try:
+        with mp.get_context('fork').Pool(processes) as pool:
+            for index in pool.imap_unordered(_render_section, order):
+                cs, _ = sections[index]
+                log.debug('rendered cross-section {label:}'.format(
+                    label=cs.label))
+                yield cs
+    finally:
+        _rendering = None
+
+
+def section_prefilter(cross_section_lines, buffer_distance, **kwargs):
+    '''filter on buffers of selected cross-section lines, to skip boreholes
+    before their data is parsed, with SourceFilter keyword arguments'''
+    labelfield = cross_section_lines.get('labelfield')
+    selected = cross_section_lines.get('selected')
+    lines = []
+    for row in shapefiles.read(cross_section_lines['file']):
+        if ((selected is not None) and (labelfield is not None) and
+                (row['properties'][labelfield] not in selected)):
+            continue
+        lines.append(row['geometry'])
+    return SourceFilter.from_lines(lines, buffer_distance, **kwargs)
+
+
 def plot_cross_section(**kwargs):
     # args
     datasources = kwargs['datasources']
@@ -43,6 +302,15 @@ def plot_cross_section(**kwargs):
     xlabel = kwargs.get('xlabel')
     ylabel = kwargs.get('ylabel')
     metadata = kwargs.get('metadata')
+    batch_sampling = kwargs.get('batch_sampling', False)
+    processes = kwargs.get('processes', 1)
+    incremental = kwargs.get('incremental', False)
+    render_mode = kwargs.get('render_mode', 'publication')
+    background_writers = kwargs.get('background_writers', 2)
+    prefilter = kwargs.get('prefilter', True)
+    formats = kwargs.get('formats')
+    clip_depth = kwargs.get('clip_depth', False)
+    depth_window = kwargs.get('depth_window')
     
     # optional args for bearing/range labels
     if buffer_distance < 100:
@@ -63,7 +331,22 @@ def plot_cross_section(**kwargs):
         config['admix_fieldnames']
         )
     borehole_sources = datasources.get('boreholes') or []
-    boreholes = boreholes_from_sources(borehole_sources, admixclassifier)
+
+    # depth window of segments and samples to keep, explicit or from ylim
+    levels = ylim if (clip_depth and (depth_window is None)) else None
+    filter_kwargs = {'formats': formats, 'levels': levels,
+        'depths': depth_window}
+    if prefilter:
+        prefilter = section_prefilter(cross_section_lines, buffer_distance,
+            min_depth=min_depth,
+            **filter_kwargs
+            )
+    elif any(v is not None for v in filter_kwargs.values()):
+        prefilter = SourceFilter(**filter_kwargs)
+    else:
+        prefilter = None
+    boreholes = boreholes_from_sources(borehole_sources, admixclassifier,
+        prefilter=prefilter)
 
     # segment styles lookup
     segmentstyles = styles.SegmentStylesLookup(**input_or_default(config, ['styles', 'segments']))
@@ -80,34 +363,50 @@ def plot_cross_section(**kwargs):
     # solid styles lookup
     solidstyles = styles.SimpleStylesLookup(**input_or_default(config, ['styles', 'solids']))
 
+    # voxel styles lookup
+    voxelstyles = styles.SimpleStylesLookup(**input_or_default(config, ['styles', 'voxels']))
+
+    # styles lookups by element
+    plotting_styles = {
+        'segments': segmentstyles,
+        'verticals': verticalstyles,
+        'surfaces': surfacestyles,
+        'referenceplanes': referenceplanestyles,
+        'solids': solidstyles,
+        'voxels': voxelstyles,
+        }
+
     # translate CPT to lithology if needed
     if result.get('translate_cpt', False):
         ruletype = result.get('cpt_classifier') or 'isbt'
         table = config['cpt_classification']
         lithologyclassifier = LithologyClassifier(table, ruletype=ruletype)
-        boreholes = (
-            b.to_lithology(lithologyclassifier, admixclassifier)
+        boreholes = profiling.iterate('translate cpt', (
+            b.to_lithology(lithologyclassifier, admixclassifier,
+                window=prefilter.depth_window(b.z)
+                if prefilter is not None else None,
+                )
             for b in boreholes
-            )
+            ))
 
     # classify sandmedian if needed
     if result.get('classify_sandmedian', False):
         bins = config['sandmedianbins']
         sandmedianclassifier = SandmedianClassifier(bins)
-        boreholes = (
+        boreholes = profiling.iterate('classify sandmedian', (
             b.update_sandmedianclass(sandmedianclassifier) for b in boreholes
-            )
+            ))
 
     # simplify if needed
     if result.get('simplify'):
         min_thickness = result.get('min_thickness')
         by_legend = lambda s: {'record': segmentstyles.lookup(s)}
 
-        boreholes = (
+        boreholes = profiling.iterate('simplify', (
             b.simplified(min_thickness=min_thickness, by=by_legend) if b.format in result.get('simplify') 
             else b
             for b in boreholes
-            )
+            ))
 
     # read points
     point_sources = datasources.get('points') or []
@@ -122,32 +421,61 @@ def plot_cross_section(**kwargs):
     # solids
     solids = datasources.get('solids') or []
 
+    # voxel models
+    voxelmodels = [
+        VoxelModel(
+            name=v['name'],
+            voxelfile=v['file'],
+            variable=v['variable'],
+            res=v.get('res', 10.),
+            dims=v.get('dims'),
+            chunksize=v.get('chunksize', 100),
+            )
+        for v in datasources.get('voxelmodels') or []
+        ]
+
     # regis
     regismodel = datasources.get('regismodel')
     if regismodel is not None:
-        regismodel = GroundLayerModel.from_folder(
-            folder=regismodel['folder'],
-            indexfile=regismodel['indexfile'],
-            fieldnames=regismodel['fieldnames'],
-            delimiter=regismodel.get('delimiter') or ',',
-            res=regismodel.get('res', 10.),
-            default=config['cross_section_plot']['regis_style'],
-            name='Regis',
-            )
+        prune_layers = regismodel.get('prune_layers', True)
+        cubefile = regismodel.get('cubefile')
+        if cubefile is not None:
+            # precompiled cube, summaries included
+            regismodel = GroundLayerModel.from_cube(cubefile,
+                res=regismodel.get('res', 10.),
+                default=config['cross_section_plot']['regis_style'],
+                name='Regis',
+                )
+        else:
+            regismodel = GroundLayerModel.from_folder(
+                folder=regismodel['folder'],
+                indexfile=regismodel['indexfile'],
+                fieldnames=regismodel['fieldnames'],
+                delimiter=regismodel.get('delimiter') or ',',
+                res=regismodel.get('res', 10.),
+                default=config['cross_section_plot']['regis_style'],
+                name='Regis',
+                )
+
+            # summarize regis layers for pruning without reading pixels
+            if prune_layers:
+                with profiling.stage('summarize regis'):
+                    regismodel.summarize()
 
         # sort regis by layer number
         regismodel.sort()
 
     # filter missing coordinates and less than minimal depth
-    boreholes = [
-        b for b in boreholes
-        if
-        (b.x is not None) and
-        (b.y is not None) and
-        (b.z is not None) and
-        (b.depth is not None) and
-        (b.depth >= min_depth)
-        ]
+    with profiling.stage('collect boreholes'):
+        boreholes = [
+            b for b in boreholes
+            if
+            (b.x is not None) and
+            (b.y is not None) and
+            (b.z is not None) and
+            (b.depth is not None) and
+            (b.depth >= min_depth)
+            ]
 
     points = [
         p for p in points
@@ -178,7 +506,8 @@ def plot_cross_section(**kwargs):
     if selected is not None:
         selected = set(selected)
 
-    css = []
+    # define cross-sections
+    sections = []
     for row in shapefiles.read(cross_section_lines['file']):
         # get label
         if cross_section_lines.get('labelfield') is not None:
@@ -201,7 +530,7 @@ def plot_cross_section(**kwargs):
             label_option = config['defaultlabeloption']  
 
         # log message
-        log.info('cross-section {label:}'.format(label=label))
+        log.info('defining cross-section {label:}'.format(label=label))
 
         # define cross-section
         cs = cross_section.CrossSection(
@@ -214,15 +543,16 @@ def plot_cross_section(**kwargs):
             )
 
         # add boreholes to cross-section and optionally filter points too close to eachother
-        cs.add_boreholes(boreholes)
-        if result.get('min_borehole_dist') is not None:
-            cs.filter_close_boreholes(result.get('min_borehole_dist'))
+        with profiling.stage('project {label:}'.format(label=label)):
+            cs.add_boreholes(boreholes)
+            if result.get('min_borehole_dist') is not None:
+                cs.filter_close_boreholes(result.get('min_borehole_dist'))
 
-        # add points to cross_section
-        cs.add_points(points)
-        
-        # add points of interest
-        cs.add_pois(poi)
+            # add points to cross_section
+            cs.add_points(points)
+
+            # add points of interest
+            cs.add_pois(poi)
 
         # add surfaces to cross-section            
         for surface in surfaces:
@@ -259,79 +589,110 @@ def plot_cross_section(**kwargs):
                 stylekey=solid('style') or 'default',
                 ))
 
-        # add regis solids to cross-section
-        solidstyles_with_regis = solidstyles.copy(deep=True)
-        if regismodel is not None:
-            # get coordinates along cross-section line
-            _, coords = zip(*cs.discretize(regismodel.res))
+        # add voxel models to cross-section
+        for voxelmodel in voxelmodels:
+            cs.add_voxelmodel(voxelmodel)
 
-            # add solids to cross-section
-            for number, solid in regismodel.solids:
-                if not regismodel.solid_has_values(solid, coords, ylim):
-                    continue
-                cs.add_solid(solid)
-                solidstyles_with_regis.add(
-                    key=solid.name,
-                    label=solid.name,
-                    record=regismodel.styles.get(solid.name) or {},
-                    )
-
-        # definest styles lookup
-        plotting_styles = {
-            'segments': segmentstyles,
-            'verticals': verticalstyles,
-            'surfaces': surfacestyles,
-            'referenceplanes': referenceplanestyles,
-            'solids': solidstyles_with_regis,
+        # collect cross-sections
+        sections.append((cs, label_option))
+
+    # skip cross-sections with unchanged inputs and existing output
+    manifest = None
+    digests = {}
+    if incremental:
+        manifest = BuildManifest(folder / 'manifest.json')
+        settings = {
+            'cross_section_plot': config['cross_section_plot'],
+            'image_filename_format': config['image_filename_format'],
+            'csv_filename_format': config['csv_filename_format'],
+            'styles': {
+                k: (v.records, v.default) for k, v in plotting_styles.items()
+                },
+            'extra_fields': result.get('extra_fields'),
+            'plot': (xtickstep, ylim, xlabel, ylabel, dist_txt, metadata,
+                render_mode),
             }
-
-        # define plot
-        plt = plotting.CrossSectionPlot(
-            cross_section=cs,
-            config=config['cross_section_plot'],
-            styles=plotting_styles,
-            xtickstep=xtickstep,
-            ylim=ylim,
-            xlabel=xlabel,
-            ylabel=ylabel,
-            dist_txt=dist_txt,
-            label_option=label_option,
-            metadata=metadata,
-            legend_ncol=int(regismodel is not None) + 1,
+        to_render = []
+        for cs, label_option in sections:
+            imagefilename, _ = output_filenames(cs, config)
+            digest = section_hash(cs, label_option, regismodel, settings)
+            digests[imagefilename] = digest
+            if manifest.is_current(imagefilename, digest):
+                log.info('skipping unchanged cross-section {label:}'.format(
+                    label=cs.label))
+                continue
+            to_render.append((cs, label_option))
+    else:
+        to_render = sections
+
+    # sample rasters for all cross-sections at once if needed
+    if batch_sampling:
+        sample_cross_sections([cs for cs, _ in to_render], regismodel, ylim)
+
+    # render cross-sections to PNG and CSV
+    render = partial(render_cross_section,
+        folder=folder,
+        config=config,
+        result=result,
+        plotting_styles=plotting_styles,
+        regismodel=regismodel,
+        batch_sampling=batch_sampling,
+        xtickstep=xtickstep,
+        ylim=ylim,
+        xlabel=xlabel,
+        ylabel=ylabel,
+        dist_txt=dist_txt,
+        metadata=metadata,
+        render_mode=render_mode,
+        )
+    writer = None
+    if (processes > 1) and (len(to_render) > 1):
+        rendered = render_parallel(render, to_render, processes)
+    else:
+        # write files in background while rendering the next section
+        if background_writers > 0:
+            writer = BackgroundWriter(threads=background_writers)
+            render = partial(render, writer=writer)
+        rendered = render_sequential(render, to_render)
+    done = []
+    failed = set()
+    try:
+        with profiling.stage('render cross-sections'):
+            for cs in rendered:
+                done.append(cs)
+    finally:
+        if writer is not None:
+            writer.close()
+            failed = {label for label, _, _ in writer.errors}
+        if manifest is not None:
+            for cs in done:
+                if cs.label in failed:
+                    continue
+                outputs = output_filenames(cs, config)
+                manifest.update(outputs[0], digests[outputs[0]], outputs)
+            manifest.save()
+
+    # collect cross-sections
+    css = [cs for cs, _ in sections]
+
+    # close voxel models
+    for voxelmodel in voxelmodels:
+        voxelmodel.close()
+
+    with profiling.stage('export shapefiles'):
+        # export endpoints
+        endpointsfile = folder / 'endpoints.shp'
+        shapefiles.export_endpoints(str(endpointsfile), css,
+            **config['shapefile'],
             )
 
-        # plot and save to PNG file
-        if title:
-            file_label = title
-        else:
-            file_label = label        
-        
-        imagefilename = config['image_filename_format'].format(label=file_label)
-        imagefile = folder / imagefilename
-        log.info('saving {f.name:}'.format(f=imagefile))
-        plt.to_image(str(imagefile))
-
-        # save to CSV file
-        csvfilename = config['csv_filename_format'].format(label=file_label)
-        csvfile = folder / csvfilename
-        log.info('saving {f.name:}'.format(f=csvfile))
-        extra_fields = result.get('extra_fields') or {}
-        extra_fields = {k: tuple(v) for k, v in extra_fields.items()}
-        cross_section_to_csv(cs, str(csvfile),
-            extra_fields=extra_fields,
+        # export projection lines
+        projectionlinesfile = folder / 'projectionlines.shp'
+        shapefiles.export_projectionlines(str(projectionlinesfile), css,
+            **config['shapefile'],
             )
 
-        # collect cross-sections
-        css.append(cs)
-
-    # export endpoints
-    endpointsfile = folder / 'endpoints.shp'
-    shapefiles.export_endpoints(str(endpointsfile), css,
-        **config['shapefile'],
-        )
-
-    # export projection lines
-    projectionlinesfile = folder / 'projectionlines.shp'
-    shapefiles.export_projectionlines(str(projectionlinesfile), css,
-        **config['shapefile'],
-        )
+    # report sections with output that could not be written
+    if failed:
+        raise IOError('cannot write output of cross-sections: {labels:}'.format(
+            labels=', '.join(str(l) for l in sorted(failed, key=str))))
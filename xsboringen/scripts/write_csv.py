@@ -6,6 +6,8 @@
 from xsboringen.calc import SandmedianClassifier, AdmixClassifier, LithologyClassifier
 from xsboringen.csvfiles import boreholes_to_csv
 from xsboringen.datasources import boreholes_from_sources
+from xsboringen.store import boreholes_to_store
+from xsboringen import profiling
 
 import logging
 import os
@@ -32,18 +34,18 @@ def write_csv(**kwargs):
         ruletype = result.get('cpt_classifier') or 'isbt'
         table = config['cpt_classification']
         lithologyclassifier = LithologyClassifier(table, ruletype=ruletype)
-        boreholes = (
+        boreholes = profiling.iterate('translate cpt', (
             b.to_lithology(lithologyclassifier, admixclassifier)
             for b in boreholes
-            )
+            ))
 
     # classify sandmedian if needed
     if result.get('classify_sandmedian', False):
         bins = config['sandmedianbins']
         sandmedianclassifier = SandmedianClassifier(bins)
-        boreholes = (
+        boreholes = profiling.iterate('classify sandmedian', (
             b.update_sandmedianclass(sandmedianclassifier) for b in boreholes
-            )
+            ))
 
 
     # simplify if needed
@@ -53,11 +55,11 @@ def write_csv(**kwargs):
         if not isinstance(simplify_by, list):
             simplify_by = [simplify_by,]
         by = lambda s: {a: getattr(s, a) for a in simplify_by}
-        boreholes = (
+        boreholes = profiling.iterate('simplify', (
             b.simplified(min_thickness=min_thickness, by=by) if b.format in result.get('simplify') 
             else b
             for b in boreholes
-            )
+            ))
 
 
     # write output to csv
@@ -67,10 +69,13 @@ def write_csv(**kwargs):
     #     extra_fields=extra_fields,
     #     )
 
-    # write output to pickle
-    if result.get('save_pickle', False):
-        import pickle
-        #iets = [b for b in boreholes]
-        f = open(Path(result['csvfile']).parent.joinpath('boreholes.p'), 'wb')
-        pickle.dump([b for b in boreholes], f)
-
+    # write output to dataset store
+    save_pickle = result.get('save_pickle', False)
+    if save_pickle:
+        log.warning('save_pickle is replaced by save_store, '
+            'writing dataset store instead')
+    if result.get('save_store', False) or save_pickle:
+        storefolder = result.get('storefolder') or (
+            Path(result['csvfile']).parent / 'boreholes.xsb')
+        with profiling.stage('write store'):
+            boreholes_to_store(boreholes, storefolder)
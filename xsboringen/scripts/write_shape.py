@@ -4,6 +4,7 @@
 # Erik van Onselen, Deltares
 
 from xsboringen.datasources import boreholes_from_sources
+from xsboringen import profiling
 from xsboringen import shapefiles
 
 import logging
@@ -24,7 +25,8 @@ def write_shape(**kwargs):
 
     # write output to shapefile
     shape_fields=result.get('shape_fields') or []
-    shapefiles.boreholes_to_shape(boreholes, result['shapefile'],
-        fields=shape_fields,
-        **config['shapefile'],
-        )
+    with profiling.stage('write shapefile'):
+        shapefiles.boreholes_to_shape(boreholes, result['shapefile'],
+            fields=shape_fields,
+            **config['shapefile'],
+            )
@@ -2,24 +2,77 @@
 # Royal HaskoningDHV
 # Erik van Onselen, Deltares
 
-from xsboringen.scripts.write_csv import write_csv
-from xsboringen.scripts.write_shape import write_shape
-from xsboringen.scripts.plot import plot_cross_section
-
 import click
 import yaml
-from yaml.loader import SafeLoader
 
 from collections import ChainMap
+from importlib import import_module
 import logging
+import json
 import os
 
+# C loader if libyaml is available
+SafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
 log = logging.getLogger(os.path.basename(__file__))
 
+# subcommand functions by name, imported on dispatch only
+FUNCTIONS = {
+    'write_csv': ('xsboringen.scripts.write_csv', 'write_csv'),
+    'write_shape': ('xsboringen.scripts.write_shape', 'write_shape'),
+    'plot': ('xsboringen.scripts.plot', 'plot_cross_section'),
+    'map': ('xsboringen.scripts.map', 'plot_map'),
+    'compile': ('xsboringen.scripts.compile', 'compile_regismodel'),
+    'catalog': ('xsboringen.scripts.catalog', 'build_catalog'),
+    }
+
+
+def get_function(function):
+    '''import subcommand function with its dependencies'''
+    modulename, name = FUNCTIONS[function]
+    return getattr(import_module(modulename), name)
+
+
+def default_cachefile():
+    '''cache file for parsed default config in user cache folder'''
+    cachefolder = os.environ.get('XDG_CACHE_HOME') or os.path.join(
+        os.path.expanduser('~'), '.cache')
+    return os.path.join(cachefolder, 'xsboringen', 'defaultconfig.json')
+
+
+def read_defaultconfig(defaultconfigfile, cachefile=None):
+    '''read default config from JSON cache if current, else parse YAML and
+    update cache'''
+    stat = os.stat(defaultconfigfile)
+    source = [os.path.realpath(defaultconfigfile),
+        stat.st_size, stat.st_mtime_ns]
+    if cachefile is not None:
+        try:
+            with open(cachefile) as f:
+                cached = json.load(f)
+            if cached['source'] == source:
+                return cached['config']
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    with open(defaultconfigfile) as y:
+        defaultconfig = yaml.load(y, Loader=SafeLoader)
+
+    if cachefile is not None:
+        try:
+            os.makedirs(os.path.dirname(cachefile), exist_ok=True)
+            tmpfile = cachefile + '.tmp'
+            with open(tmpfile, 'w') as f:
+                json.dump({'source': source, 'config': defaultconfig}, f)
+            os.replace(tmpfile, cachefile)
+        except OSError as e:
+            log.debug('cannot cache default config: {e:}'.format(e=e))
+    return defaultconfig
+
 
 @click.command()
 @click.argument('function',
-    type=click.Choice(['write_csv', 'write_shape', 'plot']),
+    type=click.Choice(list(FUNCTIONS)),
     )
 @click.argument('inputfile',
     )
@@ -28,8 +81,37 @@ log = logging.getLogger(os.path.basename(__file__))
     default='info',
     help='log messages level'
     )
+@click.option('--profile', 'profile',
+    is_flag=True,
+    help='print wall and CPU time per stage'
+    )
+@click.option('--profile-report', 'profile_report',
+    type=click.Path(dir_okay=False, writable=True),
+    help='write stage times to JSON file (implies --profile)'
+    )
+@click.option('--profile-stats', 'profile_stats',
+    type=click.Path(dir_okay=False, writable=True),
+    help='write cProfile statistics to .prof file (implies --profile)'
+    )
+@click.option('--profile-memory', 'profile_memory',
+    is_flag=True,
+    help='trace memory and RSS per stage, slower (implies --profile)'
+    )
+@click.option('--ingest-report', 'ingest_report',
+    type=click.Path(dir_okay=False, writable=True),
+    help='write slowest, largest, fallback and skipped input files to CSV'
+    )
+@click.option('--ingest-top', 'ingest_top',
+    type=int,
+    default=20,
+    show_default=True,
+    help='number of slowest and largest input files in ingest report'
+    )
 
-def main(function, inputfile, level):
+def main(function, inputfile, level,
+        profile=False, profile_report=None, profile_stats=None,
+        profile_memory=False, ingest_report=None, ingest_top=20,
+        ):
     '''plot geological cross-sections'''
     logging.basicConfig(level=level.upper())
 
@@ -41,8 +123,9 @@ def main(function, inputfile, level):
     scripts_folder = os.path.dirname(os.path.realpath(__file__))
     defaultconfigfile = os.path.join(os.path.dirname(scripts_folder),
         'defaultconfig.yaml')
-    with open(defaultconfigfile) as y:
-        defaultconfig = yaml.load(y, Loader=SafeLoader)
+    defaultconfig = read_defaultconfig(defaultconfigfile,
+        cachefile=default_cachefile(),
+        )
 
     # get user config from input file
     userconfig = kwargs.get('config') or {}
@@ -51,13 +134,74 @@ def main(function, inputfile, level):
     # chain config
     kwargs['config'] = ChainMap(userconfig, defaultconfig)
 
+    # record input file statistics
+    ingest = None
+    if ingest_report is not None:
+        from xsboringen import profiling
+        ingest = profiling.track_files()
+
     # dispatch function
-    if function == 'write_csv':
-        write_csv(**kwargs)
-    elif function == 'write_shape':
-        write_shape(**kwargs)
-    elif function == 'plot':
-        plot_cross_section(**kwargs)
+    try:
+        dispatch(function, kwargs,
+            profile=profile,
+            profile_report=profile_report,
+            profile_stats=profile_stats,
+            profile_memory=profile_memory,
+            )
+    finally:
+        if ingest is not None:
+            profiling.untrack_files()
+            log.info(ingest.summary())
+            ingest.to_csv(ingest_report, top=ingest_top)
+
+
+def dispatch(function, kwargs,
+        profile=False, profile_report=None, profile_stats=None,
+        profile_memory=False,
+        ):
+    '''run function, profiled if any of the profile options is given'''
+    if profile or profile_report or profile_stats or profile_memory:
+        run_profiled(function, kwargs,
+            report=profile_report,
+            stats=profile_stats,
+            memory=profile_memory,
+            )
+    else:
+        get_function(function)(**kwargs)
+
+
+def run_profiled(function, kwargs, report=None, stats=None, memory=False):
+    '''run function with stage timing, optional memory tracing and cProfile
+    statistics'''
+    from xsboringen import profiling
+    profiler = profiling.enable()
+    cprofiler = None
+    if stats is not None:
+        import cProfile
+        cprofiler = cProfile.Profile()
+    try:
+        with profiling.stage('import'):
+            func = get_function(function)
+        if memory:
+            profiler.trace_memory()
+        if cprofiler is not None:
+            cprofiler.enable()
+        try:
+            func(**kwargs)
+        finally:
+            if cprofiler is not None:
+                cprofiler.disable()
+    finally:
+        profiling.disable()
+        click.echo(profiler.report(), err=True)
+        if report is not None:
+            log.info('writing profile report to {f:}'.format(
+                f=os.path.basename(report)))
+            profiler.save(report, function=function)
+        if cprofiler is not None:
+            log.info('writing profile statistics to {f:}'.format(
+                f=os.path.basename(stats)))
+            cprofiler.dump_stats(stats)
 
 if __name__ == '__main__':
     main(['plot', r'n:\Projects\11205000\11205128\B. Measurements and calculations\Pilot-SOS\xsb\boringen_to_csv_shape_plot_langs_final.yaml'])
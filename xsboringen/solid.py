@@ -3,7 +3,9 @@
 # Tom van Steijn, Royal HaskoningDHV
 # Erik van Onselen, Deltares
 
-from xsboringen.rasterfiles import sample
+from xsboringen.rasterfiles import sample, profile_key
+
+import numpy as np
 
 
 class Solid(object):
@@ -15,14 +17,42 @@ class Solid(object):
         self.res = res
         self.stylekey = stylekey
 
+        # sampled (top, base) profiles by coords
+        self.profiles = {}
+
     def __repr__(self):
         return ('{s.__class__.__name__:}(name={s.name:}, '
             'res={s.res:.2f})').format(s=self)
 
+    def add_profile(self, coords, top, base):
+        '''add top and base profiles sampled beforehand at coords'''
+        self.profiles[profile_key(coords)] = top, base
+
     def sample(self, coords):
-        sample_top_base = zip(
-            sample(str(self.topfile), coords),
-            sample(str(self.basefile), coords),
-            )
+        profile = self.profiles.get(profile_key(coords))
+        if profile is None:
+            profile = (
+                sample(str(self.topfile), coords),
+                sample(str(self.basefile), coords),
+                )
+        sample_top_base = zip(*profile)
         for top, base in sample_top_base:
             yield top, base
+
+    def sample_profile(self, coords):
+        '''sample top and base at coords once and keep profile for reuse'''
+        key = profile_key(coords)
+        if key not in self.profiles:
+            top, base = zip(*self.sample(coords))
+            self.profiles[key] = (
+                np.array(top, dtype=float),
+                np.array(base, dtype=float),
+                )
+        return self.profiles[key]
+
+    def release(self, coords=None):
+        '''release profile sampled at coords, or all profiles'''
+        if coords is None:
+            self.profiles.clear()
+        else:
+            self.profiles.pop(profile_key(coords), None)
@@ -0,0 +1,408 @@
+# -*- coding: utf-8 -*-
+# Tom van Steijn, Royal HaskoningDHV
+# Erik van Onselen, Deltares
+
+from xsboringen.borehole import Borehole, Segment, Vertical
+from xsboringen.cpt import CPT
+from xsboringen import profiling
+
+import numpy as np
+
+from pathlib import Path
+import logging
+import json
+import os
+
+log = logging.getLogger(os.path.basename(__file__))
+
+# store format version
+VERSION = 1
+
+# columns by table, strings as index in string table (-1 for None),
+# floats NaN for None, end index of child rows per parent row and bit flags
+# of optional attributes present
+COLUMNS = {
+    'boreholes': (
+        ('x', '<f8'), ('y', '<f8'), ('z', '<f8'), ('depth', '<f8'),
+        ('code', '<i4'), ('format', '<i4'), ('source', '<i4'),
+        ('timestamp', '<i4'), ('priority', '<i4'), ('cpt', '|u1'),
+        ('attrs', '<i4'), ('present', '|u1'),
+        ('segment_end', '<i8'), ('vertical_end', '<i8'),
+        ),
+    'segments': (
+        ('top', '<f8'), ('base', '<f8'),
+        ('lithology', '<i4'), ('sandmedianclass', '<i4'),
+        ('sandmedian', '<f8'), ('attrs', '<i4'), ('present', '|u1'),
+        ),
+    'verticals': (
+        ('name', '<i4'), ('sample_end', '<i8'),
+        ),
+    'samples': (
+        ('depth', '<f8'), ('value', '<f8'),
+        ),
+    }
+
+# attributes stored in columns, other attributes as JSON in attrs
+BOREHOLE_KEYS = {'code', 'depth', 'x', 'y', 'z', 'segments', 'verticals',
+    'source', 'format', 'priority', 'timestamp'}
+SEGMENT_KEYS = {'top', 'base', 'lithology', 'sandmedianclass', 'sandmedian'}
+
+# bit flags of optional attributes
+BOREHOLE_OPTIONAL = ('format', 'source', 'priority', 'timestamp')
+SEGMENT_OPTIONAL = ('sandmedian', )
+
+
+def boreholes_from_store(folder, priority=None, prefilter=None):
+    '''read boreholes and CPT's from dataset store folder, only those
+    accepted by optional prefilter'''
+    store = XSBStore(folder)
+    if prefilter is not None:
+        boreholes = prefilter.clip(
+            store.borehole(i) for i in store.select(prefilter))
+    else:
+        boreholes = iter(store)
+    boreholes = profiling.read_items(store.folder, store._format, boreholes)
+    for borehole in boreholes:
+        if priority is not None:
+            borehole.priority = priority
+        yield borehole
+
+
+def boreholes_to_store(boreholes, folder, flush_rows=100000):
+    '''write boreholes to dataset store folder, return number written'''
+    log.info('writing to {f:}'.format(f=os.path.basename(str(folder))))
+    with StoreWriter(folder, flush_rows=flush_rows) as writer:
+        for borehole in boreholes:
+            writer.write(borehole)
+    return writer.count
+
+
+def float_or_nan(value):
+    return np.nan if value is None else value
+
+
+def none_if_nan(value):
+    return None if value != value else value
+
+
+def present(obj, optional):
+    '''bit flags of optional attributes of object'''
+    return sum(1 << i for i, k in enumerate(optional) if hasattr(obj, k))
+
+
+def optional_attrs(flags, optional, **values):
+    '''values of optional attributes present in bit flags'''
+    return {k: values[k] for i, k in enumerate(optional) if flags & (1 << i)}
+
+
+def extra_attrs(obj, keys):
+    '''attributes of object not in keys, None if none'''
+    attrs = {k: v for k, v in obj.__dict__.items()
+        if (k not in keys) and not k.startswith('_')}
+    return attrs or None
+
+
+class StringTable(object):
+    '''Unique strings with index'''
+    def __init__(self, strings=None):
+        self.strings = list(strings or [])
+        self.index = {s: i for i, s in enumerate(self.strings)}
+
+    def __repr__(self):
+        return ('{s.__class__.__name__:}(strings={n:d})').format(
+            s=self,
+            n=len(self.strings),
+            )
+
+    def __len__(self):
+        return len(self.strings)
+
+    def add(self, value):
+        '''index of string, -1 for None'''
+        if value is None:
+            return -1
+        value = str(value)
+        i = self.index.get(value)
+        if i is None:
+            i = self.index[value] = len(self.strings)
+            self.strings.append(value)
+        return i
+
+    def add_json(self, value):
+        '''index of value as JSON string, -1 for None'''
+        if value is None:
+            return -1
+        return self.add(json.dumps(value, sort_keys=True, default=str))
+
+    def get(self, i):
+        if i < 0:
+            return None
+        return self.strings[i]
+
+    def get_json(self, i):
+        if i < 0:
+            return None
+        return json.loads(self.strings[i])
+
+
+class StoreWriter(object):
+    '''Stream boreholes to column files of dataset store folder, metadata
+    written on close'''
+    def __init__(self, folder, flush_rows=100000):
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.flush_rows = flush_rows
+
+        # invalidate existing store until closed
+        metafile = self.folder / 'meta.json'
+        if metafile.exists():
+            metafile.unlink()
+
+        self.strings = StringTable()
+        self.counts = {table: 0 for table in COLUMNS}
+        self.buffers = {table: {name: [] for name, _ in columns}
+            for table, columns in COLUMNS.items()}
+        self.files = {table: {
+                name: open(self.folder / column_filename(table, name), 'wb')
+                for name, _ in columns
+                }
+            for table, columns in COLUMNS.items()}
+        self.closed = False
+
+    def __repr__(self):
+        return ('{s.__class__.__name__:}(folder={s.folder.name:}, '
+            'count={s.count:d})').format(s=self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close(complete=(type is None))
+
+    @property
+    def count(self):
+        return self.counts['boreholes']
+
+    def append(self, table, **row):
+        buffers = self.buffers[table]
+        for name, value in row.items():
+            buffers[name].append(value)
+        self.counts[table] += 1
+
+    def write(self, borehole):
+        strings = self.strings
+        for segment in borehole.segments:
+            self.append('segments',
+                top=float_or_nan(segment.top),
+                base=float_or_nan(segment.base),
+                lithology=strings.add(segment.lithology),
+                sandmedianclass=strings.add(segment.sandmedianclass),
+                sandmedian=float_or_nan(getattr(segment, 'sandmedian', None)),
+                attrs=strings.add_json(extra_attrs(segment, SEGMENT_KEYS)),
+                present=present(segment, SEGMENT_OPTIONAL),
+                )
+        for name, vertical in borehole.verticals.items():
+            buffers = self.buffers['samples']
+            buffers['depth'].extend(float_or_nan(d) for d in vertical.depth)
+            buffers['value'].extend(float_or_nan(v) for v in vertical.values)
+            self.counts['samples'] += len(vertical.depth)
+            self.append('verticals',
+                name=strings.add(name),
+                sample_end=self.counts['samples'],
+                )
+        self.append('boreholes',
+            x=float_or_nan(borehole.x),
+            y=float_or_nan(borehole.y),
+            z=float_or_nan(borehole.z),
+            depth=float_or_nan(borehole.depth),
+            code=strings.add(borehole.code),
+            format=strings.add(getattr(borehole, 'format', None)),
+            source=strings.add(getattr(borehole, 'source', None)),
+            timestamp=strings.add(getattr(borehole, 'timestamp', None)),
+            priority=getattr(borehole, 'priority', None) or 0,
+            cpt=int(isinstance(borehole, CPT)),
+            attrs=strings.add_json(extra_attrs(borehole, BOREHOLE_KEYS)),
+            present=present(borehole, BOREHOLE_OPTIONAL),
+            segment_end=self.counts['segments'],
+            vertical_end=self.counts['verticals'],
+            )
+        if (len(self.buffers['samples']['depth']) +
+                len(self.buffers['segments']['top'])) >= self.flush_rows:
+            self.flush()
+
+    def flush(self):
+        for table, columns in COLUMNS.items():
+            for name, dtype in columns:
+                values = self.buffers[table][name]
+                if values:
+                    np.asarray(values, dtype=dtype).tofile(
+                        self.files[table][name])
+                    del values[:]
+
+    def close(self, complete=True):
+        '''flush and close column files, write string table and metadata if
+        complete'''
+        if self.closed:
+            return
+        self.closed = True
+        if complete:
+            self.flush()
+        for files in self.files.values():
+            for f in files.values():
+                f.close()
+        if not complete:
+            return
+        with open(self.folder / 'strings.json', 'w') as f:
+            json.dump(self.strings.strings, f)
+        meta = {
+            'version': VERSION,
+            'counts': self.counts,
+            'columns': {t: [list(c) for c in cs] for t, cs in COLUMNS.items()},
+            }
+        metafile = self.folder / 'meta.json'
+        tmpfile = self.folder / 'meta.json.tmp'
+        with open(tmpfile, 'w') as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmpfile, metafile)
+
+
+def column_filename(table, name):
+    return '{table:}.{name:}.bin'.format(table=table, name=name)
+
+
+class XSBStore(object):
+    '''Dataset store with memory-mapped columns of boreholes, segments,
+    verticals and samples'''
+    _format = 'XSB store'
+
+    def __init__(self, folder):
+        self.folder = Path(folder)
+        try:
+            with open(self.folder / 'meta.json') as f:
+                self.meta = json.load(f)
+        except (OSError, ValueError):
+            raise ValueError(
+                'not a valid XSB store: \'{f:}\''.format(f=self.folder))
+        if self.meta.get('version') != VERSION:
+            raise ValueError('unsupported XSB store version {v:}'.format(
+                v=self.meta.get('version')))
+        with open(self.folder / 'strings.json') as f:
+            self.strings = StringTable(json.load(f))
+        self._columns = {}
+
+    def __repr__(self):
+        return ('{s.__class__.__name__:}(folder={s.folder.name:}, '
+            'boreholes={n:d})').format(s=self, n=len(self))
+
+    def __len__(self):
+        return self.meta['counts']['boreholes']
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.borehole(i)
+
+    def __getitem__(self, i):
+        if not (-len(self) <= i < len(self)):
+            raise IndexError('borehole index out of range')
+        return self.borehole(i % len(self))
+
+    def column(self, table, name):
+        '''column as read-only memory-mapped array'''
+        key = table, name
+        if key not in self._columns:
+            dtype = np.dtype(dict(self.meta['columns'][table])[name])
+            count = self.meta['counts'][table]
+            if count == 0:
+                self._columns[key] = np.empty(0, dtype=dtype)
+            else:
+                self._columns[key] = np.memmap(
+                    self.folder / column_filename(table, name),
+                    dtype=dtype, mode='r', shape=(count,),
+                    )
+        return self._columns[key]
+
+    def columns(self, table):
+        '''all columns of table as dict of memory-mapped arrays'''
+        return {name: self.column(table, name)
+            for name, _ in self.meta['columns'][table]}
+
+    def select(self, prefilter):
+        '''indices of boreholes accepted by prefilter, from location, depth
+        and format columns only'''
+        x = self.column('boreholes', 'x').tolist()
+        y = self.column('boreholes', 'y').tolist()
+        depth = self.column('boreholes', 'depth').tolist()
+        formats = self.column('boreholes', 'format').tolist()
+        for i, row in enumerate(zip(x, y, depth, formats)):
+            if not prefilter.accepts(*(none_if_nan(v) for v in row[:3])):
+                continue
+            if not prefilter.accepts_format(self.strings.get(row[3])):
+                continue
+            yield i
+
+    @staticmethod
+    def span(ends, i):
+        '''start and end index of child rows of row i'''
+        start = int(ends[i - 1]) if i > 0 else 0
+        return start, int(ends[i])
+
+    def segments(self, start, end):
+        strings = self.strings
+        top = self.column('segments', 'top')[start:end].tolist()
+        base = self.column('segments', 'base')[start:end].tolist()
+        lithology = self.column('segments', 'lithology')[start:end].tolist()
+        sandmedianclass = self.column('segments',
+            'sandmedianclass')[start:end].tolist()
+        sandmedian = self.column('segments', 'sandmedian')[start:end].tolist()
+        attrs = self.column('segments', 'attrs')[start:end].tolist()
+        flags = self.column('segments', 'present')[start:end].tolist()
+        for row in zip(top, base, lithology, sandmedianclass, sandmedian,
+                attrs, flags):
+            extra = optional_attrs(row[6], SEGMENT_OPTIONAL,
+                sandmedian=none_if_nan(row[4]),
+                )
+            extra.update(strings.get_json(row[5]) or {})
+            yield Segment(
+                none_if_nan(row[0]), none_if_nan(row[1]),
+                strings.get(row[2]), strings.get(row[3]),
+                **extra
+                )
+
+    def verticals(self, start, end):
+        verticals = {}
+        names = self.column('verticals', 'name')
+        ends = self.column('verticals', 'sample_end')
+        depth = self.column('samples', 'depth')
+        value = self.column('samples', 'value')
+        for i in range(start, end):
+            first, last = self.span(ends, i)
+            name = self.strings.get(int(names[i]))
+            verticals[name] = Vertical(name,
+                [none_if_nan(d) for d in depth[first:last].tolist()],
+                [none_if_nan(v) for v in value[first:last].tolist()],
+                )
+        return verticals
+
+    def borehole(self, i):
+        '''borehole or CPT at index i'''
+        strings = self.strings
+        column = lambda name: self.column('boreholes', name)[i].item()
+        cls = CPT if column('cpt') else Borehole
+        attrs = optional_attrs(column('present'), BOREHOLE_OPTIONAL,
+            format=strings.get(column('format')),
+            source=strings.get(column('source')),
+            priority=column('priority'),
+            timestamp=strings.get(column('timestamp')),
+            )
+        attrs.update(strings.get_json(column('attrs')) or {})
+        return cls(strings.get(column('code')),
+            none_if_nan(column('depth')),
+            x=none_if_nan(column('x')),
+            y=none_if_nan(column('y')),
+            z=none_if_nan(column('z')),
+            segments=list(self.segments(
+                *self.span(self.column('boreholes', 'segment_end'), i))),
+            verticals=self.verticals(
+                *self.span(self.column('boreholes', 'vertical_end'), i)),
+            **attrs
+            )
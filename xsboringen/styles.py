@@ -60,6 +60,13 @@ class SegmentStylesLookup(object):
         self.default = default or {}
         self.default['label'] = self.default.get('label') or 'item_default'
 
+        # sort records once, most specific key first
+        self.records = sorted(self.records, key=self.sortkey)
+
+        # memoized lookups by segment attribute values
+        self.lookup_attrs = tuple(sorted(self.attrs))
+        self.memo = {}
+
     def __repr__(self):
         return ('{s.__class__.__name__:}(attrs={s.attrs:}), '
             ).format(s=self)
@@ -77,8 +84,19 @@ class SegmentStylesLookup(object):
         key, record = item
         return -len(key)
 
-    def lookup(self, segment):
-        for key, record in sorted(self.records, key=self.sortkey):
+    def match(self, segment):
+        for key, record in self.records:
             if all(getattr(segment, k, None) in v for k, v in key.items()):
                 return record
         return self.default
+
+    def lookup(self, segment):
+        values = tuple(getattr(segment, a, None) for a in self.lookup_attrs)
+        try:
+            return self.memo[values]
+        except KeyError:
+            record = self.memo[values] = self.match(segment)
+            return record
+        except TypeError:
+            # unhashable attribute value
+            return self.match(segment)
@@ -3,7 +3,7 @@
 # Tom van Steijn, Royal HaskoningDHV
 # Erik van Onselen, Deltares
 
-from xsboringen.rasterfiles import sample
+from xsboringen.rasterfiles import sample, profile_key
 
 
 class Surface(object):
@@ -14,14 +14,31 @@ class Surface(object):
         self.res = res
         self.stylekey = stylekey
 
+        # sampled profiles by coords
+        self.profiles = {}
+
     def __repr__(self):
         return ('{s.__class__.__name__:}(name={s.name:}, '
             'res={s.res:.2f})').format(s=self)
 
+    def add_profile(self, coords, values):
+        '''add profile sampled beforehand at coords'''
+        self.profiles[profile_key(coords)] = values
+
     def sample(self, coords):
-        for value in sample(str(self.file), coords):
+        values = self.profiles.get(profile_key(coords))
+        if values is None:
+            values = sample(str(self.file), coords)
+        for value in values:
             yield value
 
+    def release(self, coords=None):
+        '''release profile sampled at coords, or all profiles'''
+        if coords is None:
+            self.profiles.clear()
+        else:
+            self.profiles.pop(profile_key(coords), None)
+
 class RefPlane(object):
     def __init__(self, name, value, tied_surface, stylekey=None):
         self.name = name
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# Tom van Steijn, Royal HaskoningDHV
+
+from xsboringen.benchmarks import synthetic, suite
+from xsboringen.csvfiles import boreholes_from_csv
+from xsboringen.geffiles import boreholes_from_gef, cpts_from_gef
+from xsboringen.xmlfiles import dino_boreholes_from_xml, bro_boreholes_from_xml
+
+from pathlib import Path
+
+
+def codes_and_depths(boreholes):
+    return sorted((b.code, round(b.depth, 2), len(b)) for b in boreholes)
+
+
+class TestSynthetic(object):
+    def test_readers(self, tmpdir):
+        folder = Path(str(tmpdir))
+        expected = codes_and_depths(synthetic.boreholes(3, layers=5))
+        synthetic.write_gef_boreholes(folder / 'gef', 3, layers=5)
+        synthetic.write_dino_xml(folder / 'dino', 3, layers=5)
+        synthetic.write_bro_xml(folder / 'bro', 3, layers=5)
+        synthetic.write_csv_boreholes(folder / 'csv' / 'b.csv', 3, layers=5)
+        assert codes_and_depths(boreholes_from_gef(folder / 'gef')) == expected
+        assert codes_and_depths(dino_boreholes_from_xml(folder / 'dino',
+            1.4, None, False, 0)) == expected
+        assert codes_and_depths(bro_boreholes_from_xml(folder / 'bro',
+            None, False, 0)) == expected
+        assert codes_and_depths(boreholes_from_csv(folder / 'csv',
+            fieldnames=synthetic.CSV_FIELDNAMES)) == expected
+
+    def test_cpts(self, tmpdir):
+        folder = Path(str(tmpdir))
+        synthetic.write_gef_cpts(folder, 2, rows=50, columns=5)
+        cpts = list(cpts_from_gef(folder, datacolumns={
+            'depth': 'gecorrigeerde diepte',
+            'cone_resistance': 'conusweerstand',
+            'friction_ratio': 'wrijvingsgetal',
+            }))
+        assert len(cpts) == 2
+        assert all(len(c.verticals['cone_resistance'].depth) == 50
+            for c in cpts)
+
+    def test_deterministic(self):
+        first = [(l.x, l.y, l.layers) for l in synthetic.locations(3, 4)]
+        second = [(l.x, l.y, l.layers) for l in synthetic.locations(3, 4)]
+        assert first == second
+
+
+class TestSuite(object):
+    def test_run_compare(self, tmpdir):
+        results = suite.run_suite(str(tmpdir), scale='tiny', repeat=1,
+            names=['simplify'])
+        assert list(results['results']) == ['simplify boreholes']
+        baseline = {'results': {'simplify boreholes': {'min':
+            results['results']['simplify boreholes']['min'] / 2.}}}
+        (row, ) = suite.compare(results, baseline, threshold=0.2)
+        assert row[-1]
+
+
+class TestPipeline(object):
+    def test_run_compare(self, tmpdir):
+        from xsboringen.benchmarks import pipeline
+        results = pipeline.run_suite(str(tmpdir), scale='tiny', repeat=1)
+        (result, ) = results['results'].values()
+        assert result['count'] == 2
+        assert {'read', 'project', 'sample', 'render'} <= set(
+            result['stages'])
+        assert (Path(str(tmpdir)) / 'case000' / 'out' /
+            'cross_section_S001.png').exists()
+        comparison = pipeline.compare(results, results)
+        assert len(comparison) == 1 + len(result['stages'])
+        assert not any(r[-1] for r in comparison)
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 # Tom van Steijn, Royal HaskoningDHV
 
-from xsboringen.borehole import Borehole, Segment
+from xsboringen.borehole import Borehole, Segment, Vertical
 
 import numpy as np
 
@@ -80,3 +80,18 @@ class TestBorehole(object):
         assert len(b) == 1
         assert b.segments[0].lithology == 'Z'
         assert np.isclose(b.segments[0].thickness, 20.)
+
+    def test_clip(self):
+        segments = [
+            Segment(top=0., base=0.5, lithology='Z'),
+            Segment(top=0.5, base=3.0, lithology='K'),
+            Segment(top=3.0, base=20., lithology='Z'),
+            ]
+        depth = [0.5, 1., 2., 3., 4., 5.]
+        vertical = Vertical('qc', depth, [1., 2., 3., 4., 5., 6.])
+        b = Borehole(code='b', depth=20., segments=segments,
+            verticals={'qc': vertical})
+        b.clip(1.5, 3.5)
+        assert [s.lithology for s in b.segments] == ['K', 'Z']
+        assert b.verticals['qc'].depth == [1., 2., 3., 4.]
+        assert np.isclose(b.verticals['qc'].rescaled().values[-1], 0.8)
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+# Tom van Steijn, Royal HaskoningDHV
+
+from xsboringen.benchmarks import synthetic
+from xsboringen.catalog import Catalog
+from xsboringen.datasources import boreholes_from_sources
+
+from shapely.geometry import LineString
+from pathlib import Path
+import os
+
+
+class TestCatalog(object):
+    def datasource(self, tmpdir):
+        folder = Path(str(tmpdir)) / 'gef'
+        synthetic.write_gef_boreholes(folder, 10, layers=3,
+            extent=(0., 0., 1000., 1000.))
+        return folder, {'format': 'GEF boringen', 'folder': str(folder)}
+
+    def test_refresh(self, tmpdir):
+        folder, datasource = self.datasource(tmpdir)
+        catalogfile = str(tmpdir.join('catalog.sqlite'))
+        with Catalog(catalogfile) as catalog:
+            counts = catalog.refresh([datasource])
+            assert counts['scanned'] == 10
+            assert len(catalog) == 10
+
+        # modify one, remove one file
+        geffiles = sorted(folder.glob('*.gef'))
+        with open(geffiles[0], 'a') as f:
+            f.write('\n')
+        os.remove(geffiles[1])
+        with Catalog(catalogfile) as catalog:
+            counts = catalog.refresh([datasource])
+            assert dict(counts) == {'scanned': 1, 'unchanged': 8,
+                'removed': 1}
+            assert len(catalog) == 9
+
+            # datasource no longer configured
+            counts = catalog.refresh([])
+            assert counts['removed'] == 9
+            assert len(catalog) == 0
+
+    def test_query(self, tmpdir):
+        folder, datasource = self.datasource(tmpdir)
+        catalogfile = str(tmpdir.join('catalog.sqlite'))
+        boreholes = list(synthetic.boreholes(10, layers=3,
+            extent=(0., 0., 1000., 1000.)))
+        with Catalog(catalogfile) as catalog:
+            catalog.refresh([datasource])
+            inside = {m.code for m in catalog.query(
+                bbox=(0., 0., 500., 500.), min_depth=2.)}
+            assert inside == {b.code for b in boreholes
+                if (b.x <= 500.) and (b.y <= 500.) and (b.depth >= 2.)}
+
+            line = LineString([(0., 500.), (1000., 500.)]).buffer(200.)
+            near = {m.code for m in catalog.query(geometry=line)}
+            assert near == {b.code for b in boreholes
+                if abs(b.y - 500.) <= 200.}
+
+            assert not list(catalog.query(formats=['GEF CPT']))
+            assert len(list(catalog.query(formats=['GEF boringen']))) == 10
+
+            # bbox edges at exact coordinates, within float32 rounding
+            for b in boreholes:
+                matches = {m.code for m in catalog.query(
+                    bbox=(b.x, b.y, b.x + 1000., b.y + 1000.))}
+                assert b.code in matches
+                matches = {m.code for m in catalog.query(
+                    bbox=(b.x + 0.01, b.y, b.x + 1000., b.y + 1000.))}
+                assert b.code not in matches
+
+    def test_datasource(self, tmpdir):
+        folder, datasource = self.datasource(tmpdir)
+        catalogfile = str(tmpdir.join('catalog.sqlite'))
+        with Catalog(catalogfile) as catalog:
+            catalog.refresh([datasource])
+        boreholes = list(boreholes_from_sources([{
+            'format': 'XSB catalog', 'file': catalogfile,
+            'bbox': [0., 0., 500., 1000.],
+            }]))
+        assert boreholes
+        assert all(b.x <= 500. for b in boreholes)
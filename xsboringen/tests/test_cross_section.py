@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+# Tom van Steijn, Royal HaskoningDHV
+
+from xsboringen.borehole import Borehole, Segment
+from xsboringen.cross_section import CrossSection
+from xsboringen.scripts.plot import section_hash
+
+import numpy as np
+
+WINDLABELS = ['NE', 'E', 'SE', 'S', 'SW', 'W', 'NW', 'N']
+WINDDIRS = [22.5, 67.5, 112.5, 157.5, 202.5, 247.5, 292.5, 337.5]
+
+
+class TestCrossSection(object):
+    def section(self, coordinates, label):
+        return CrossSection(
+            {'type': 'LineString', 'coordinates': coordinates},
+            buffer_distance=50., label=label,
+            windlabels=WINDLABELS, winddirs=WINDDIRS,
+            )
+
+    def borehole(self):
+        return Borehole('B1', 10., x=110., y=120., z=1.,
+            segments=[Segment(0., 10., 'Z')])
+
+    def test_shared_borehole(self):
+        borehole = self.borehole()
+        horizontal = self.section([(0., 100.), (200., 100.)], 'A')
+        vertical = self.section([(100., 0.), (100., 200.)], 'B')
+        horizontal.add_boreholes([borehole])
+        vertical.add_boreholes([borehole])
+
+        # offset and wind label per section, not of the last one added
+        distance, _, label = horizontal.dist_dir(borehole)
+        assert np.isclose(distance, 20.)
+        assert label == 'N'
+        distance, _, label = vertical.dist_dir(borehole)
+        assert np.isclose(distance, 10.)
+        assert label == 'E'
+
+    def test_hash_independent_of_other_sections(self):
+        alone = self.section([(0., 100.), (200., 100.)], 'A')
+        alone.add_boreholes([self.borehole()])
+
+        borehole = self.borehole()
+        shared = self.section([(0., 100.), (200., 100.)], 'A')
+        shared.add_boreholes([borehole])
+        other = self.section([(100., 0.), (100., 200.)], 'B')
+        other.add_boreholes([borehole])
+
+        assert section_hash(shared, 'label') == section_hash(alone, 'label')
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+# Tom van Steijn, Royal HaskoningDHV
+
+from xsboringen.benchmarks import synthetic
+from xsboringen.datasources import boreholes_from_sources, SourceFilter
+from xsboringen.store import boreholes_to_store
+
+from pathlib import Path
+
+
+class TestSourceFilter(object):
+    line = {'type': 'LineString', 'coordinates': [(0., 500.), (1000., 500.)]}
+
+    def datasources(self, tmpdir):
+        folder = Path(str(tmpdir))
+        extent = (0., 0., 1000., 1000.)
+        synthetic.write_gef_boreholes(folder / 'gef', 20, layers=3,
+            extent=extent)
+        synthetic.write_gef_cpts(folder / 'cpt', 20, rows=50, extent=extent)
+        synthetic.write_dino_xml(folder / 'dino', 20, layers=3, extent=extent)
+        synthetic.write_bro_xml(folder / 'bro', 20, layers=3, extent=extent)
+        return [
+            {'format': 'GEF boringen', 'folder': str(folder / 'gef')},
+            {'format': 'GEF sonderingen', 'folder': str(folder / 'cpt'),
+                'datacolumns': {
+                    'depth': 'gecorrigeerde diepte',
+                    'cone_resistance': 'conusweerstand',
+                    'friction_ratio': 'wrijvingsgetal',
+                    }},
+            {'format': 'Dinoloket XML 1.4', 'folder': str(folder / 'dino')},
+            {'format': 'BRO XML', 'folder': str(folder / 'bro')},
+            ]
+
+    def test_accepts(self):
+        prefilter = SourceFilter.from_lines([self.line], 100.,
+            min_depth=5., formats=['GEF CPT'])
+        assert prefilter.bbox == (-100., 400., 1100., 600.)
+        assert prefilter.accepts(500., 550., 10.)
+        assert not prefilter.accepts(500., 700., 10.)
+        assert not prefilter.accepts(500., 550., 2.)
+        assert prefilter.accepts(None, None, None)
+        assert prefilter.accepts_format('GEF sonderingen')
+        assert not prefilter.accepts_format('GEF Borehole')
+
+    def test_pushdown(self, tmpdir):
+        datasources = self.datasources(tmpdir)
+        prefilter = SourceFilter.from_lines([self.line], 200., min_depth=3.)
+        expected = sorted(b.code for b in prefilter.filter(
+            boreholes_from_sources(datasources)))
+        assert 0 < len(expected) < 80
+
+        # unknown CPT depth accepted from header, rejected after parsing
+        boreholes = list(boreholes_from_sources(datasources,
+            prefilter=prefilter))
+        assert len(boreholes) < 80
+        assert sorted(b.code for b in prefilter.filter(boreholes)) == expected
+
+    def test_store(self, tmpdir):
+        datasources = self.datasources(tmpdir)
+        folder = Path(str(tmpdir)) / 'boreholes.xsb'
+        boreholes_to_store(boreholes_from_sources(datasources), folder)
+        prefilter = SourceFilter.from_lines([self.line], 200.,
+            formats=['GEF sonderingen'])
+        boreholes = list(boreholes_from_sources(
+            [{'format': 'XSB store', 'folder': str(folder)}],
+            prefilter=prefilter,
+            ))
+        assert boreholes
+        assert all(b.format == 'GEF CPT' for b in boreholes)
+        assert all(prefilter.accepts(b.x, b.y, b.depth) for b in boreholes)
+
+    def test_depth_window(self, tmpdir):
+        from xsboringen.calc import LithologyClassifier, AdmixClassifier
+        from xsboringen.benchmarks.suite import read_config
+        config = read_config()
+        classifier = LithologyClassifier(config['cpt_classification'],
+            ruletype='isbt')
+        admixclassifier = AdmixClassifier(config['admix_fieldnames'])
+        cpts = self.datasources(tmpdir)[1:2]
+        prefilter = SourceFilter(depths=(0.3, 0.6))
+        for full, clipped in zip(boreholes_from_sources(cpts),
+                boreholes_from_sources(cpts, prefilter=prefilter)):
+            assert len(clipped.verticals['cone_resistance']) < len(
+                full.verticals['cone_resistance'])
+            full.classify_lithology(classifier, admixclassifier)
+            clipped.classify_lithology(classifier, admixclassifier,
+                window=prefilter.depth_window(clipped.z))
+            expected = [(s.top, s.base, s.lithology) for s in full.segments
+                if s.overlaps(0.3, 0.6)]
+            assert [(s.top, s.base, s.lithology)
+                for s in clipped.segments] == expected
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 # Tom van Steijn, Royal HaskoningDHV
 
+from xsboringen.datasources import SourceFilter
 from xsboringen.geffiles import GefCPTFile, GefBoreholeFile
 
 import numpy as np
@@ -9,6 +10,9 @@ import glob
 import os
 
 DATADIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+EXAMPLEDIR = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'examples', 'example_solids', 'data',
+    'Boormonsterprofiel_Geologisch booronderzoek')
 
 
 class TestBoreholeFromGEF(object):
@@ -28,6 +32,29 @@ class TestBoreholeFromGEF(object):
         assert borehole.segments[-2].lithology == 'Zs1g1'
         assert borehole.segments[-2].color == ['GR',]
 
+    def test_depth_window(self, tmpdir):
+        with open(os.path.join(EXAMPLEDIR, 'B34F2081.gef')) as f:
+            lines = f.readlines()
+        geffile = tmpdir.join('nodepth.gef')
+        geffile.write(''.join(l for l in lines
+            if not l.startswith('#MEASUREMENTVAR = 16,')))
+
+        # rows outside window skipped before building segments
+        data = lines[lines.index('#EOH = \n') + 1:]
+        datalines = [l.rstrip('\n') for l in data]
+        segments = list(GefBoreholeFile.read_segments(datalines, ';', '!',
+            window=(1.4, 2.4)))
+        assert [(s.top, s.base) for s in segments] == [(0.5, 2.), (2., 2.4)]
+
+        # window from levels and z, depth from all rows
+        for prefilter in SourceFilter(depths=(1.4, 2.4)), SourceFilter(
+                levels=(28., 27.)):
+            gef = GefBoreholeFile(str(geffile), prefilter=prefilter)
+            borehole = gef.to_borehole()
+            assert np.isclose(borehole.depth, 4.)
+            assert [(s.top, s.base) for s in borehole.segments] == [
+                (0.5, 2.), (2., 2.4)]
+
 
 class TestCPTFromGEF(object):
     def test_read(self):
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+# Tom van Steijn, Royal HaskoningDHV
+
+from xsboringen.idffiles import IDFFile, write_idf
+from xsboringen.rasterfiles import sample
+
+import numpy as np
+
+import struct
+
+
+class TestIDFFile(object):
+    def write(self, tmpdir):
+        idffile = str(tmpdir.join('grid.idf'))
+        values = np.arange(12., dtype=np.float32).reshape(3, 4)
+        values[1, 2] = -9999.
+        write_idf(idffile, values, xmin=100., ymax=230., dx=10.)
+        return idffile, values
+
+    def test_header(self, tmpdir):
+        idffile, values = self.write(tmpdir)
+        header = IDFFile(idffile).header
+        assert (header.nrow, header.ncol) == (3, 4)
+        assert np.isclose(header.xmax, 140.)
+        assert np.isclose(header.ymin, 200.)
+        assert np.isclose(header.nodata, -9999.)
+
+    def test_grid(self, tmpdir):
+        idffile, values = self.write(tmpdir)
+        with IDFFile(idffile) as src:
+            assert isinstance(src.grid, np.memmap)
+            assert np.allclose(src.grid, values)
+
+    def test_sample(self, tmpdir):
+        idffile, values = self.write(tmpdir)
+        coords = [(105., 225.), (135., 201.), (125., 215.), (99., 225.)]
+        with IDFFile(idffile) as src:
+            sampled = src.sample(coords)
+        assert np.isclose(sampled[0], values[0, 0])
+        assert np.isclose(sampled[1], values[2, 3])
+        assert sampled.mask.tolist() == [False, False, True, True]
+
+    def test_sample_gridfile(self, tmpdir):
+        idffile, values = self.write(tmpdir)
+        sampled = [v for v in sample(idffile, [(115., 215.), (125., 215.)])]
+        assert np.isclose(sampled[0], values[1, 1])
+        assert np.isnan(sampled[1])
+
+    def test_double_precision(self, tmpdir):
+        idffile = str(tmpdir.join('double.idf'))
+        values = np.arange(12., dtype=np.float64).reshape(3, 4) + 0.1
+        write_idf(idffile, values, xmin=155000., ymax=463000., dx=25.,
+            double_precision=True)
+        with IDFFile(idffile) as src:
+            assert (src.header.nrow, src.header.ncol) == (3, 4)
+            assert src.header.dtype == np.dtype('<f8')
+            assert np.isclose(src.header.xmax, 155100.)
+            assert np.isclose(src.header.ymin, 462925.)
+            assert np.array_equal(src.grid, values)
+            sampled = src.sample([(155030., 462990.)])
+        assert np.isclose(sampled[0], values[0, 1])
+
+        # record length id of older iMOD versions
+        with open(idffile, 'r+b') as f:
+            f.write(struct.pack('i', 2296))
+        assert np.array_equal(IDFFile(idffile).grid, values)
+
+    def test_non_equidistant(self, tmpdir):
+        idffile = str(tmpdir.join('ieq.idf'))
+        values = np.arange(12., dtype=np.float32).reshape(3, 4)
+        write_idf(idffile, values, xmin=100., ymax=230.,
+            dx=[5., 10., 15., 20.], dy=[10., 5., 15.])
+        with IDFFile(idffile) as src:
+            assert src.header.ieq
+            assert np.allclose(src.header.dx, [5., 10., 15., 20.])
+            assert np.isclose(src.header.xmax, 150.)
+            assert np.isclose(src.header.ymin, 200.)
+            assert np.allclose(src.grid, values)
+            sampled = src.sample([(112., 218.), (149., 201.)])
+        assert np.isclose(sampled[0], values[1, 1])
+        assert np.isclose(sampled[1], values[2, 3])
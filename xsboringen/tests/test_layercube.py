@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+# Tom van Steijn, Royal HaskoningDHV
+
+from xsboringen.groundlayermodel import GroundLayerModel
+from xsboringen.idffiles import write_idf
+from xsboringen.layercube import LayerCube, compile_ground_layer_model
+from xsboringen.solid import Solid
+
+import numpy as np
+
+
+class TestLayerCube(object):
+    def model(self, tmpdir):
+        solids = []
+        for number, (top, base) in enumerate([(10., 5.), (5., -2.)], 1):
+            topfile = str(tmpdir.join('top{:d}.idf'.format(number)))
+            basefile = str(tmpdir.join('base{:d}.idf'.format(number)))
+            tops = np.full((5, 7), top, dtype=np.float32)
+            bases = np.full((5, 7), base, dtype=np.float32)
+            if number == 2:
+                tops[:, 5:] = -9999.
+            write_idf(topfile, tops, xmin=0., ymax=50., dx=10.)
+            write_idf(basefile, bases, xmin=0., ymax=50., dx=10.)
+            name = 'L{:d}'.format(number)
+            solids.append((number, Solid(name, topfile, basefile, res=10.)))
+        return GroundLayerModel(solids=solids, name='test')
+
+    def test_sample(self, tmpdir):
+        model = self.model(tmpdir)
+        cubefile = str(tmpdir.join('cube.npy'))
+        cube = compile_ground_layer_model(model, cubefile, tilesize=4)
+        assert isinstance(cube.data, np.memmap)
+        values = cube.sample([(5., 45.), (65., 5.), (-5., 45.)])
+        assert values.shape == (2, 2, 3)
+        assert np.allclose(values[:, :, 0], [[10., 5.], [5., -2.]])
+        assert np.isnan(values[1, 0, 1])
+        assert np.isnan(values[:, :, 2]).all()
+
+    def test_metadata(self, tmpdir):
+        model = self.model(tmpdir)
+        cubefile = str(tmpdir.join('cube.npy'))
+        compile_ground_layer_model(model, cubefile, tilesize=4)
+        cube = LayerCube(cubefile)
+        assert [l['name'] for l in cube.layers] == ['L1', 'L2']
+        assert np.isclose(cube.layers[1]['xmax'], 50.)
+
+    def test_from_cube(self, tmpdir):
+        model = self.model(tmpdir)
+        cubefile = str(tmpdir.join('cube.npy'))
+        compile_ground_layer_model(model, cubefile, tilesize=4)
+        cubemodel = GroundLayerModel.from_cube(cubefile, res=10., default={})
+        coords = [(5., 45.), (15., 35.)]
+        cubemodel.sample_profiles(coords)
+        number, solid = cubemodel.solids[0]
+        top, base = solid.sample_profile(coords)
+        assert np.allclose(top, 10.)
+        assert np.allclose(base, 5.)
+        assert cubemodel.solid_may_have_values(solid, (0., 0., 10., 10.))
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+# Tom van Steijn, Royal HaskoningDHV
+
+from xsboringen.borehole import Borehole, Segment
+from xsboringen.manifest import BuildManifest, content_hash
+
+
+class TestBuildManifest(object):
+    def borehole(self, lithology):
+        return Borehole('B1', 2., x=1., y=2., z=3., segments=[
+            Segment(0., 1., 'Z'),
+            Segment(1., 2., lithology),
+            ])
+
+    def test_content_hash(self):
+        first = content_hash(self.borehole('K'), {'b': 1, 'a': [1., 2.]})
+        second = content_hash(self.borehole('K'), {'a': [1., 2.], 'b': 1})
+        assert first == second
+        assert content_hash(self.borehole('V')) != content_hash(
+            self.borehole('K'))
+
+    def test_is_current(self, tmpdir):
+        manifestfile = tmpdir.join('manifest.json')
+        manifest = BuildManifest(str(manifestfile))
+        tmpdir.join('A.png').write('')
+        manifest.update('A.png', 'abc', ['A.png', 'A.csv'])
+        manifest.save()
+
+        manifest = BuildManifest(str(manifestfile))
+        assert not manifest.is_current('A.png', 'abc')
+        tmpdir.join('A.csv').write('')
+        assert manifest.is_current('A.png', 'abc')
+        assert not manifest.is_current('A.png', 'def')
+        assert not manifest.is_current('B.png', 'abc')
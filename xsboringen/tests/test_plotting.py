@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+# Tom van Steijn, Royal HaskoningDHV
+
+from xsboringen.borehole import Borehole, Segment
+from xsboringen.cross_section import CrossSection
+from xsboringen.plotting import CrossSectionPlot, MapPlot
+from xsboringen.styles import SegmentStylesLookup, SimpleStylesLookup
+
+from matplotlib import pyplot as plt
+import numpy as np
+
+
+class TestDecimate(object):
+    def test_decimate(self):
+        depth = -np.arange(0., 10., 0.001)
+        values = np.sin(depth * 5.)
+        values[5000] = 10.
+        values[7000:7100] = np.nan
+        x, y = CrossSectionPlot.decimate(values, depth, 0.05)
+        assert len(x) < len(values) / 10
+        assert np.nanmax(x) == 10.
+        assert np.isnan(x).sum() == 2
+        assert (x[0], y[0]) == (values[0], depth[0])
+        assert (x[-1], y[-1]) == (values[-1], depth[-1])
+        assert np.all(np.diff(y) < 0.)
+
+
+class TestMapPlot(object):
+    def mapplot(self, n, density_threshold):
+        boreholes = [
+            Borehole('B{i:d}'.format(i=i), 10., x=float(i), y=float(i % 7),
+                format=('GEF CPT', 'GEF Borehole')[i % 2])
+            for i in range(n)
+            ]
+        css = [CrossSection(
+            geometry={'type': 'LineString', 'coordinates': [(0., 0.), (5., 5.)]},
+            buffer_distance=1.,
+            label='A',
+            )]
+        styles = {'locations': SimpleStylesLookup(
+            records=[{'key': 'GEF CPT', 'label': 'sondering', 'marker': '^'}],
+            )}
+        return MapPlot(css, boreholes, styles,
+            config={'density_threshold': density_threshold},
+            )
+
+    def test_collections(self):
+        fig, ax = plt.subplots()
+        self.mapplot(100, 1000).plot(fig, ax)
+        assert len(ax.collections) == 4
+        labels = ax.get_legend_handles_labels()[1]
+        assert labels == ['GEF Borehole (50)', 'sondering (50)']
+        plt.close(fig)
+
+    def test_density(self):
+        fig, ax = plt.subplots()
+        self.mapplot(100, 10).plot(fig, ax)
+        assert len(ax.collections) == 3
+        plt.close(fig)
+
+
+class TestSegments(object):
+    def plot(self):
+        boreholes = [
+            Borehole('B1', 4., x=2., y=0., z=1., segments=[
+                Segment(0., 1., 'Z'),
+                Segment(1., 2., 'V'),
+                Segment(2., 3., 'K'),
+                Segment(3., 4., 'Z'),
+                ]),
+            Borehole('B2', 3., x=8., y=0., z=0.5, segments=[
+                Segment(0., 1.5, 'V'),
+                Segment(1.5, 2., 'V'),
+                Segment(2., 3., 'K'),
+                ]),
+            ]
+        cs = CrossSection(
+            geometry={'type': 'LineString', 'coordinates': [(0., 0.), (10., 0.)]},
+            buffer_distance=1.,
+            label='A',
+            )
+        styles = {'segments': SegmentStylesLookup(records=[
+            {'key': {'lithology': 'Z'}, 'label': 'zand',
+                'facecolor': 'yellow', 'edgecolor': 'black'},
+            {'key': {'lithology': 'V'}, 'label': 'veen',
+                'facecolor': 'brown', 'hatch': '//'},
+            {'key': {'lithology': 'K'}, 'label': 'klei',
+                'facecolor': 'green', 'alpha': 0.5, 'hatch': '..'},
+            ])}
+        plot = CrossSectionPlot(cs, styles, config={'merge_segments': False})
+        return plot, boreholes
+
+    def test_same_as_bars(self):
+        plot, boreholes = self.plot()
+        lefts, width = [0., 10.], 0.5
+
+        # reference: one bar per segment
+        fig, ax = plt.subplots()
+        bars = []
+        for borehole, left in zip(boreholes, lefts):
+            for segment in borehole:
+                style = dict(plot.styles['segments'].lookup(segment))
+                style.pop('label')
+                bars.extend(ax.bar(left, segment.thickness, width,
+                    borehole.z - segment.base, align='center', zorder=2,
+                    **style))
+        plt.close(fig)
+
+        fig, ax = plt.subplots()
+        collections = plot.plot_segments(ax, boreholes, lefts, width)
+        patches = [
+            (c.get_hatch(), p.vertices, f)
+            for c in collections
+            for p, f in zip(c.get_paths(), c.get_facecolors())
+            ]
+        plt.close(fig)
+
+        # per segment in drawing order
+        assert len(patches) == len(bars)
+        assert [c.get_zorder() for c in collections] == [2] * len(collections)
+        for bar, (hatch, vertices, facecolor) in zip(bars, patches):
+            assert bar.get_hatch() == hatch
+            assert np.allclose(bar.get_facecolor(), facecolor)
+            path = bar.get_path().transformed(bar.get_patch_transform())
+            assert len(path.vertices) == len(vertices)
+            assert np.allclose(path.vertices, vertices)
+
+        # hatched runs split collections, without reordering
+        assert [c.get_hatch() for c in collections] == [
+            None, '//', '..', None, '//', '..']
+
+
+class TestRenderModes(object):
+    def plot(self, render_mode='publication'):
+        from xsboringen.benchmarks.suite import read_config
+        config = read_config()
+        plot, boreholes = TestSegments().plot()
+        cs = plot.cs
+        cs.add_boreholes(boreholes)
+        styles = {
+            'segments': SegmentStylesLookup(records=[
+                {'key': {'lithology': 'Z'}, 'label': 'zand',
+                    'facecolor': 'yellow'},
+                {'key': {'lithology': 'V'}, 'label': 'veen',
+                    'facecolor': 'brown', 'hatch': '//'},
+                {'key': {'lithology': 'G'}, 'label': 'grind',
+                    'facecolor': 'orange'},
+                ]),
+            'verticals': SimpleStylesLookup(),
+            'surfaces': SimpleStylesLookup(),
+            'referenceplanes': SimpleStylesLookup(),
+            'solids': SimpleStylesLookup(),
+            'voxels': SimpleStylesLookup(),
+            }
+        return CrossSectionPlot(cs, styles,
+            config=config['cross_section_plot'],
+            xlabel='afstand [m]',
+            dist_txt=(False, 0, 'double_line', 'center', 'bottom'),
+            label_option='label',
+            render_mode=render_mode,
+            )
+
+    def legend_labels(self, plot):
+        fig, ax = plt.subplots()
+        plot.plot(fig, ax)
+        labels = [t.get_text() for t in ax.get_legend().get_texts()]
+        plt.close(fig)
+        return labels
+
+    def test_draft(self, tmpdir):
+        plot = self.plot(render_mode='draft')
+        assert plot.dpi == plot.cfg['draft_dpi'] < plot.cfg['figure_dpi']
+        assert plot.rasterized
+
+        # legend with used segment styles only, unused grind left out and
+        # default style of klei added
+        assert sorted(self.legend_labels(plot)) == [
+            'item_default', 'veen', 'zand']
+        assert sorted(self.legend_labels(self.plot())) == [
+            'grind', 'item_default', 'veen', 'zand']
+
+        # figure at draft dpi, fixed layout
+        imagefile = str(tmpdir.join('draft.png'))
+        plot.to_image(imagefile)
+        height, width = plt.imread(imagefile).shape[:2]
+        figwidth, figheight = plot.cfg['figure_size']
+        assert (width, height) == (
+            round(figwidth * plot.dpi), round(figheight * plot.dpi))
+
+    def test_vector(self, tmpdir):
+        plot = self.plot()
+        assert not plot.rasterized
+        plot.vector = True
+        assert plot.rasterized
+        assert plot.dpi == plot.cfg['vector_raster_dpi']
+
+        # dense collections rasterized, text and axes vector
+        fig, ax = plt.subplots()
+        plot.plot(fig, ax)
+        assert ax.collections
+        assert all(c.get_rasterized() for c in ax.collections)
+        assert not any(t.get_rasterized() for t in ax.texts)
+        assert not ax.get_rasterized()
+        plt.close(fig)
+
+        svgfile = tmpdir.join('section.svg')
+        plot.to_image(str(svgfile))
+        svg = svgfile.read()
+        assert '<image' in svg
+        assert '>afstand [m]</text>' in svg
+        assert 'id="xtick_1"' in svg
+
+        pdffile = tmpdir.join('section.pdf')
+        plot.to_image(str(pdffile))
+        pdf = pdffile.read_binary()
+        assert b'/Subtype /Image' in pdf
+        assert b'/FontFile2' in pdf
+
+        # raster output unchanged
+        plot.to_image(str(tmpdir.join('section.png')))
+        assert not plot.vector
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+# Tom van Steijn, Royal HaskoningDHV
+
+from xsboringen.geffiles import boreholes_from_gef
+from xsboringen import profiling
+
+from pathlib import Path
+import json
+import os
+
+EXAMPLEDIR = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'examples', 'example_solids', 'data',
+    'Boormonsterprofiel_Geologisch booronderzoek')
+
+
+class TestProfiler(object):
+    def test_disabled(self):
+        items = [1, 2, 3]
+        assert profiling.iterate('items', items) is items
+        with profiling.stage('nothing'):
+            pass
+
+    def test_nested(self, tmpdir):
+        profiler = profiling.enable()
+        try:
+            with profiling.stage('outer'):
+                items = profiling.iterate('inner', (i for i in range(3)))
+                assert list(items) == [0, 1, 2]
+        finally:
+            profiling.disable()
+        outer, inner = profiler.stages['outer'], profiler.stages['inner']
+        assert outer.calls == 1
+        assert inner.calls == 4
+        assert outer.self_wall <= outer.wall - inner.wall + 1e-9
+        assert 'inner' in profiler.report()
+
+        reportfile = str(tmpdir.join('profile.json'))
+        profiler.save(reportfile, function='plot')
+        with open(reportfile) as f:
+            report = json.load(f)
+        assert report['function'] == 'plot'
+        assert [s['name'] for s in report['stages']] == ['inner', 'outer']
+
+    def test_memory(self):
+        profiler = profiling.enable()
+        profiler.trace_memory(allocations=5)
+        try:
+            with profiling.stage('outer'):
+                with profiling.stage('allocate'):
+                    data = [bytearray(1024) for _ in range(1000)]
+                    del data
+        finally:
+            profiling.disable()
+        outer, allocate = profiler.stages['outer'], profiler.stages['allocate']
+        assert allocate.memory_peak > 1000 * 1024
+        assert outer.memory_peak >= allocate.memory_peak
+        assert allocate.memory < allocate.memory_peak
+        assert outer.allocations is not None
+        assert 'peak [MB]' in profiler.report()
+
+
+class TestIngestLog(object):
+    def test_read_gef(self, tmpdir):
+        with open(os.path.join(EXAMPLEDIR, 'B34F2081.gef')) as f:
+            lines = f.readlines()
+        variants = {
+            'complete.gef': lines,
+            'nodepth.gef': [l for l in lines
+                if not l.startswith('#MEASUREMENTVAR = 16,')],
+            'nocode.gef': [l for l in lines if not l.startswith('#TESTID')],
+            }
+        for name, variant in variants.items():
+            tmpdir.join(name).write(''.join(variant))
+
+        ingest = profiling.track_files()
+        try:
+            boreholes = list(boreholes_from_gef(Path(str(tmpdir))))
+        finally:
+            profiling.untrack_files()
+        assert len(boreholes) == 2
+        stats = {os.path.basename(f.file): f for f in ingest.files}
+        assert stats['complete.gef'].count == 5
+        assert stats['nodepth.gef'].fallback == 'depth_from_segments'
+        assert stats['nocode.gef'].skipped is not None
+
+        reportfile = str(tmpdir.join('ingest.csv'))
+        ingest.to_csv(reportfile, top=1)
+        with open(reportfile) as f:
+            categories = [l.split(',')[0] for l in f.readlines()[1:]]
+        assert categories == ['slowest', 'largest', 'fallback', 'skipped']
@@ -1,9 +1,41 @@
 # -*- coding: utf-8 -*-
 # Tom van Steijn, Royal HaskoningDHV
 
-from xsboringen.rasterfiles import sample
+from xsboringen.rasterfiles import sample, sample_raster_blocks
+
+import numpy as np
 
 
 class TestSample(object):
     def TestSampleTif(self):
         rasterfile = 0.
+
+
+class TestSampleRasterBlocks(object):
+    def write_raster(self, rasterfile):
+        import rasterio
+        from rasterio.transform import from_origin
+        data = np.arange(100 * 120, dtype=np.float32).reshape(100, 120)
+        data[0, 0] = -9999.
+        with rasterio.open(rasterfile, 'w',
+                driver='GTiff', width=120, height=100, count=1,
+                dtype='float32', nodata=-9999.,
+                transform=from_origin(0., 1000., 10., 10.),
+                tiled=True, blockxsize=32, blockysize=32,
+                ) as dst:
+            dst.write(data, 1)
+        return data
+
+    def test_sample_sets(self, tmpdir):
+        rasterfile = str(tmpdir.join('raster.tif'))
+        data = self.write_raster(rasterfile)
+        coordsets = [
+            [(5., 995.), (15., 995.), (1195., 5.)],
+            [(605., 505.), (2000., 505.)],
+            ]
+        line1, line2 = sample_raster_blocks(rasterfile, coordsets)
+        assert np.isnan(line1[0])
+        assert np.isclose(line1[1], data[0, 1])
+        assert np.isclose(line1[2], data[99, 119])
+        assert np.isclose(line2[0], data[49, 60])
+        assert np.isnan(line2[1])
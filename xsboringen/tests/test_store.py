@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+# Tom van Steijn, Royal HaskoningDHV
+
+from xsboringen.benchmarks import synthetic
+from xsboringen.datasources import boreholes_from_sources
+from xsboringen.store import XSBStore, boreholes_to_store
+
+import numpy as np
+import pytest
+
+
+def as_tuple(b):
+    return (
+        type(b).__name__,
+        {k: v for k, v in b.as_dict().items()
+            if k not in ('segments', 'verticals')},
+        [s.as_dict() for s in b.segments],
+        {k: v.as_dict() for k, v in b.verticals.items()},
+        )
+
+
+class TestXSBStore(object):
+    def test_roundtrip(self, tmpdir):
+        boreholes = list(synthetic.boreholes(5, layers=4))
+        boreholes += list(synthetic.cpts(3, rows=20))
+        boreholes[0].segments[0].sandmedian = None
+        boreholes[1].comment = 'extra'
+        folder = str(tmpdir.join('boreholes.xsb'))
+        assert boreholes_to_store(boreholes, folder, flush_rows=10) == 8
+        store = XSBStore(folder)
+        assert len(store) == 8
+        assert [as_tuple(b) for b in store] == [as_tuple(b)
+            for b in boreholes]
+
+    def test_columns(self, tmpdir):
+        boreholes = list(synthetic.boreholes(4, layers=3))
+        folder = str(tmpdir.join('boreholes.xsb'))
+        boreholes_to_store(boreholes, folder)
+        columns = XSBStore(folder).columns('boreholes')
+        assert isinstance(columns['x'], np.memmap)
+        assert np.allclose(columns['x'], [b.x for b in boreholes])
+        assert columns['segment_end'].tolist() == [3, 6, 9, 12]
+
+    def test_incomplete(self, tmpdir):
+        def boreholes():
+            yield from synthetic.boreholes(2, layers=3)
+            raise RuntimeError('reading failed')
+        folder = str(tmpdir.join('boreholes.xsb'))
+        with pytest.raises(RuntimeError):
+            boreholes_to_store(boreholes(), folder)
+        with pytest.raises(ValueError):
+            XSBStore(folder)
+
+    def test_datasource(self, tmpdir):
+        folder = str(tmpdir.join('boreholes.xsb'))
+        boreholes_to_store(synthetic.boreholes(3, layers=3), folder)
+        boreholes = list(boreholes_from_sources([
+            {'format': 'XSB store', 'folder': folder, 'priority': 2},
+            ]))
+        assert [b.code for b in boreholes] == [
+            'SYN000000', 'SYN000001', 'SYN000002']
+        assert all(b.priority == 2 for b in boreholes)
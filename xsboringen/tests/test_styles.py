@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+# Tom van Steijn, Royal HaskoningDHV
+
+from xsboringen.styles import SegmentStylesLookup
+
+from collections import namedtuple
+
+
+Segment = namedtuple('Segment', ['lithology', 'sandmedianclass'])
+
+
+class TestSegmentStylesLookup(object):
+    def lookup(self):
+        return SegmentStylesLookup(
+            records=[
+                {'key': {'lithology': 'Z'}, 'label': 'zand'},
+                {'key': {'lithology': 'Z', 'sandmedianclass': ['ZUF', 'ZZF']},
+                 'label': 'zand fijn'},
+                {'key': [{'lithology': 'K'}, {'lithology': 'L'}],
+                 'label': 'klei of leem'},
+                ],
+            default={'label': 'onbekend'},
+            )
+
+    def test_precedence(self):
+        lookup = self.lookup()
+        assert lookup.lookup(Segment('Z', 'ZUF'))['label'] == 'zand fijn'
+        assert lookup.lookup(Segment('Z', 'ZMG'))['label'] == 'zand'
+        assert lookup.lookup(Segment('L', None))['label'] == 'klei of leem'
+        assert lookup.lookup(Segment('V', None))['label'] == 'onbekend'
+
+    def test_memo(self):
+        lookup = self.lookup()
+        first = lookup.lookup(Segment('Z', 'ZZF'))
+        assert lookup.lookup(Segment('Z', 'ZZF')) is first
+        assert len(lookup.memo) == 1
+
+    def test_unhashable(self):
+        lookup = self.lookup()
+        segment = Segment(['Z'], None)
+        assert lookup.lookup(segment)['label'] == 'onbekend'
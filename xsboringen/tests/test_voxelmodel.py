@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+# Tom van Steijn, Royal HaskoningDHV
+
+from xsboringen.cross_section import CrossSection
+from xsboringen.plotting import CrossSectionPlot
+from xsboringen.styles import SimpleStylesLookup
+from xsboringen.voxelmodel import VoxelModel
+
+from matplotlib import pyplot as plt
+from matplotlib.colors import to_rgba
+import numpy as np
+import xarray as xr
+
+
+class TestVoxelModel(object):
+    # section across chunks of 4 x 4 cells, leaving the model at the end
+    line = {'type': 'LineString', 'coordinates': [(2., 3.), (130., 90.)]}
+
+    def voxelfile(self, tmpdir, chunked=True):
+        x = np.arange(5., 120., 10.)
+        y = np.arange(95., 0., -10.)
+        z = np.arange(-9.75, 0., 0.5)
+        rng = np.random.RandomState(1)
+        lithok = rng.randint(1, 4, (len(z), len(y), len(x))).astype(float)
+        lithok[0, :, :] = np.nan
+        dataset = xr.Dataset(
+            {'lithok': (('z', 'y', 'x'), lithok)},
+            coords={'x': x, 'y': y, 'z': z},
+            )
+        voxelfile = str(tmpdir.join('voxels.nc'))
+        encoding = {}
+        if chunked:
+            encoding['lithok'] = {'chunksizes': (len(z), 4, 4)}
+        dataset.to_netcdf(voxelfile, encoding=encoding)
+        return voxelfile, dataset['lithok']
+
+    def section(self):
+        return CrossSection(self.line, buffer_distance=10., label='A')
+
+    def expected(self, dataarray, coords):
+        xs, ys = np.array(coords).T
+        inside = ((xs >= 0.) & (xs < 120.)) & ((ys > 0.) & (ys <= 100.))
+        sampled = dataarray.sel(
+            x=xr.DataArray(xs[inside], dims='coord'),
+            y=xr.DataArray(ys[inside], dims='coord'),
+            method='nearest',
+            ).transpose('z', 'coord').values
+        return inside, sampled
+
+    def test_sample_chunked(self, tmpdir):
+        voxelfile, dataarray = self.voxelfile(tmpdir)
+        vm = VoxelModel('geotop', voxelfile, 'lithok', res=3.)
+        assert vm.chunks == (4, 4)
+
+        _, coords = zip(*self.section().discretize(vm.res))
+        values, z = vm.sample(coords)
+        inside, sampled = self.expected(dataarray, coords)
+        assert values.shape == (len(dataarray['z']), len(coords))
+        assert np.allclose(z, dataarray['z'].values)
+        assert np.allclose(values[:, inside], sampled, equal_nan=True)
+        assert np.isnan(values[:, ~inside]).all()
+        vm.close()
+
+    def test_sample_unchunked(self, tmpdir):
+        voxelfile, dataarray = self.voxelfile(tmpdir, chunked=False)
+        vm = VoxelModel('geotop', voxelfile, 'lithok', res=3., chunksize=3)
+        assert vm.chunks == (3, 3)
+
+        _, coords = zip(*self.section().discretize(vm.res))
+        values, z = vm.sample(coords)
+        inside, sampled = self.expected(dataarray, coords)
+        assert np.allclose(values[:, inside], sampled, equal_nan=True)
+        vm.close()
+
+    def test_plot_voxels(self, tmpdir):
+        voxelfile, dataarray = self.voxelfile(tmpdir)
+        vm = VoxelModel('geotop', voxelfile, 'lithok', res=3.)
+        cs = self.section()
+        cs.add_voxelmodel(vm)
+        colors = {1: 'red', 2: 'green', 3: 'blue'}
+        styles = {'voxels': SimpleStylesLookup(records=[
+            {'key': k, 'facecolor': c} for k, c in colors.items()
+            ])}
+        plot = CrossSectionPlot(cs, styles, config={})
+
+        fig, ax = plt.subplots()
+        mesh = plot.plot_voxels(ax, voxelmodel=vm, extensions=[])
+        values, z = vm.sample_profile(
+            list(zip(*cs.discretize(vm.res)))[1])
+
+        # one cell per voxel (z, distance), coloured by class, nodata masked
+        index = mesh.get_array()
+        assert index.shape == values.shape
+        assert np.array_equal(index.mask, np.isnan(values))
+        rgba = mesh.cmap(mesh.norm(index))
+        for value, color in colors.items():
+            assert np.allclose(rgba[values == value], to_rgba(color))
+        plt.close(fig)
+        vm.close()
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+# Tom van Steijn, Royal HaskoningDHV
+
+from xsboringen.writer import BackgroundWriter
+
+
+class TestBackgroundWriter(object):
+    def test_write(self, tmpdir):
+        with BackgroundWriter(threads=2, maxsize=1) as writer:
+            for i in range(5):
+                filepath = str(tmpdir.join('{i:d}.txt'.format(i=i)))
+                writer.write('A', filepath, str(i).encode())
+        assert not writer.errors
+        assert tmpdir.join('4.txt').read() == '4'
+        assert not tmpdir.listdir(lambda p: p.ext == '.tmp')
+
+    def test_errors(self, tmpdir):
+        tmpdir.mkdir('B.png')
+        with BackgroundWriter(threads=1) as writer:
+            writer.write('B', str(tmpdir.join('B.png')), b'')
+        assert [label for label, _, _ in writer.errors] == ['B']
+        assert not tmpdir.listdir(lambda p: p.ext == '.tmp')
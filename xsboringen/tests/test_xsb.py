@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+# Tom van Steijn, Royal HaskoningDHV
+
+from xsboringen.scripts import xsb
+
+import subprocess
+import sys
+import os
+
+
+class TestXsb(object):
+    heavy_modules = ['matplotlib', 'shapely', 'fiona', 'rasterio', 'xarray',
+        'pandas']
+
+    def test_import_time(self):
+        # importing the cli must not import plotting or raster dependencies
+        code = (
+            'import sys; import xsboringen.scripts.xsb; '
+            'print(",".join(m for m in {m!r:} if m in sys.modules))'
+            ).format(m=self.heavy_modules)
+        output = subprocess.check_output([sys.executable, '-c', code],
+            universal_newlines=True,
+            )
+        assert output.strip() == ''
+
+    def test_functions(self):
+        for function in xsb.FUNCTIONS:
+            assert callable(xsb.get_function(function))
+
+    def test_defaultconfig_cache(self, tmpdir):
+        scripts_folder = os.path.dirname(os.path.realpath(xsb.__file__))
+        defaultconfigfile = os.path.join(os.path.dirname(scripts_folder),
+            'defaultconfig.yaml')
+        cachefile = str(tmpdir.join('cache', 'defaultconfig.json'))
+        parsed = xsb.read_defaultconfig(defaultconfigfile, cachefile)
+        assert os.path.exists(cachefile)
+        cached = xsb.read_defaultconfig(defaultconfigfile, cachefile)
+        assert cached == parsed
@@ -0,0 +1,121 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# Tom van Steijn, Royal HaskoningDHV
+# Erik van Onselen, Deltares
+
+from xsboringen.rasterfiles import profile_key
+
+import xarray as xr
+import numpy as np
+
+import logging
+import os
+
+log = logging.getLogger(os.path.basename(__file__))
+
+
+class VoxelModel(object):
+    '''3D voxel model (x, y, z -> class) in NetCDF file, read chunk by chunk'''
+    def __init__(self, name, voxelfile, variable, res,
+            dims=None, chunksize=100,
+            ):
+        self.name = name
+
+        self.file = voxelfile
+        self.variable = variable
+        self.res = res
+        self.dims = dims or {'x': 'x', 'y': 'y', 'z': 'z'}
+        self.chunksize = chunksize
+
+        # opened lazily on first sample
+        self._dataset = None
+
+        # sampled (values, z) profiles by coords
+        self.profiles = {}
+
+    def __repr__(self):
+        return ('{s.__class__.__name__:}(name={s.name:}, '
+            'res={s.res:.2f})').format(s=self)
+
+    @property
+    def dataset(self):
+        if self._dataset is None:
+            log.debug('opening voxel model {f:}'.format(
+                f=os.path.basename(str(self.file))))
+            self._dataset = xr.open_dataset(self.file)
+        return self._dataset
+
+    @property
+    def dataarray(self):
+        return self.dataset[self.variable]
+
+    def close(self):
+        if self._dataset is not None:
+            self._dataset.close()
+        self._dataset = None
+
+    @property
+    def chunks(self):
+        '''chunk size in y and x, from file storage if chunked'''
+        da = self.dataarray
+        chunksizes = da.encoding.get('chunksizes')
+        if chunksizes is not None:
+            sizes = dict(zip(da.dims, chunksizes))
+            return sizes[self.dims['y']], sizes[self.dims['x']]
+        return self.chunksize, self.chunksize
+
+    @staticmethod
+    def cell_index(centers, values):
+        '''nearest cell index of values in regular centers, -1 if outside'''
+        delta = centers[1] - centers[0]
+        index = np.floor((values - centers[0]) / delta + 0.5).astype(int)
+        index[(index < 0) | (index >= len(centers))] = -1
+        return index
+
+    def sample(self, coords):
+        '''sample voxel columns at coords as array (z, coord) and z centers'''
+        da = self.dataarray
+        xdim, ydim, zdim = self.dims['x'], self.dims['y'], self.dims['z']
+        da = da.transpose(zdim, ydim, xdim)
+        coords = np.asarray(coords, dtype=float).reshape(-1, 2)
+        cols = self.cell_index(da[xdim].values, coords[:, 0])
+        rows = self.cell_index(da[ydim].values, coords[:, 1])
+        z = da[zdim].values.astype(float)
+        values = np.full((len(z), len(coords)), np.nan)
+
+        # read only the chunks crossed by the coords, one at a time
+        chunkrows, chunkcols = self.chunks
+        inside = np.flatnonzero((rows >= 0) & (cols >= 0))
+        chunkids = np.stack([
+            rows[inside] // chunkrows,
+            cols[inside] // chunkcols,
+            ], axis=1)
+        for chunkrow, chunkcol in np.unique(chunkids, axis=0):
+            row_off = chunkrow * chunkrows
+            col_off = chunkcol * chunkcols
+            chunk = da.isel({
+                ydim: slice(row_off, row_off + chunkrows),
+                xdim: slice(col_off, col_off + chunkcols),
+                }).values
+            in_chunk = inside[
+                (chunkids[:, 0] == chunkrow) & (chunkids[:, 1] == chunkcol)
+                ]
+            values[:, in_chunk] = chunk[:,
+                rows[in_chunk] - row_off,
+                cols[in_chunk] - col_off,
+                ]
+        return values, z
+
+    def sample_profile(self, coords):
+        '''sample voxel columns at coords once and keep profile for reuse'''
+        key = profile_key(coords)
+        if key not in self.profiles:
+            self.profiles[key] = self.sample(coords)
+        return self.profiles[key]
+
+    def release(self, coords=None):
+        '''release profile sampled at coords, or all profiles'''
+        if coords is None:
+            self.profiles.clear()
+        else:
+            self.profiles.pop(profile_key(coords), None)
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# Tom van Steijn, Royal HaskoningDHV
+# Erik van Onselen, Deltares
+
+from pathlib import Path
+import threading
+import logging
+import queue
+import os
+
+log = logging.getLogger(os.path.basename(__file__))
+
+
+def write_bytes(filepath, data):
+    '''write data to temporary file and move into place'''
+    filepath = Path(filepath)
+    tmpfile = filepath.with_name(filepath.name + '.tmp')
+    try:
+        with open(tmpfile, 'wb') as f:
+            f.write(data)
+        os.replace(tmpfile, filepath)
+    except OSError:
+        if tmpfile.exists():
+            tmpfile.unlink()
+        raise
+
+
+class BackgroundWriter(object):
+    '''Write output files in background threads through a bounded queue'''
+    def __init__(self, threads=2, maxsize=4):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.errors = []
+        self.threads = [
+            threading.Thread(target=self.work, daemon=True)
+            for _ in range(threads)
+            ]
+        for thread in self.threads:
+            thread.start()
+
+    def __repr__(self):
+        return ('{s.__class__.__name__:}(threads={n:d})').format(
+            s=self,
+            n=len(self.threads),
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def work(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                self.queue.task_done()
+                break
+            label, filepath, data = item
+            try:
+                write_bytes(filepath, data)
+            except Exception as e:
+                log.error('cannot write {f:} of {label:}: {e:}'.format(
+                    f=Path(filepath).name, label=label, e=e))
+                self.errors.append((label, filepath, e))
+            finally:
+                self.queue.task_done()
+
+    def write(self, label, filepath, data):
+        '''queue data to be written to filepath, wait if queue is full'''
+        log.info('saving {f.name:}'.format(f=Path(filepath)))
+        self.queue.put((label, filepath, data))
+
+    def close(self):
+        '''wait for all queued files to be written'''
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
@@ -3,6 +3,7 @@
 # BRO XML implementation by Erik van Onselen, Deltares
 
 from xsboringen.borehole import Borehole, Segment
+from xsboringen import profiling
 from xsboringen import utils
 
 from itertools import chain
@@ -19,23 +20,99 @@ from tqdm import tqdm
 log = logging.getLogger(os.path.basename(__file__))
 
 
-def dino_boreholes_from_xml(folder, version, extra_fields, use_filename, priority):
+def dino_boreholes_from_xml(folder, version, extra_fields, use_filename, priority, prefilter=None):
     xmlfiles = utils.careful_glob(folder, '*{:.1f}.xml'.format(version))
     for xmlfile in tqdm(xmlfiles, desc='Reading Dino XML Boreholes'):
-        xml = XMLBoreholeFile(xmlfile, 'Dino XML Borehole', priority)
-        borehole = xml.dino_to_borehole(extra_fields, use_filename)
+        borehole = dino_borehole_from_xml(xmlfile, extra_fields, use_filename, priority, prefilter)
         if borehole is not None:
             yield borehole
 
-def bro_boreholes_from_xml(folder, extra_fields, use_filename, priority):
+def bro_boreholes_from_xml(folder, extra_fields, use_filename, priority, prefilter=None):
     xmlfiles = utils.careful_glob(folder, '*.xml')
     for xmlfile in tqdm(xmlfiles, desc='Reading BRO XML Boreholes'):
-        xml = XMLBoreholeFile(xmlfile, 'BRO XML Borehole', priority)
-        borehole = xml.bro_to_borehole(extra_fields, use_filename)
+        borehole = bro_borehole_from_xml(xmlfile, extra_fields, use_filename, priority, prefilter)
         if borehole is not None:
             yield borehole
 
 
+def dino_borehole_from_xml(xmlfile, extra_fields, use_filename, priority, prefilter=None):
+    '''read borehole from single Dinoloket XML file, None if rejected by
+    prefilter'''
+    with profiling.read_file(xmlfile, 'Dino XML Borehole'):
+        if (prefilter is not None) and not prefilter.accepts(
+                *prescan_xml(xmlfile, 'Dino XML Borehole')):
+            return
+        xml = XMLBoreholeFile(xmlfile, 'Dino XML Borehole', priority)
+        borehole = xml.dino_to_borehole(extra_fields, use_filename)
+        if prefilter is not None:
+            prefilter.clip_borehole(borehole)
+        profiling.note_file(borehole=borehole)
+    return borehole
+
+
+def bro_borehole_from_xml(xmlfile, extra_fields, use_filename, priority, prefilter=None):
+    '''read borehole from single BRO XML file, None if rejected by
+    prefilter'''
+    with profiling.read_file(xmlfile, 'BRO XML Borehole'):
+        if (prefilter is not None) and not prefilter.accepts(
+                *prescan_xml(xmlfile, 'BRO XML Borehole')):
+            return
+        xml = XMLBoreholeFile(xmlfile, 'BRO XML Borehole', priority)
+        borehole = xml.bro_to_borehole(extra_fields, use_filename)
+        if prefilter is not None:
+            prefilter.clip_borehole(borehole)
+        profiling.note_file(borehole=borehole)
+    return borehole
+
+
+def prescan_xml(xmlfile, format):
+    '''x, y and final depth in m from start of XML file, stops before the
+    lithology descriptions, None if not found'''
+    def safe_float(s):
+        try:
+            return float(s)
+        except (TypeError, ValueError):
+            return None
+
+    x, y, depth = None, None, None
+    located = format != 'BRO XML Borehole'
+    with open(xmlfile, 'rb') as f:
+        try:
+            for event, element in ElementTree.iterparse(f,
+                    events=('start', 'end')):
+                tag = element.tag.rsplit('}', 1)[-1]
+                if event == 'start':
+                    if tag in ('lithoDescr', 'boreholeSampleDescription'):
+                        break
+                    elif tag == 'deliveredLocation':
+                        located = True
+                    elif (format == 'Dino XML Borehole') and (tag == 'borehole'):
+                        depth = safe_float(element.attrib.get('baseDepth'))
+                        if depth is not None:
+                            depth *= 1e-2  # to m
+                    continue
+
+                if format == 'Dino XML Borehole':
+                    # first coordinates are RD, as read by dino_to_borehole
+                    if (tag == 'coordinateX') and (x is None):
+                        x = safe_float(element.text)
+                    elif (tag == 'coordinateY') and (y is None):
+                        y = safe_float(element.text)
+                else:
+                    if (tag == 'pos') and located and (x is None):
+                        coordinates = (element.text or '').split()
+                        if len(coordinates) >= 2:
+                            x = safe_float(coordinates[0])
+                            y = safe_float(coordinates[1])
+                    elif tag == 'finalDepthBoring':
+                        depth = safe_float(element.text)
+                if all(v is not None for v in (x, y, depth)):
+                    break
+        except ElementTree.ParseError:
+            pass
+    return x, y, depth
+
+
 class XMLFile(object):
     # format field
     _format = None
@@ -248,6 +325,7 @@ class XMLBoreholeFile(XMLFile):
             depth *= 1e-2  # to m
         except TypeError:
             depth = self.depth_from_segments(segments)
+            profiling.note_file(fallback='depth_from_segments')
 
         # x,y coordinates
         coordinates = survey.find('surveyLocation/coordinates')
@@ -319,6 +397,7 @@ class XMLBoreholeFile(XMLFile):
             depth *= 1  
         except TypeError:
             depth = self.depth_from_segments(segments)
+            profiling.note_file(fallback='depth_from_segments')
 
         # x,y coordinates
         coordinates = survey.find('bhrgt:deliveredLocation/bhrgtcom:location/gml:Point/gml:pos', self.ns).text.split(' ')